@@ -1,6 +1,9 @@
 from fastapi import APIRouter
-from .endpoints import products, health
+from .endpoints import products, health, scenarios, analytics, scrapes
 
 router = APIRouter()
 router.include_router(products.router, prefix="/products", tags=["products"])
-router.include_router(health.router, prefix="/health", tags=["health"])
\ No newline at end of file
+router.include_router(health.router, prefix="/health", tags=["health"])
+router.include_router(scenarios.router, prefix="/scenarios", tags=["scenarios"])
+router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+router.include_router(scrapes.router, prefix="/scrapes", tags=["scrapes"])
\ No newline at end of file
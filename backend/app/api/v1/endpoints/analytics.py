@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+from app.core.database import get_read_db
+from app.schemas.analytics import DistributionResponse
+from app.services.analytics import distribution
+from app.services.catalog_snapshot import get_catalog_snapshot
+
+router = APIRouter()
+
+@router.get("/distribution", response_model=DistributionResponse)
+def get_distribution(
+    metric: Literal["mrr_low", "mrr_likely", "mrr_high", "visits_month", "max_price", "min_paid_price"] = "mrr_likely",
+    group_by: Optional[Literal["category", "marketplace", "tag"]] = None,
+    bins: int = Query(20, ge=1, le=200),
+    scale: Literal["linear", "log"] = "linear",
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """Distribution of a per-product metric from the in-memory catalog snapshot"""
+    return distribution(get_catalog_snapshot(db), metric, group_by, bins, scale, limit)
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.core.database import get_db, get_read_db
 from app.models.product import Product
-from app.models.marketplace import ProductMarketplace, Marketplace
+from app.models.marketplace import ProductMarketplace, Marketplace, ListingPricePlan
 from app.models.estimate import MrrEstimate
 from app.models.traffic import TrafficData
-from app.schemas.product import ProductResponse, ProductListResponse, Product
+from app.schemas.product import ProductResponse, ProductListResponse, Product as ProductDetail
 from app.services.mrr_estimator import MrrEstimator
 from app.services.traffic_estimator import TrafficEstimator
+from app.services.comparison import compare_products
+from app.schemas.comparison import ComparisonResponse
+from app.services.bulk_import import find_marketplace, import_ndjson
+from app.schemas.bulk_import import BulkImportResponse
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -20,7 +26,10 @@ def list_products(
     tag: str = None,
     min_mrr: float = None,
     max_mrr: float = None,
-    db: Session = Depends(get_db)
+    min_price: float = None,
+    max_price: float = None,
+    has_free_plan: bool = None,
+    db: Session = Depends(get_read_db)
 ):
     """List products with optional filtering"""
     query = db.query(Product)
@@ -39,6 +48,25 @@ def list_products(
         if max_mrr is not None:
             query = query.filter(MrrEstimate.mrr_likely <= max_mrr)
     
+    if min_price is not None or max_price is not None:
+        # Products with at least one paid plan in the range, in USD per month
+        plan_in_range = db.query(ListingPricePlan.id).filter(
+            ListingPricePlan.product_id == Product.id,
+            ListingPricePlan.is_free == False
+        )
+        if min_price is not None:
+            plan_in_range = plan_in_range.filter(ListingPricePlan.usd_monthly_price >= min_price)
+        if max_price is not None:
+            plan_in_range = plan_in_range.filter(ListingPricePlan.usd_monthly_price <= max_price)
+        query = query.filter(plan_in_range.exists())
+    
+    if has_free_plan is not None:
+        free_plan = db.query(ListingPricePlan.id).filter(
+            ListingPricePlan.product_id == Product.id,
+            ListingPricePlan.is_free == True
+        ).exists()
+        query = query.filter(free_plan if has_free_plan else ~free_plan)
+    
     # Get total count before pagination
     total = query.count()
     
@@ -52,8 +80,39 @@ def list_products(
         per_page=limit
     )
 
+# Declared before /{product_id} so "compare" isn't parsed as an id
+@router.get("/compare", response_model=ComparisonResponse)
+def compare(ids: str = Query(..., description="Comma-separated product ids"), db: Session = Depends(get_read_db)):
+    """Compare products side by side: listings per marketplace, aligned price tiers, estimates and traffic"""
+    try:
+        product_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not product_ids:
+        raise HTTPException(status_code=400, detail="At least one product id is required")
+    if len(set(product_ids)) > settings.COMPARE_MAX_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.COMPARE_MAX_PRODUCTS} products can be compared")
+    
+    comparison = compare_products(db, product_ids)
+    if not comparison.products:
+        raise HTTPException(status_code=404, detail="Products not found")
+    return comparison
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import(
+    request: Request,
+    marketplace: Optional[str] = Query(None, description="Marketplace the listings belong to (default: Product Hunt)"),
+    with_estimates: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Upsert products from a streamed NDJSON body, one scraper-format product per line"""
+    found = await run_in_threadpool(find_marketplace, db, marketplace)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Marketplace not found")
+    return await import_ndjson(request.stream(), db, found, with_estimates=with_estimates)
+
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, db: Session = Depends(get_read_db)):
     """Get detailed information for a specific product"""
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
@@ -88,7 +147,7 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
     traffic = db.query(TrafficData).filter(TrafficData.product_id == product_id).first()
     
     # Convert to response format
-    product_response = Product(
+    product_response = ProductDetail(
         id=product.id,
         name=product.name,
         canonical_url=product.canonical_url,
@@ -116,7 +175,7 @@ def search_products(
     q: str = Query(..., min_length=1),
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Search products by name, description, tags, or categories"""
     query = db.query(Product).filter(
@@ -140,7 +199,7 @@ def search_products(
     )
 
 @router.get("/{product_id}/estimates")
-def get_product_estimates(product_id: int, db: Session = Depends(get_db)):
+def get_product_estimates(product_id: int, db: Session = Depends(get_read_db)):
     """Get MRR estimates for a specific product"""
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
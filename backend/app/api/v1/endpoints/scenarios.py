@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.database import get_read_db
+from app.schemas.scenario import ScenarioRequest, ScenarioResponse
+from app.services.catalog_snapshot import get_catalog_snapshot
+from app.services.scenarios import evaluate_scenario
+
+router = APIRouter()
+
+@router.post("/evaluate", response_model=ScenarioResponse)
+def evaluate(request: ScenarioRequest, db: Session = Depends(get_read_db)):
+    """Evaluate custom MRR estimator parameters over the catalog without writing anything"""
+    return evaluate_scenario(get_catalog_snapshot(db), request)
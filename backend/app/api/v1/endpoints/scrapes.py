@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.database import get_read_db
+from app.models.marketplace import Marketplace
+from app.schemas.scrape_stats import ScrapeStatsResponse
+from app.services.scrape_stats import scrape_stats
+
+router = APIRouter()
+
+@router.get("/stats", response_model=ScrapeStatsResponse)
+def get_scrape_stats(
+    marketplace: Optional[str] = None,
+    window: str = "24h",
+    bucket: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Scrape health over the last `window` (e.g. 15m, 24h, 7d): status rates, durations and throughput"""
+    marketplace_id = None
+    if marketplace:
+        marketplace_id = db.query(Marketplace.id).filter(Marketplace.name == marketplace).scalar()
+        if marketplace_id is None:
+            raise HTTPException(status_code=404, detail="Marketplace not found")
+    
+    try:
+        return scrape_stats(db, marketplace_id, window, bucket, marketplace_name=marketplace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,11 @@
-from sqlalchemy import create_engine
+import time
+import threading
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
 engine = create_engine(settings.DATABASE_URL)
@@ -8,9 +13,106 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
+# Cookie set after a write so the same client reads from the primary for a while
+LAST_WRITE_COOKIE = "db_last_write"
+# Header a client can send to force a read from the primary
+CONSISTENT_READ_HEADER = "X-Consistent-Read"
+
+def get_db(request: Request = None):
     db = SessionLocal()
+    if request is not None:
+        # Read-your-writes: mark_last_write sets the cookie once this request has committed
+        event.listen(db, "after_commit", lambda session: setattr(request.state, "db_committed", True))
+    try:
+        yield db
+    finally:
+        db.close()
+
+class ReadRouter:
+    """
+    Chooses the engine for read-only sessions: replicas in round-robin order,
+    skipping any that failed in the last `retry_after` seconds, then the primary.
+    """
+
+    def __init__(self, primary, replicas: List, retry_after: Optional[float] = None, clock=time.monotonic):
+        self.primary = primary
+        self.replicas = replicas
+        self._sessionmakers = {
+            candidate: sessionmaker(autocommit=False, autoflush=False, bind=candidate)
+            for candidate in [primary] + replicas
+        }
+        self.retry_after = settings.READ_REPLICA_RETRY_SECONDS if retry_after is None else retry_after
+        self.clock = clock
+        self._next = 0
+        self._failed_at = {}
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List:
+        with self._lock:
+            now = self.clock()
+            start = self._next
+            self._next = (self._next + 1) % max(len(self.replicas), 1)
+            ordered = self.replicas[start:] + self.replicas[:start]
+            healthy = [replica for replica in ordered
+                       if now - self._failed_at.get(replica, float("-inf")) >= self.retry_after]
+        return healthy + [self.primary]
+
+    def mark_failed(self, replica):
+        with self._lock:
+            self._failed_at[replica] = self.clock()
+
+    def session(self, primary_only: bool = False) -> Session:
+        """A session on the first reachable candidate; the primary's errors are raised as usual"""
+        for candidate in ([self.primary] if primary_only else self.candidates()):
+            if candidate is not self.primary:
+                try:
+                    # Check a replica connection out (and back into the pool) now, so an
+                    # unreachable replica fails over here rather than mid-request
+                    with candidate.connect():
+                        pass
+                except OperationalError as e:
+                    print(f"Read replica {candidate.url.render_as_string(hide_password=True)} unavailable: {e}")
+                    self.mark_failed(candidate)
+                    continue
+            return self._sessionmakers[candidate]()
+
+read_router = ReadRouter(
+    engine, [create_engine(url, pool_pre_ping=True) for url in settings.DATABASE_READ_URLS]
+)
+
+def wants_primary(request: Optional[Request]) -> bool:
+    """Read-your-writes: the client asked for it, or wrote within READ_YOUR_WRITES_SECONDS"""
+    if request is None:
+        return False
+    if request.headers.get(CONSISTENT_READ_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    if settings.READ_YOUR_WRITES_SECONDS > 0:
+        try:
+            last_write = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+        except ValueError:
+            return False
+        return time.time() - last_write < settings.READ_YOUR_WRITES_SECONDS
+    return False
+
+async def mark_last_write(request: Request, call_next):
+    """
+    Middleware: after a request commits through get_db, the client's reads go to the
+    primary until replicas catch up. Requests that only read (any method) leave reads alone.
+    """
+    response = await call_next(request)
+    if settings.READ_YOUR_WRITES_SECONDS > 0 and getattr(request.state, "db_committed", False):
+        response.set_cookie(LAST_WRITE_COOKIE, str(time.time()),
+                            max_age=int(settings.READ_YOUR_WRITES_SECONDS) + 1, httponly=True)
+    return response
+
+def open_read_session() -> Session:
+    """Read-only session outside a request, e.g. for background jobs"""
+    return read_router.session()
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: a replica when configured and healthy, else the primary"""
+    db = read_router.session(primary_only=wants_primary(request))
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
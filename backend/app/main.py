@@ -2,8 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import router as api_v1_router
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.core.database import engine, Base, mark_last_write, open_read_session
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job, fx_rate, history_rollup
+from app.services.catalog_snapshot import SnapshotRefresher
+from app.services.change_events import ChangeListener
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -22,9 +24,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes: after a write, the client's reads go to the primary until replicas catch up
+app.middleware("http")(mark_last_write)
+
 # Include API routes
 app.include_router(api_v1_router, prefix=settings.API_V1_STR)
 
+# Keep the analytics snapshot warm so requests never wait for a rebuild
+snapshot_refresher = SnapshotRefresher(open_read_session)
+
+# Drop cache entries when another process (scraper, worker, another API worker) writes
+change_listener = ChangeListener()
+
+@app.on_event("startup")
+def start_snapshot_refresher():
+    if settings.CATALOG_SNAPSHOT_REFRESH_SECONDS > 0:
+        snapshot_refresher.start()
+
+@app.on_event("startup")
+def start_change_listener():
+    if settings.CHANGE_EVENTS_ENABLED and engine.dialect.name == "postgresql":
+        change_listener.start()
+
+@app.on_event("shutdown")
+def stop_background_threads():
+    snapshot_refresher.stop()
+    change_listener.stop()
+
 @app.get("/")
 async def root():
     return {"message": "Marketplace Intelligence API"}
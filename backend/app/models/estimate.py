@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.base import BaseModel
@@ -14,6 +14,12 @@ class MrrEstimate(Base, BaseModel):
     confidence = Column(Float)  # 0.0 to 1.0
     assumptions = Column(JSON)  # Array of assumptions used
     methodology = Column(String)  # Description of how estimate was calculated
+    input_fingerprint = Column(String, nullable=True)  # Hash of price plans, traffic and estimator version
+    estimator_version = Column(String, nullable=True)  # MrrEstimator.VERSION that produced the estimate
     
     # Relationships
-    product = relationship("Product", back_populates="estimates")
\ No newline at end of file
+    product = relationship("Product", back_populates="estimates")
+
+# Latest estimate per product is looked up on every save and recompute
+Index('idx_mrr_estimate_product_id', MrrEstimate.product_id, MrrEstimate.id)
+Index('idx_mrr_estimate_created_at', MrrEstimate.created_at)
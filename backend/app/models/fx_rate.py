@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, Float
+from app.core.database import Base
+from app.models.base import BaseModel
+
+class FxRate(Base, BaseModel):
+    __tablename__ = "fx_rates"
+    
+    currency = Column(String, primary_key=True)  # ISO 4217 code
+    usd_rate = Column(Float)  # USD per unit of the currency
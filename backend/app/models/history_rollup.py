@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index, UniqueConstraint
+from app.core.database import Base
+from app.models.base import BaseModel
+
+class ScrapeLogRollup(Base, BaseModel):
+    """Daily request counts per marketplace and status, for scrape logs past their raw retention"""
+    __tablename__ = "scrape_log_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date)
+    marketplace_id = Column(Integer, ForeignKey("marketplaces.id"), nullable=True)
+    status = Column(String, nullable=True)
+    requests = Column(Integer, default=0)
+    total_duration = Column(Integer, default=0)  # In milliseconds, summed over requests
+    max_duration = Column(Integer, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint('day', 'marketplace_id', 'status', name='uq_scrape_log_rollup_key'),
+    )
+
+class TrafficRollup(Base, BaseModel):
+    """Weekly traffic per product, for traffic rows past their raw retention"""
+    __tablename__ = "traffic_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"))
+    week_start = Column(Date)  # Monday
+    samples = Column(Integer, default=0)
+    visits_month_avg = Column(Float, nullable=True)
+    visits_month_min = Column(Integer, nullable=True)
+    visits_month_max = Column(Integer, nullable=True)
+    visits_growth_avg = Column(Float, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint('product_id', 'week_start', name='uq_traffic_rollup_key'),
+    )
+
+class MrrEstimateRollup(Base, BaseModel):
+    """Weekly average MRR estimates per product, for estimates past their raw retention"""
+    __tablename__ = "mrr_estimate_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"))
+    week_start = Column(Date)  # Monday
+    samples = Column(Integer, default=0)
+    mrr_low_avg = Column(Float, nullable=True)
+    mrr_likely_avg = Column(Float, nullable=True)
+    mrr_high_avg = Column(Float, nullable=True)
+    confidence_avg = Column(Float, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint('product_id', 'week_start', name='uq_mrr_estimate_rollup_key'),
+    )
+
+Index('idx_scrape_log_rollup_day', ScrapeLogRollup.day)
+Index('idx_traffic_rollup_week_start', TrafficRollup.week_start)
+Index('idx_mrr_estimate_rollup_week_start', MrrEstimateRollup.week_start)
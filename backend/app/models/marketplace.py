@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, Boolean, ForeignKey, Index, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, JSON, Boolean, Float, ForeignKey, Index, DateTime, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.base import BaseModel
@@ -26,7 +26,7 @@ class ProductMarketplace(Base, BaseModel):
     upvotes = Column(Integer, default=0)
     reviews_count = Column(Integer, default=0)
     rating = Column(Integer, default=0)  # Out of 5
-    price_plans = Column(JSON)  # Array of price plans
+    price_plans = Column(JSON)  # Array of price plans, as scraped
     raw_data = Column(JSON)  # Raw data from the marketplace
     is_blocked = Column(Boolean, default=False)
     is_unstable = Column(Boolean, default=False)
@@ -34,10 +34,41 @@ class ProductMarketplace(Base, BaseModel):
     # Relationships
     product = relationship("Product", back_populates="marketplaces")
     marketplace = relationship("Marketplace", back_populates="product_listings")
+    plans = relationship("ListingPricePlan", back_populates="listing", cascade="all, delete-orphan")
     
     # Snapshot path for raw HTML/data
     snapshot_path = Column(String)
+    
+    # Change tracking for adaptive re-crawling
+    content_hash = Column(String, nullable=True)  # Hash of the last scraped content
+    unchanged_count = Column(Integer, default=0)  # Consecutive scrapes without changes
+    last_scraped_at = Column(DateTime, nullable=True)
+    last_changed_at = Column(DateTime, nullable=True)
+    next_scrape_at = Column(DateTime, nullable=True)  # When the listing is due again
+
+class ListingPricePlan(Base, BaseModel):
+    """One row per price plan of a listing, kept in sync with ProductMarketplace.price_plans"""
+    __tablename__ = "listing_price_plans"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    listing_id = Column(Integer, ForeignKey("product_marketplaces.id"))
+    product_id = Column(Integer, ForeignKey("products.id"))  # Denormalized for per-product price queries
+    name = Column(String)
+    price = Column(Float)  # As listed, in `currency` per `period`
+    currency = Column(String)
+    period = Column(String)  # monthly, annually, lifetime
+    is_popular = Column(Boolean, default=False)
+    is_free = Column(Boolean, default=False)
+    usd_monthly_price = Column(Float, nullable=True)  # Null when the currency has no FX rate
+    
+    # Relationships
+    listing = relationship("ProductMarketplace", back_populates="plans")
 
 # Indexes for faster queries
 Index('idx_product_marketplace_product_id', ProductMarketplace.product_id)
-Index('idx_product_marketplace_marketplace_id', ProductMarketplace.marketplace_id)
\ No newline at end of file
+Index('idx_product_marketplace_marketplace_id', ProductMarketplace.marketplace_id)
+Index('idx_product_marketplace_next_scrape_at', ProductMarketplace.next_scrape_at)
+Index('idx_listing_price_plan_listing_id', ListingPricePlan.listing_id)
+Index('idx_listing_price_plan_product_price', ListingPricePlan.product_id, ListingPricePlan.usd_monthly_price)
+Index('idx_listing_price_plan_usd_monthly_price', ListingPricePlan.usd_monthly_price)
+Index('idx_listing_price_plan_free', ListingPricePlan.is_free, ListingPricePlan.product_id)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.base import BaseModel
+
+class ScrapeJob(Base, BaseModel):
+    __tablename__ = "scrape_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)  # Groups the jobs of one scrape run
+    url = Column(String)
+    marketplace_id = Column(Integer, ForeignKey("marketplaces.id"))
+    state = Column(String, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, default=0)
+    lease_owner = Column(String, nullable=True)  # Worker currently holding the job
+    lease_expires_at = Column(DateTime, nullable=True)  # Lease end; for deferred pending jobs, when they become claimable
+    last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    marketplace = relationship("Marketplace")
+    
+    __table_args__ = (
+        UniqueConstraint('run_id', 'url', name='uq_scrape_job_run_url'),
+    )
+
+# Index used by workers claiming the next job
+Index('idx_scrape_job_state_lease', ScrapeJob.state, ScrapeJob.lease_expires_at)
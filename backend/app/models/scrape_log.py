@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -10,7 +10,7 @@ class ScrapeLog(Base):
     marketplace_id = Column(Integer, ForeignKey("marketplaces.id"))
     url = Column(String)
     status_code = Column(Integer)
-    status = Column(String)  # success, blocked, timeout, error
+    status = Column(String)  # success, not_modified, blocked, timeout, error
     duration = Column(Integer)  # In milliseconds
     error_message = Column(Text, nullable=True)
     snapshot_path = Column(String, nullable=True)  # Path to raw data snapshot
@@ -18,4 +18,10 @@ class ScrapeLog(Base):
     
     # Relationships
     product = relationship("Product", back_populates="scrape_logs")
-    marketplace = relationship("Marketplace")
\ No newline at end of file
+    marketplace = relationship("Marketplace")
+
+# Range scans over recent logs and the retention job's window scans
+Index('idx_scrape_log_timestamp', ScrapeLog.timestamp)
+# Scrape health stats per marketplace; on PostgreSQL the included columns make it index-only
+Index('idx_scrape_log_marketplace_timestamp', ScrapeLog.marketplace_id, ScrapeLog.timestamp,
+      postgresql_include=['status', 'duration'])
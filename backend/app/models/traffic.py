@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.base import BaseModel
@@ -15,4 +15,8 @@ class TrafficData(Base, BaseModel):
     traffic_sources = Column(String)  # JSON string of traffic sources
     
     # Relationships
-    product = relationship("Product", back_populates="traffic_data")
\ No newline at end of file
+    product = relationship("Product", back_populates="traffic_data")
+
+# Latest traffic per product, and range scans by the retention job
+Index('idx_traffic_data_product_id', TrafficData.product_id, TrafficData.id)
+Index('idx_traffic_data_created_at', TrafficData.created_at)
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+class Histogram(BaseModel):
+    edges: List[float]  # len(counts) + 1 bin edges, shared by every group
+    counts: List[int]
+
+class DistributionStats(BaseModel):
+    count: int  # products with a value for the metric
+    total: float
+    mean: Optional[float] = None
+    percentiles: Dict[str, float] = {}  # e.g. {"p50": 1200.0}
+    histogram: Histogram
+
+class GroupDistribution(DistributionStats):
+    group: str
+
+class DistributionResponse(BaseModel):
+    metric: str
+    group_by: Optional[str] = None
+    overall: DistributionStats
+    groups: List[GroupDistribution] = []
+    snapshot_age_seconds: float
+    snapshot_products: int
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.schemas.product import PricePlan
+
+class ScrapedProduct(BaseModel):
+    """One NDJSON line: a product in the scrapers' normalized format"""
+    name: str = Field(min_length=1)
+    description: str = ""
+    url: str = Field(min_length=1)
+    upvotes: int = 0
+    tags: List[str] = []
+    categories: List[str] = []
+    price_plans: List[PricePlan] = []
+
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+class BulkImportResponse(BaseModel):
+    marketplace: str
+    lines: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[BulkImportError] = []
+    errors_truncated: bool = False  # more than BULK_IMPORT_MAX_ERRORS lines failed
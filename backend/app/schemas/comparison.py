@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.schemas.product import TrafficInfo
+
+class ComparedPlan(BaseModel):
+    name: Optional[str] = None
+    price: float
+    currency: Optional[str] = None
+    period: Optional[str] = None
+    usd_monthly_price: Optional[float] = None
+    is_popular: bool = False
+
+class EstimateSummary(BaseModel):
+    mrr_low: Optional[float] = None
+    mrr_likely: Optional[float] = None
+    mrr_high: Optional[float] = None
+    confidence: Optional[float] = None
+
+class ComparedProduct(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    categories: List[str] = []
+    tags: List[str] = []
+    estimates: Optional[EstimateSummary] = None
+    traffic: Optional[TrafficInfo] = None
+    highest_plan: Optional[ComparedPlan] = None
+
+class MarketplaceCell(BaseModel):
+    listing_url: Optional[str] = None
+    rating: Optional[float] = None
+    upvotes: Optional[int] = None
+    reviews_count: Optional[int] = None
+
+class MarketplaceRow(BaseModel):
+    marketplace: str
+    cells: List[Optional[MarketplaceCell]]  # One per product, in `products` order; None when not listed
+
+class PriceTierRow(BaseModel):
+    tier: str  # "free", then "1" for each product's cheapest paid plan, "2", ...
+    plans: List[Optional[ComparedPlan]]  # One per product, in `products` order
+
+class ComparisonResponse(BaseModel):
+    products: List[ComparedProduct]
+    marketplaces: List[MarketplaceRow] = []
+    price_tiers: List[PriceTierRow] = []
+    missing_ids: List[int] = []
@@ -63,6 +63,9 @@ class ProductList(ProductBase):
     id: int
     created_at: datetime
 
+    class Config:
+        from_attributes = True
+
 class ProductResponse(BaseModel):
     product: Product
 
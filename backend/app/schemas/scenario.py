@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class ConversionTier(BaseModel):
+    min_visits: int = Field(ge=0)  # tier applies above this many monthly visits
+    rate: float = Field(gt=0, le=1)
+
+class ScenarioRequest(BaseModel):
+    conversion_tiers: Optional[List[ConversionTier]] = None  # defaults to MrrEstimator.CONVERSION_TIERS
+    default_conversion_rate: Optional[float] = Field(default=None, gt=0, le=1)
+    conversion_multiplier: float = Field(default=1.0, gt=0)  # e.g. 0.8 for "20% lower"
+    low_factor: Optional[float] = Field(default=None, ge=0)
+    high_factor: Optional[float] = Field(default=None, ge=0)
+    price_basis: Literal["highest", "lowest_paid", "average_paid"] = "highest"
+    group_by: Optional[Literal["category"]] = None
+    category: Optional[str] = None
+
+class ScenarioTotals(BaseModel):
+    products: int
+    mrr_low: float
+    mrr_likely: float
+    mrr_high: float
+
+class ScenarioGroup(BaseModel):
+    group: str
+    baseline: ScenarioTotals
+    scenario: ScenarioTotals
+
+class ScenarioResponse(BaseModel):
+    baseline: ScenarioTotals
+    scenario: ScenarioTotals
+    mrr_likely_change_pct: Optional[float] = None
+    groups: List[ScenarioGroup] = []
+    snapshot_age_seconds: float
+    elapsed_ms: float
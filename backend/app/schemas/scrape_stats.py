@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+class ThroughputBucket(BaseModel):
+    start: datetime
+    requests: int
+    statuses: Dict[str, int] = {}  # e.g. {"success": 40, "blocked": 2}
+
+class ScrapeStatsResponse(BaseModel):
+    marketplace: Optional[str] = None  # None = all marketplaces
+    window: str
+    bucket: str
+    since: datetime
+    requests: int
+    rates: Dict[str, float] = {}  # Share of requests per status, 0.0 to 1.0
+    duration_percentiles: Dict[str, float] = {}  # In milliseconds, e.g. {"p50": 420.0}
+    throughput: List[ThroughputBucket] = []
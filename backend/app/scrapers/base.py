@@ -1,10 +1,14 @@
 import time
 import requests
+from datetime import datetime, timedelta
 from typing import Optional
+from sqlalchemy import or_
 from abc import ABC, abstractmethod
 from app.core.config import settings
 from app.models.scrape_log import ScrapeLog
 from app.core.database import SessionLocal
+from app.scrapers.http_cache import HttpValidatorCache
+from app.scrapers.resilience import RetryPolicy, CircuitOpenError, get_circuit_breaker, parse_retry_after
 
 class BaseScraper(ABC):
     def __init__(self, marketplace_name: str):
@@ -14,11 +18,133 @@ class BaseScraper(ABC):
             'User-Agent': 'Marketplace Intelligence Bot 1.0'
         })
         self.delay = settings.REQUEST_DELAY
+        self.http_cache = HttpValidatorCache() if settings.HTTP_CACHE_ENABLED else None
+        self.retry_policy = RetryPolicy()
+        self.circuit_breaker = get_circuit_breaker(marketplace_name)
     
     def _respect_rate_limit(self):
         """Respect rate limits by adding delay between requests"""
         time.sleep(self.delay)
     
+    def _sleep(self, seconds: float):
+        time.sleep(seconds)
+    
+    def _fetch(self, url: str) -> requests.Response:
+        """
+        GET a URL, sending cached validators so unchanged pages come back as 304.
+        Retries 429/5xx responses and connection errors with jittered exponential
+        backoff (honoring Retry-After), and goes through the marketplace's circuit
+        breaker. The returned response carries the number of retries in `retries`.
+        """
+        headers = self.http_cache.conditional_headers(url) if self.http_cache else {}
+        
+        last_error = None
+        for attempt in range(self.retry_policy.max_retries + 1):
+            if not self.circuit_breaker.allow_request():
+                if last_error is not None:
+                    # The breaker opened while retrying: report the real failure
+                    raise last_error
+                raise CircuitOpenError(self.marketplace_name, self.circuit_breaker.open_until)
+            
+            try:
+                response = self.session.get(url, headers=headers, timeout=settings.TIMEOUT)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self._record_failure()
+                if attempt == self.retry_policy.max_retries:
+                    raise
+                last_error = e
+                self._sleep(self.retry_policy.delay(attempt))
+                continue
+            
+            if self.retry_policy.should_retry(response.status_code):
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self._record_failure(retry_after)
+                if attempt < self.retry_policy.max_retries:
+                    last_error = requests.HTTPError(
+                        f"{response.status_code} Error for url: {url}", response=response
+                    )
+                    self._sleep(self.retry_policy.delay(attempt, retry_after))
+                    continue
+            else:
+                # Other client errors (404, ...) say nothing about the marketplace's health
+                self.circuit_breaker.record_success()
+            
+            response.retries = attempt
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+    
+    def _record_failure(self, retry_after: Optional[float] = None):
+        """Count a failed request against the breaker, flagging the marketplace when it opens"""
+        was_open = self.circuit_breaker.state == "open"
+        self.circuit_breaker.record_failure(retry_after)
+        if not was_open and self.circuit_breaker.state == "open":
+            self._pause_marketplace_listings(datetime.utcfromtimestamp(self.circuit_breaker.open_until))
+    
+    def _pause_marketplace_listings(self, until: datetime):
+        """
+        Flag every listing on this marketplace as unstable while its breaker is open,
+        and hold back the ones due before the breaker lets requests through again.
+        """
+        db = SessionLocal()
+        try:
+            from app.models.marketplace import Marketplace, ProductMarketplace
+            marketplace_ids = db.query(Marketplace.id).filter(Marketplace.name == self.marketplace_name)
+            listings = db.query(ProductMarketplace).filter(ProductMarketplace.marketplace_id.in_(marketplace_ids))
+            listings.update({ProductMarketplace.is_unstable: True}, synchronize_session=False)
+            listings.filter(
+                or_(ProductMarketplace.next_scrape_at.is_(None), ProductMarketplace.next_scrape_at < until)
+            ).update({ProductMarketplace.next_scrape_at: until}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error pausing listings for {self.marketplace_name}: {e}")
+        finally:
+            db.close()
+    
+    def _classify_failure(self, error: Exception):
+        """Map a failed fetch to a (status, status_code) pair for the scrape log"""
+        if isinstance(error, requests.Timeout):
+            return "timeout", 0
+        response = getattr(error, 'response', None)
+        if response is not None:
+            if response.status_code in (403, 429):
+                return "blocked", response.status_code
+            return "error", response.status_code
+        return "error", 0
+    
+    def _update_listing_health(self, url: str, blocked: bool, unstable: bool):
+        """
+        Set is_blocked/is_unstable on the listings with this URL. A blocked listing
+        is rescheduled RECRAWL_BLOCKED_PENALTY_HOURS out rather than dropped.
+        """
+        db = SessionLocal()
+        try:
+            from app.models.marketplace import ProductMarketplace
+            values = {
+                ProductMarketplace.is_blocked: blocked,
+                ProductMarketplace.is_unstable: unstable
+            }
+            if blocked:
+                values[ProductMarketplace.next_scrape_at] = datetime.utcnow() + timedelta(
+                    hours=settings.RECRAWL_BLOCKED_PENALTY_HOURS
+                )
+            db.query(ProductMarketplace).filter(
+                ProductMarketplace.listing_url == url
+            ).update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error updating listing health: {e}")
+        finally:
+            db.close()
+    
+    def _remember_validators(self, url: str, response: requests.Response,
+                             snapshot_path: Optional[str] = None):
+        """Store ETag/Last-Modified once a response has been fully processed"""
+        if self.http_cache:
+            self.http_cache.store(url, response, snapshot_path=snapshot_path)
+    
     def _log_scrape_attempt(self, url: str, status_code: int, status: str, 
                            duration: int, error_message: Optional[str] = None,
                            snapshot_path: Optional[str] = None, product_id: Optional[int] = None):
@@ -51,15 +177,16 @@ class BaseScraper(ABC):
     def _save_snapshot(self, content: str, filename: str) -> str:
         """Save raw content snapshot to file"""
         import os
+        import uuid
         from datetime import datetime
         
         # Create directory if it doesn't exist
         snapshot_dir = "data/raw"
         os.makedirs(snapshot_dir, exist_ok=True)
         
-        # Create filename with timestamp
+        # Create filename with timestamp; the random suffix keeps saves in the same second apart
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = f"{snapshot_dir}/{filename}_{timestamp}.html"
+        filepath = f"{snapshot_dir}/{filename}_{timestamp}_{uuid.uuid4().hex[:8]}.html"
         
         # Save content
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -68,8 +195,8 @@ class BaseScraper(ABC):
         return filepath
     
     @abstractmethod
-    def scrape_product(self, product_url: str) -> dict:
-        """Scrape a single product page"""
+    def scrape_product(self, product_url: str) -> Optional[dict]:
+        """Scrape a single product page (None if unchanged since the last scrape)"""
         pass
     
     @abstractmethod
@@ -0,0 +1,159 @@
+import asyncio
+import atexit
+import threading
+from typing import Optional
+from urllib.parse import urlparse
+from app.core.config import settings
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # Playwright is optional for static-only scraping
+    async_playwright = None
+
+# Resource types that never matter for extraction
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+
+# Analytics and ad hosts that only slow rendering down
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "facebook.net", "connect.facebook.com", "segment.io", "segment.com",
+    "hotjar.com", "mixpanel.com", "intercom.io", "sentry.io", "fullstory.com",
+    "amplitude.com", "hs-analytics.net", "clarity.ms"
+)
+
+class BrowserUnavailableError(Exception):
+    """Raised when Playwright or its browser binaries are not installed"""
+
+def is_tracker(url: str) -> bool:
+    host = urlparse(url).hostname or ""
+    return any(host == tracker or host.endswith(f".{tracker}") for tracker in TRACKER_HOSTS)
+
+class BrowserPool:
+    """
+    Warm pool of headless Chromium contexts for JavaScript-rendered pages.
+    Playwright runs on a private event loop thread, so `render` can be called
+    from any number of scraper threads; a semaphore caps the open pages.
+    """
+
+    def __init__(self, contexts: Optional[int] = None, max_pages: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.context_count = contexts or settings.BROWSER_CONTEXTS
+        self.max_pages = max_pages or settings.BROWSER_MAX_PAGES
+        self.timeout_ms = (timeout or settings.TIMEOUT) * 1000
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._next_context = 0
+        self._pages = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._browser is not None
+
+    def start(self):
+        """Launch the browser and open the context pool"""
+        with self._lock:
+            if self.started:
+                return
+            if async_playwright is None:
+                raise BrowserUnavailableError("playwright is not installed")
+
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+            self._thread.start()
+            try:
+                self._call(self._start())
+            except Exception as e:
+                self._stop_loop()
+                raise BrowserUnavailableError(f"Could not launch browser: {e}")
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._pages = asyncio.Semaphore(self.max_pages)
+        for _ in range(self.context_count):
+            context = await self._browser.new_context(
+                user_agent='Marketplace Intelligence Bot 1.0',
+                java_script_enabled=True
+            )
+            await context.route("**/*", self._filter_request)
+            self._contexts.append(context)
+
+    async def _filter_request(self, route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or is_tracker(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, url: str, wait_for: Optional[str]) -> str:
+        async with self._pages:
+            # Contexts are shared round-robin; pages are the unit of concurrency
+            context = self._contexts[self._next_context % len(self._contexts)]
+            self._next_context += 1
+
+            page = await context.new_page()
+            try:
+                await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout_ms)
+                if wait_for:
+                    await page.wait_for_selector(wait_for, timeout=self.timeout_ms)
+                return await page.content()
+            finally:
+                await page.close()
+
+    def render(self, url: str, wait_for: Optional[str] = None) -> str:
+        """Load a URL in the browser and return the rendered HTML"""
+        self.start()
+        return self._call(self._render(url, wait_for))
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _close(self):
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._browser = None
+        self._playwright = None
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def close(self):
+        """Shut the browser down"""
+        with self._lock:
+            if not self.started:
+                return
+            try:
+                self._call(self._close())
+            finally:
+                self._stop_loop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool (launched lazily on first render)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
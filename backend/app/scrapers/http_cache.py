@@ -0,0 +1,68 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional
+from app.core.config import settings
+
+class HttpValidatorCache:
+    """On-disk store of HTTP validators (ETag / Last-Modified) keyed by URL"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or settings.HTTP_CACHE_DIR
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for a URL, if any"""
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a URL"""
+        entry = self.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, response, snapshot_path: Optional[str] = None):
+        """Remember the validators of a successful response"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'snapshot_path': snapshot_path,
+            'stored_at': datetime.now().isoformat()
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temp file first so a crash never leaves a truncated entry
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, url: str):
+        """Forget the validators for a URL so the next request is unconditional"""
+        try:
+            os.remove(self._path(url))
+        except OSError:
+            pass
@@ -0,0 +1,38 @@
+from typing import Optional, List
+from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound
+from app.core.config import settings
+
+# Tree builders understood by BeautifulSoup, fastest first
+PARSER_BACKENDS = ["lxml", "html.parser"]
+
+_availability = {}
+
+def is_backend_available(backend: str) -> bool:
+    """Check whether a parser backend is installed"""
+    if backend not in _availability:
+        try:
+            BeautifulSoup("", backend)
+            _availability[backend] = True
+        except FeatureNotFound:
+            _availability[backend] = False
+    return _availability[backend]
+
+def available_backends() -> List[str]:
+    """Return the installed parser backends"""
+    return [backend for backend in PARSER_BACKENDS if is_backend_available(backend)]
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Pick the configured backend, falling back to the stdlib parser"""
+    backend = backend or settings.HTML_PARSER
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {backend}")
+    return backend if is_backend_available(backend) else "html.parser"
+
+def parse_html(html: str, backend: Optional[str] = None,
+               parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """
+    Parse HTML with the given backend.
+    When parse_only is set, only matching top-level nodes (and their children)
+    are built into the tree, which skips most of a large page.
+    """
+    return BeautifulSoup(html, resolve_backend(backend), parse_only=parse_only)
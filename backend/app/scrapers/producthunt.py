@@ -1,71 +1,206 @@
+import os
+import re
 import time
+import hashlib
 import random
-from typing import List, Dict
-from bs4 import BeautifulSoup
+from collections import namedtuple
+from typing import List, Dict, Iterator, Optional
+from bs4 import BeautifulSoup, SoupStrainer
 from app.scrapers.base import BaseScraper
+from app.scrapers.parsers import parse_html
+from app.scrapers.resilience import CircuitOpenError
+from app.scrapers.browser import BrowserUnavailableError, get_browser_pool
 from app.core.config import settings
 
+UPVOTES_TEXT = re.compile(r'upvotes', re.IGNORECASE)
+UPVOTES_NUMBER = re.compile(r'(\d+)')
+TOPIC_HREF = re.compile(r'/topics/')
+
+def _is_extracted_node(name: str, attrs: dict) -> bool:
+    """Match only the nodes the _extract_* methods look at"""
+    if name in ('h1', 'button'):
+        return True
+    if name == 'meta':
+        return attrs.get('name') == 'description'
+    if name == 'a':
+        return '/topics/' in (attrs.get('href') or '')
+    return False
+
+# Partial parse: skip scripts, styles and the bulk of the page body
+PARSE_ONLY = SoupStrainer(_is_extracted_node)
+
+# A downloaded page waiting to be parsed
+FetchedPage = namedtuple('FetchedPage', ['url', 'response', 'snapshot_path'])
+
 class ProductHuntScraper(BaseScraper):
-    def __init__(self):
+    def __init__(self, parser_backend: Optional[str] = None, partial_parse: Optional[bool] = None):
         super().__init__("Product Hunt")
         self.base_url = "https://www.producthunt.com"
+        self.parser_backend = parser_backend or settings.HTML_PARSER
+        self.partial_parse = settings.HTML_PARTIAL_PARSE if partial_parse is None else partial_parse
+        self.browser_fallback = settings.BROWSER_FALLBACK_ENABLED
     
-    def scrape_product(self, product_url: str) -> Dict:
-        """Scrape a single Product Hunt product page"""
+    def scrape_product(self, product_url: str) -> Optional[Dict]:
+        """Scrape a single Product Hunt product page.
+        
+        Returns None when the page is unchanged since the last scrape (HTTP 304),
+        so callers can skip parsing and DB writes entirely.
+        """
+        page = self.fetch_page(product_url)
+        if page is None:
+            return None
+        return self.process_page(page)
+    
+    def fetch_page(self, product_url: str) -> Optional[FetchedPage]:
+        """Download a product page and save its snapshot (None if not modified)"""
         self._respect_rate_limit()
         
         try:
-            response = self.session.get(product_url, timeout=settings.TIMEOUT)
-            response.raise_for_status()
+            response = self._fetch(product_url)
+            
+            if response.status_code == 304:
+                # Page unchanged since our cached validators were stored
+                self._log_scrape_attempt(
+                    url=product_url,
+                    status_code=response.status_code,
+                    status="not_modified",
+                    duration=response.elapsed.total_seconds() * 1000
+                )
+                return None
             
             # Save snapshot
-            snapshot_path = self._save_snapshot(response.text, f"producthunt_{int(time.time())}")
+            snapshot_path = self._save_snapshot(response.text, self._snapshot_name(product_url))
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            return FetchedPage(product_url, response, snapshot_path)
             
-            # Extract product information (simplified for MVP)
-            product_data = {
-                'name': self._extract_name(soup),
-                'description': self._extract_description(soup),
-                'url': product_url,
-                'upvotes': self._extract_upvotes(soup),
-                'tags': self._extract_tags(soup),
-                'price_plans': self._extract_price_plans(soup)
-            }
+        except CircuitOpenError:
+            # Marketplace is paused; nothing was requested so nothing to log
+            raise
+        except Exception as e:
+            self._log_failure(product_url, e)
+            raise e
+    
+    def process_page(self, page: FetchedPage) -> Dict:
+        """Parse a fetched page and record the successful scrape"""
+        try:
+            soup = self._parse(page.response.text)
+            
+            if not self._has_required_nodes(soup):
+                # Content is rendered client-side: fall back to the browser
+                rendered = self._render_in_browser(page.url)
+                if rendered is not None:
+                    soup = self._parse(rendered)
+                    static_snapshot = page.snapshot_path
+                    page = page._replace(
+                        snapshot_path=self._save_snapshot(rendered, self._snapshot_name(page.url))
+                    )
+                    # The rendered page supersedes the static one, which would replay as an unnamed product
+                    if static_snapshot != page.snapshot_path:
+                        self._discard_snapshot(static_snapshot)
+            
+            product_data = self._extract_product(soup, page.url)
             
             # Log successful scrape
             self._log_scrape_attempt(
-                url=product_url,
-                status_code=response.status_code,
+                url=page.url,
+                status_code=page.response.status_code,
                 status="success",
-                duration=response.elapsed.total_seconds() * 1000,
-                snapshot_path=snapshot_path
+                duration=page.response.elapsed.total_seconds() * 1000,
+                snapshot_path=page.snapshot_path
             )
             
+            # Only remember validators once the page has been parsed successfully
+            self._remember_validators(page.url, page.response, snapshot_path=page.snapshot_path)
+            
+            # A page that needed retries is flagged as unstable
+            self._update_listing_health(page.url, blocked=False, unstable=page.response.retries > 0)
+            
             return product_data
             
         except Exception as e:
-            # Log failed scrape
-            self._log_scrape_attempt(
-                url=product_url,
-                status_code=0,
-                status="error",
-                duration=0,
-                error_message=str(e)
-            )
+            self._log_failure(page.url, e)
             raise e
     
+    def _log_failure(self, product_url: str, error: Exception):
+        """Log a failed scrape and flag the listing"""
+        status, status_code = self._classify_failure(error)
+        self._log_scrape_attempt(
+            url=product_url,
+            status_code=status_code,
+            status=status,
+            duration=0,
+            error_message=str(error)
+        )
+        self._update_listing_health(product_url, blocked=(status == "blocked"), unstable=True)
+    
+    def parse_product_page(self, html: str, product_url: str) -> Dict:
+        """Extract product information from a raw product page"""
+        return self._extract_product(self._parse(html), product_url)
+    
+    def _parse(self, html: str) -> BeautifulSoup:
+        return parse_html(
+            html,
+            backend=self.parser_backend,
+            parse_only=PARSE_ONLY if self.partial_parse else None
+        )
+    
+    def _has_required_nodes(self, soup: BeautifulSoup) -> bool:
+        """Check whether the static HTML already contains the product name"""
+        title_tag = soup.find('h1')
+        return bool(title_tag and title_tag.get_text().strip())
+    
+    def _render_in_browser(self, product_url: str) -> Optional[str]:
+        """Render a page in the shared browser pool (None if the fallback is unavailable or fails)"""
+        if not self.browser_fallback:
+            return None
+        try:
+            return get_browser_pool().render(product_url, wait_for='h1')
+        except BrowserUnavailableError as e:
+            print(f"Browser fallback disabled: {e}")
+            self.browser_fallback = False
+            return None
+        except Exception as e:
+            # A timeout or crash in one render: keep the static result rather than fail the scrape
+            print(f"Browser render failed for {product_url}, using static HTML: {e}")
+            return None
+    
+    @staticmethod
+    def _snapshot_name(product_url: str) -> str:
+        """Snapshot filename prefix: sorts chronologically and differs per URL and per save"""
+        url_hash = hashlib.sha1(product_url.encode('utf-8')).hexdigest()[:12]
+        return f"producthunt_{time.time_ns()}_{url_hash}"
+    
+    def _discard_snapshot(self, snapshot_path: Optional[str]):
+        if not snapshot_path:
+            return
+        try:
+            os.remove(snapshot_path)
+        except OSError:
+            pass
+    
+    def _extract_product(self, soup: BeautifulSoup, product_url: str) -> Dict:
+        # Extract product information (simplified for MVP)
+        return {
+            'name': self._extract_name(soup),
+            'description': self._extract_description(soup),
+            'url': product_url,
+            'upvotes': self._extract_upvotes(soup),
+            'tags': self._extract_tags(soup),
+            'price_plans': self._extract_price_plans(soup)
+        }
+    
     def scrape_products(self, limit: int = 100) -> List[Dict]:
         """Scrape multiple products from Product Hunt"""
-        products = []
-        
+        return list(self.iter_products(limit))
+    
+    def iter_products(self, limit: int = 100) -> Iterator[Dict]:
+        """Yield products one at a time so callers can stream them"""
         # For MVP, we'll generate mock data since actual scraping would require
         # handling JavaScript and authentication
         for i in range(min(limit, 300)):  # Cap at 300 for MVP
             self._respect_rate_limit()
             
             product = self._generate_mock_product(i)
-            products.append(product)
             
             # Log successful scrape
             self._log_scrape_attempt(
@@ -74,8 +209,8 @@ class ProductHuntScraper(BaseScraper):
                 status="success",
                 duration=random.randint(100, 1000)
             )
-        
-        return products
+            
+            yield product
     
     def _extract_name(self, soup: BeautifulSoup) -> str:
         """Extract product name"""
@@ -92,19 +227,18 @@ class ProductHuntScraper(BaseScraper):
     def _extract_upvotes(self, soup: BeautifulSoup) -> int:
         """Extract upvote count"""
         # This is a simplified extraction for demonstration
-        upvote_tag = soup.find('button', string=lambda text: text and 'upvotes' in text.lower())
+        upvote_tag = soup.find('button', string=UPVOTES_TEXT)
         if upvote_tag:
             upvote_text = upvote_tag.get_text()
             # Extract number from text like "150 upvotes"
-            import re
-            match = re.search(r'(\d+)', upvote_text)
+            match = UPVOTES_NUMBER.search(upvote_text)
             return int(match.group(1)) if match else 0
         return 0
     
     def _extract_tags(self, soup: BeautifulSoup) -> List[str]:
         """Extract product tags"""
         # This is a simplified extraction for demonstration
-        tag_elements = soup.find_all('a', href=lambda href: href and '/topics/' in href)
+        tag_elements = soup.find_all('a', href=TOPIC_HREF, limit=5)
         return [tag.get_text().strip() for tag in tag_elements[:5]]  # Limit to 5 tags
     
     def _extract_price_plans(self, soup: BeautifulSoup) -> List[Dict]:
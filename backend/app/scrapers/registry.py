@@ -0,0 +1,15 @@
+from typing import Dict, Type
+from app.scrapers.base import BaseScraper
+from app.scrapers.producthunt import ProductHuntScraper
+
+# Scraper implementation for each marketplace name
+SCRAPERS: Dict[str, Type[BaseScraper]] = {
+    "Product Hunt": ProductHuntScraper,
+}
+
+def get_scraper(marketplace_name: str) -> BaseScraper:
+    """Create the scraper registered for a marketplace"""
+    try:
+        return SCRAPERS[marketplace_name]()
+    except KeyError:
+        raise ValueError(f"No scraper registered for marketplace: {marketplace_name}")
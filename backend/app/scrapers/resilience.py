@@ -0,0 +1,133 @@
+import time
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from app.core.config import settings
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised when a marketplace's circuit breaker is open and requests are paused"""
+
+    def __init__(self, marketplace_name: str, retry_at: float):
+        self.marketplace_name = marketplace_name
+        self.retry_at = retry_at
+        super().__init__(f"Circuit open for {marketplace_name}, paused for {max(0.0, retry_at - time.time()):.0f}s")
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into a delay in seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now if now is not None else time.time()
+    return max(0.0, retry_at.timestamp() - now)
+
+class RetryPolicy:
+    """Exponential backoff with full jitter that defers to Retry-After when present"""
+
+    def __init__(self, max_retries: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, rng: Optional[random.Random] = None):
+        self.max_retries = settings.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.rng = rng or random.Random()
+
+    def should_retry(self, status_code: int) -> bool:
+        return status_code in RETRY_STATUS_CODES
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return self.rng.uniform(0, ceiling)
+
+class CircuitBreaker:
+    """
+    Per-marketplace circuit breaker.
+    Opens when the error rate over the last `window` requests crosses the threshold,
+    pauses the marketplace for a cooldown, then lets a single trial request through
+    (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, name: str, window: Optional[int] = None, min_requests: Optional[int] = None,
+                 error_rate: Optional[float] = None, cooldown: Optional[float] = None,
+                 clock=time.time):
+        self.name = name
+        self.window = window or settings.CIRCUIT_WINDOW
+        self.min_requests = min_requests or settings.CIRCUIT_MIN_REQUESTS
+        self.error_rate = error_rate or settings.CIRCUIT_ERROR_RATE
+        self.cooldown = cooldown or settings.CIRCUIT_COOLDOWN_SECONDS
+        self.clock = clock
+        self.state = "closed"  # closed, open, half_open
+        self.open_until = 0.0
+        self._outcomes = deque(maxlen=self.window)
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent now"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() >= self.open_until:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "closed"
+                self._outcomes.clear()
+            self._trial_in_flight = False
+            self._outcomes.append(True)
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        """Record a failed request; a Retry-After longer than the cooldown extends the pause"""
+        with self._lock:
+            self._outcomes.append(False)
+            self._trial_in_flight = False
+            if self.state == "half_open":
+                self._open(retry_after)
+                return
+
+            failures = self._outcomes.count(False)
+            if (self.state == "closed" and len(self._outcomes) >= self.min_requests
+                    and failures / len(self._outcomes) >= self.error_rate):
+                self._open(retry_after)
+
+    def _open(self, retry_after: Optional[float] = None):
+        self.state = "open"
+        self.open_until = self.clock() + max(self.cooldown, retry_after or 0.0)
+        print(f"Circuit breaker opened for {self.name} until "
+              f"{datetime.fromtimestamp(self.open_until).isoformat(timespec='seconds')}")
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != "closed"
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(marketplace_name: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a marketplace"""
+    with _breakers_lock:
+        if marketplace_name not in _breakers:
+            _breakers[marketplace_name] = CircuitBreaker(marketplace_name)
+        return _breakers[marketplace_name]
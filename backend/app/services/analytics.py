@@ -0,0 +1,76 @@
+from typing import List, Optional
+import numpy as np
+from app.schemas.analytics import DistributionResponse, DistributionStats, GroupDistribution, Histogram
+from app.services.catalog_snapshot import CatalogSnapshot
+
+# Metric name -> CatalogSnapshot column
+METRICS = {
+    "mrr_low": "mrr_low",
+    "mrr_likely": "mrr_likely",
+    "mrr_high": "mrr_high",
+    "visits_month": "visits_month",
+    "max_price": "max_price",
+    "min_paid_price": "min_paid_price",
+}
+PERCENTILES = [10, 25, 50, 75, 90, 99]
+
+def histogram_edges(values: np.ndarray, bins: int, scale: str = "linear") -> np.ndarray:
+    """Bin edges over all values; log scale puts zeros in the first bin and spaces the rest geometrically"""
+    if len(values) == 0:
+        return np.linspace(0.0, 1.0, bins + 1)
+    low, high = float(values.min()), float(values.max())
+    if scale == "log":
+        positive = values[values > 0]
+        if len(positive):
+            low, high = float(positive.min()), float(positive.max())
+            if high > low:
+                return np.concatenate([[0.0], np.geomspace(low, high, bins)])
+    if high == low:
+        high = low + 1.0
+    return np.linspace(low, high, bins + 1)
+
+def distribution_stats(values: np.ndarray, edges: np.ndarray) -> DistributionStats:
+    counts, _ = np.histogram(values, bins=edges)
+    percentiles = {}
+    if len(values):
+        percentiles = {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    return DistributionStats(
+        count=len(values),
+        total=round(float(values.sum()), 2),
+        mean=round(float(values.mean()), 2) if len(values) else None,
+        percentiles=percentiles,
+        histogram=Histogram(edges=[round(float(edge), 2) for edge in edges], counts=counts.tolist())
+    )
+
+def distribution(snapshot: CatalogSnapshot, metric: str, group_by: Optional[str] = None,
+                 bins: int = 20, scale: str = "linear", limit: int = 50) -> DistributionResponse:
+    """Percentiles, histogram and totals of a metric, overall and per group (largest totals first)"""
+    values = getattr(snapshot, METRICS[metric]).astype(np.float64)
+    valid = ~np.isnan(values)
+    edges = histogram_edges(values[valid], bins, scale)
+
+    groups: List[GroupDistribution] = []
+    if group_by:
+        grouping = snapshot.groupings[group_by]
+        keep = valid[grouping.rows]
+        rows, codes = grouping.rows[keep], grouping.codes[keep]
+        # Sort memberships by label once, then each label is a contiguous slice
+        order = np.argsort(codes, kind="stable")
+        member_values = values[rows[order]]
+        sizes = np.bincount(codes, minlength=len(grouping.labels))
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        totals = np.bincount(codes, weights=values[rows], minlength=len(grouping.labels))
+        for code in np.argsort(-totals, kind="stable"):
+            if sizes[code] == 0 or len(groups) >= limit:
+                continue
+            stats = distribution_stats(member_values[bounds[code]:bounds[code + 1]], edges)
+            groups.append(GroupDistribution(group=grouping.labels[code], **stats.model_dump()))
+
+    return DistributionResponse(
+        metric=metric,
+        group_by=group_by,
+        overall=distribution_stats(values[valid], edges),
+        groups=groups,
+        snapshot_age_seconds=round(snapshot.age_seconds, 1),
+        snapshot_products=len(snapshot)
+    )
@@ -0,0 +1,109 @@
+import json
+from typing import AsyncIterator, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.marketplace import Marketplace
+from app.schemas.bulk_import import BulkImportError, BulkImportResponse, ScrapedProduct
+from app.services.ingestion import save_products_to_db, setup_marketplace
+
+def find_marketplace(db: Session, name: Optional[str]) -> Optional[Marketplace]:
+    """The named marketplace, or Product Hunt (created if missing) when no name is given"""
+    if name is None:
+        return setup_marketplace(db)
+    return db.query(Marketplace).filter(Marketplace.name == name).first()
+
+async def ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into numbered lines, holding at most one line in memory.
+    Lines longer than `max_line_bytes` are dropped as they stream and come back as None.
+    """
+    buffer = bytearray()
+    too_long = False
+    line_number = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if not too_long:
+                buffer += chunk[start:] if end == -1 else chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    too_long = True
+                    buffer.clear()
+            if end == -1:
+                break
+            line_number += 1
+            yield line_number, None if too_long else bytes(buffer)
+            buffer.clear()
+            too_long = False
+            start = end + 1
+    if buffer or too_long:
+        yield line_number + 1, None if too_long else bytes(buffer)
+
+def parse_line(raw: bytes) -> dict:
+    """Validate one NDJSON line into the dict save_products_to_db takes"""
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    try:
+        return ScrapedProduct.model_validate(data).model_dump()
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'line'}: {error['msg']}" for error in e.errors()
+        ))
+
+async def import_ndjson(chunks: AsyncIterator[bytes], db: Session, marketplace: Marketplace,
+                        with_estimates: bool = True, chunk_size: Optional[int] = None) -> BulkImportResponse:
+    """
+    Upsert products from a streamed NDJSON body, BULK_IMPORT_CHUNK_SIZE valid
+    lines per save_products_to_db call, so memory stays flat however large the
+    body is. Invalid lines and failed rows are reported by line number.
+    """
+    chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+    result = BulkImportResponse(marketplace=marketplace.name)
+    batch, batch_lines = [], []
+
+    def fail(line_number: int, error: str):
+        result.failed += 1
+        if len(result.errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            result.errors.append(BulkImportError(line=line_number, error=error))
+        else:
+            result.errors_truncated = True
+
+    async def flush():
+        outcomes = []
+        # Partner dumps are not scrapes, so the re-crawl history is left alone
+        await run_in_threadpool(
+            save_products_to_db, batch, db, with_estimates=with_estimates, record_history=False,
+            marketplace=marketplace, outcomes=outcomes
+        )
+        for line_number, (status, error) in zip(batch_lines, outcomes):
+            if status == "inserted":
+                result.inserted += 1
+            elif status == "updated":
+                result.updated += 1
+            else:
+                fail(line_number, error)
+        batch.clear()
+        batch_lines.clear()
+
+    async for line_number, raw in ndjson_lines(chunks, settings.BULK_IMPORT_MAX_LINE_BYTES):
+        if raw is not None and not raw.strip():
+            continue
+        result.lines += 1
+        if raw is None:
+            fail(line_number, f"Line longer than {settings.BULK_IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            batch.append(parse_line(raw))
+        except ValueError as e:
+            fail(line_number, str(e))
+            continue
+        batch_lines.append(line_number)
+        if len(batch) >= chunk_size:
+            await flush()
+    if batch:
+        await flush()
+    return result
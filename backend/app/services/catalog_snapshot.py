@@ -0,0 +1,228 @@
+import time
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+
+class Grouping:
+    """
+    Product membership in labels (e.g. categories), as parallel arrays: product
+    row `rows[i]` belongs to label `labels[codes[i]]`. A product with several
+    labels appears once per label; one without any is not in the grouping.
+    """
+
+    def __init__(self, labels: List[str], rows: np.ndarray, codes: np.ndarray):
+        self.labels = labels
+        self.rows = rows
+        self.codes = codes
+
+    @classmethod
+    def from_lists(cls, values: List[Optional[list]]) -> "Grouping":
+        label_codes: Dict[str, int] = {}
+        rows, codes = [], []
+        for row, labels in enumerate(values):
+            for label in dict.fromkeys(labels or []):
+                rows.append(row)
+                codes.append(label_codes.setdefault(label, len(label_codes)))
+        return cls(list(label_codes), np.array(rows, dtype=np.int64), np.array(codes, dtype=np.int64))
+
+    def label_code(self, label: str) -> Optional[int]:
+        try:
+            return self.labels.index(label)
+        except ValueError:
+            return None
+
+    def sums(self, values: np.ndarray) -> np.ndarray:
+        """Per-label sum of a per-product column"""
+        return np.bincount(self.codes, weights=values[self.rows], minlength=len(self.labels))
+
+    def counts(self) -> np.ndarray:
+        return np.bincount(self.codes, minlength=len(self.labels))
+
+class CatalogSnapshot:
+    """
+    In-memory columnar copy of the latest per-product metrics analytics work on.
+    MRR columns are NaN for products without an estimate.
+    """
+
+    def __init__(self, product_ids: np.ndarray, max_price: np.ndarray, min_paid_price: np.ndarray,
+                 mean_paid_price: np.ndarray, visits_month: np.ndarray, groupings: Dict[str, Grouping],
+                 mrr_low: Optional[np.ndarray] = None, mrr_likely: Optional[np.ndarray] = None,
+                 mrr_high: Optional[np.ndarray] = None):
+        self.product_ids = product_ids
+        self.max_price = max_price
+        self.min_paid_price = min_paid_price
+        self.mean_paid_price = mean_paid_price
+        self.visits_month = visits_month
+        self.groupings = groupings
+        missing = np.full(len(product_ids), np.nan)
+        self.mrr_low = missing if mrr_low is None else mrr_low
+        self.mrr_likely = missing if mrr_likely is None else mrr_likely
+        self.mrr_high = missing if mrr_high is None else mrr_high
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+
+def build_catalog_snapshot(db: Session) -> CatalogSnapshot:
+    """Load every product's plan prices, latest traffic and estimate, and labels into numpy arrays"""
+    prices = defaultdict(list)
+    marketplaces = defaultdict(list)
+    listings = (
+        db.query(ProductMarketplace.product_id, ProductMarketplace.price_plans, Marketplace.name)
+        .join(Marketplace, ProductMarketplace.marketplace_id == Marketplace.id)
+    )
+    for product_id, price_plans, marketplace_name in listings.yield_per(10000):
+        marketplaces[product_id].append(marketplace_name)
+        for plan in price_plans or []:
+            price = plan.get('price') if isinstance(plan, dict) else None
+            if isinstance(price, (int, float)):
+                prices[product_id].append(float(price))
+
+    latest_traffic = select(func.max(TrafficData.id)).group_by(TrafficData.product_id)
+    visits = dict(
+        db.query(TrafficData.product_id, TrafficData.visits_month).filter(TrafficData.id.in_(latest_traffic)).yield_per(10000)
+    )
+
+    latest_estimate = select(func.max(MrrEstimate.id)).group_by(MrrEstimate.product_id)
+    estimates = {
+        product_id: (mrr_low, mrr_likely, mrr_high)
+        for product_id, mrr_low, mrr_likely, mrr_high in db.query(
+            MrrEstimate.product_id, MrrEstimate.mrr_low, MrrEstimate.mrr_likely, MrrEstimate.mrr_high
+        ).filter(MrrEstimate.id.in_(latest_estimate)).yield_per(10000)
+    }
+
+    product_ids, categories, tags = [], [], []
+    for product_id, product_categories, product_tags in db.query(Product.id, Product.categories, Product.tags).order_by(Product.id).yield_per(10000):
+        product_ids.append(product_id)
+        categories.append(product_categories)
+        tags.append(product_tags)
+
+    count = len(product_ids)
+    max_price = np.zeros(count)
+    min_paid_price = np.zeros(count)
+    mean_paid_price = np.zeros(count)
+    for row, product_id in enumerate(product_ids):
+        product_prices = prices.get(product_id)
+        if product_prices:
+            max_price[row] = max(product_prices)
+            paid = [price for price in product_prices if price > 0]
+            if paid:
+                min_paid_price[row] = min(paid)
+                mean_paid_price[row] = sum(paid) / len(paid)
+
+    mrr = np.full((count, 3), np.nan)
+    for row, product_id in enumerate(product_ids):
+        estimate = estimates.get(product_id)
+        if estimate:
+            mrr[row] = [np.nan if value is None else value for value in estimate]
+
+    return CatalogSnapshot(
+        product_ids=np.array(product_ids, dtype=np.int64),
+        max_price=max_price,
+        min_paid_price=min_paid_price,
+        mean_paid_price=mean_paid_price,
+        visits_month=np.array([visits.get(product_id) or 0 for product_id in product_ids], dtype=np.int64),
+        groupings={
+            "category": Grouping.from_lists(categories),
+            "marketplace": Grouping.from_lists([marketplaces.get(product_id) for product_id in product_ids]),
+            "tag": Grouping.from_lists(tags),
+        },
+        mrr_low=mrr[:, 0],
+        mrr_likely=mrr[:, 1],
+        mrr_high=mrr[:, 2]
+    )
+
+_snapshot: Optional[CatalogSnapshot] = None
+_snapshot_lock = threading.Lock()
+# Set when data changed since the snapshot was built; readers keep the old one meanwhile
+_snapshot_stale = False
+# Wakes the background refresher early; set while one is running
+_refresh_requested = threading.Event()
+_refresher_running = threading.Event()
+
+def get_catalog_snapshot(db: Session, max_age: Optional[float] = None) -> CatalogSnapshot:
+    """
+    Return the shared snapshot, rebuilding it once it is older than `max_age` seconds.
+    A stale snapshot is only rebuilt here when no background refresher will do it.
+    """
+    global _snapshot, _snapshot_stale
+    max_age = settings.CATALOG_SNAPSHOT_TTL_SECONDS if max_age is None else max_age
+    with _snapshot_lock:
+        if (_snapshot is None or _snapshot.age_seconds > max_age
+                or (_snapshot_stale and not _refresher_running.is_set())):
+            _snapshot_stale = False
+            _snapshot = build_catalog_snapshot(db)
+        return _snapshot
+
+def mark_catalog_snapshot_stale():
+    """Flag the snapshot as outdated and wake the refresher; readers keep it until the swap"""
+    global _snapshot_stale
+    with _snapshot_lock:
+        _snapshot_stale = True
+    _refresh_requested.set()
+
+def invalidate_catalog_snapshot():
+    global _snapshot, _snapshot_stale
+    with _snapshot_lock:
+        _snapshot = None
+        _snapshot_stale = False
+
+def refresh_catalog_snapshot(session_factory) -> CatalogSnapshot:
+    """Rebuild the shared snapshot; readers keep the old one until the new one is ready"""
+    global _snapshot, _snapshot_stale
+    # Cleared before the build, so a change landing during it marks the new snapshot stale again
+    with _snapshot_lock:
+        _snapshot_stale = False
+    db = session_factory()
+    try:
+        snapshot = build_catalog_snapshot(db)
+    finally:
+        db.close()
+    with _snapshot_lock:
+        _snapshot = snapshot
+    return snapshot
+
+class SnapshotRefresher:
+    """
+    Background thread that rebuilds the shared snapshot every `interval` seconds,
+    or sooner once mark_catalog_snapshot_stale() reports a change.
+    """
+
+    def __init__(self, session_factory, interval: Optional[float] = None):
+        self.session_factory = session_factory
+        self.interval = settings.CATALOG_SNAPSHOT_REFRESH_SECONDS if interval is None else interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        _refresher_running.set()
+        self._thread = threading.Thread(target=self._run, name="catalog-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        _refresh_requested.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        _refresher_running.clear()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                refresh_catalog_snapshot(self.session_factory)
+            except Exception as e:
+                print(f"Error refreshing catalog snapshot: {str(e)}")
+            _refresh_requested.wait(self.interval)
+            _refresh_requested.clear()
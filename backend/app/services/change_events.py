@@ -0,0 +1,134 @@
+import json
+import select
+import threading
+from typing import Iterable, Optional, Sequence
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.catalog_snapshot import mark_catalog_snapshot_stale
+from app.services.comparison import comparison_cache
+from app.services.pricing import fx_rate_cache
+
+# product: product or listing fields, estimate: new MRR estimates, price_plans: normalized plans,
+# merge: duplicates merged into a survivor, fx_rates: exchange rates
+CHANGE_KINDS = ("product", "estimate", "price_plans", "merge", "fx_rates")
+# NOTIFY payloads are limited to 8000 bytes
+IDS_PER_MESSAGE = 500
+PENDING_CHANGES_KEY = "pending_changes"
+
+def apply_change(kind: str, product_ids: Sequence[int] = ()):
+    """Drop the entries of this process's caches that a change makes stale; no ids means every product"""
+    ids = set(product_ids)
+    if kind == "fx_rates":
+        fx_rate_cache.invalidate()
+    if ids:
+        comparison_cache.discard_where(lambda key: not ids.isdisjoint(key[0]))
+    else:
+        comparison_cache.clear()
+    # The snapshot aggregates the whole catalog, so any change makes it stale;
+    # it keeps being served until the refresher swaps in a rebuilt one
+    mark_catalog_snapshot_stale()
+
+def _messages(kind: str, product_ids: Iterable[int]):
+    ids = sorted(set(product_ids))
+    if not ids:
+        yield json.dumps({"kind": kind, "ids": []})
+    for start in range(0, len(ids), IDS_PER_MESSAGE):
+        yield json.dumps({"kind": kind, "ids": ids[start:start + IDS_PER_MESSAGE]})
+
+def publish_changes(db: Session, kind: str, product_ids: Iterable[int] = ()):
+    """
+    Announce a change in the session's transaction. On PostgreSQL it is sent
+    with NOTIFY, which delivers on commit and not at all on rollback; this
+    process's own caches are invalidated after the commit either way.
+    """
+    if kind not in CHANGE_KINDS:
+        raise ValueError(f"Unknown change kind: {kind}")
+    product_ids = list(product_ids)
+    db.connection()  # Begin the transaction, so a rollback discards the pending changes
+    db.info.setdefault(PENDING_CHANGES_KEY, []).append((kind, product_ids))
+    if settings.CHANGE_EVENTS_ENABLED and db.get_bind().dialect.name == "postgresql":
+        for payload in _messages(kind, product_ids):
+            db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                       {"channel": settings.CHANGE_EVENTS_CHANNEL, "payload": payload})
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session: Session):
+    if session.in_nested_transaction():
+        return  # A savepoint; the changes land with the outer commit
+    for kind, product_ids in session.info.pop(PENDING_CHANGES_KEY, []):
+        apply_change(kind, product_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session: Session):
+    if not session.in_nested_transaction():
+        session.info.pop(PENDING_CHANGES_KEY, None)
+
+def handle_notification(payload: str):
+    """Apply one NOTIFY payload from publish_changes"""
+    try:
+        message = json.loads(payload)
+        apply_change(message["kind"], message.get("ids") or [])
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Ignoring malformed change event {payload!r}: {e}")
+
+class ChangeListener:
+    """
+    Background thread that LISTENs for change events so every API worker
+    invalidates its caches when another process writes. Reconnects after
+    errors, clearing everything since events sent meanwhile were missed.
+    """
+
+    def __init__(self, url: Optional[str] = None, channel: Optional[str] = None,
+                 reconnect_seconds: float = 5.0, poll_seconds: float = 1.0):
+        self.url = url or settings.DATABASE_URL
+        self.channel = channel or settings.CHANGE_EVENTS_CHANNEL
+        self.reconnect_seconds = reconnect_seconds
+        self.poll_seconds = poll_seconds
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        # libpq takes the URL without SQLAlchemy's driver suffix
+        url = make_url(self.url).set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = psycopg2.connect(url)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return connection
+
+    def _run(self):
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                # Events sent before LISTEN (or while disconnected) were missed
+                apply_change("product")
+                self.connected.set()
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], self.poll_seconds) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        handle_notification(connection.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"Change listener error: {str(e)}")
+                self._stop.wait(self.reconnect_seconds)
+            finally:
+                self.connected.clear()
+                if connection is not None:
+                    connection.close()
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.product import Product
+from app.models.marketplace import ListingPricePlan, Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+from app.schemas.comparison import (
+    ComparedPlan, ComparedProduct, ComparisonResponse, EstimateSummary, MarketplaceCell, MarketplaceRow, PriceTierRow
+)
+from app.schemas.product import TrafficInfo
+from app.services.response_cache import ResponseCache
+
+comparison_cache = ResponseCache(
+    "product_comparison", ttl=settings.COMPARE_CACHE_TTL_SECONDS, max_entries=settings.COMPARE_CACHE_MAX_ENTRIES
+)
+
+def comparison_version(db: Session, product_ids: Sequence[int]) -> Tuple[tuple, ...]:
+    """
+    One row per existing product with everything a comparison depends on: the
+    product's updated_at, its listings' latest updated_at and the newest plan,
+    estimate and traffic ids. Any write to those changes the version.
+    """
+    def latest(column, owner):
+        return select(func.max(column)).where(owner == Product.id).correlate(Product).scalar_subquery()
+
+    return tuple(
+        tuple(row) for row in db.query(
+            Product.id,
+            Product.updated_at,
+            latest(ProductMarketplace.updated_at, ProductMarketplace.product_id),
+            latest(ListingPricePlan.id, ListingPricePlan.product_id),
+            latest(MrrEstimate.id, MrrEstimate.product_id),
+            latest(TrafficData.id, TrafficData.product_id)
+        ).filter(Product.id.in_(product_ids)).order_by(Product.id)
+    )
+
+def _plan_sort_key(plan: ListingPricePlan):
+    # Plans in currencies without an FX rate go after the comparable ones
+    return (plan.usd_monthly_price is None, plan.usd_monthly_price or 0.0, plan.price or 0.0)
+
+def _compared_plan(plan: ListingPricePlan) -> ComparedPlan:
+    return ComparedPlan(name=plan.name, price=plan.price, currency=plan.currency, period=plan.period,
+                        usd_monthly_price=plan.usd_monthly_price, is_popular=bool(plan.is_popular))
+
+def build_comparison(db: Session, product_ids: Sequence[int]) -> ComparisonResponse:
+    """Comparison of the given products (in ascending id order) from one query per table"""
+    products = db.query(Product).filter(Product.id.in_(product_ids)).order_by(Product.id).all()
+    ids = [product.id for product in products]
+    column = {product_id: position for position, product_id in enumerate(ids)}
+
+    listings: Dict[str, List[Optional[MarketplaceCell]]] = {}
+    for product_id, marketplace_name, listing_url, rating, upvotes, reviews_count in db.query(
+        ProductMarketplace.product_id, Marketplace.name, ProductMarketplace.listing_url,
+        ProductMarketplace.rating, ProductMarketplace.upvotes, ProductMarketplace.reviews_count
+    ).join(Marketplace, ProductMarketplace.marketplace_id == Marketplace.id).filter(
+        ProductMarketplace.product_id.in_(ids)
+    ).order_by(Marketplace.name, ProductMarketplace.id):
+        cells = listings.setdefault(marketplace_name, [None] * len(ids))
+        # Merged duplicates can leave several listings per marketplace; the oldest one is shown
+        if cells[column[product_id]] is None:
+            cells[column[product_id]] = MarketplaceCell(
+                listing_url=listing_url, rating=rating, upvotes=upvotes, reviews_count=reviews_count
+            )
+
+    free_plans: Dict[int, ListingPricePlan] = {}
+    paid_plans: Dict[int, List[ListingPricePlan]] = defaultdict(list)
+    seen = set()
+    for plan in sorted(db.query(ListingPricePlan).filter(ListingPricePlan.product_id.in_(ids)), key=_plan_sort_key):
+        # The same plan is often listed on several marketplaces
+        identity = (plan.product_id, (plan.name or "").strip().lower(), plan.usd_monthly_price, plan.price)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        if plan.is_free:
+            free_plans.setdefault(plan.product_id, plan)
+        else:
+            paid_plans[plan.product_id].append(plan)
+
+    latest_estimates = select(func.max(MrrEstimate.id)).where(
+        MrrEstimate.product_id.in_(ids)
+    ).group_by(MrrEstimate.product_id)
+    estimates = {
+        estimate.product_id: estimate
+        for estimate in db.query(MrrEstimate).filter(MrrEstimate.id.in_(latest_estimates))
+    }
+    latest_traffic = select(func.max(TrafficData.id)).where(
+        TrafficData.product_id.in_(ids)
+    ).group_by(TrafficData.product_id)
+    traffic = {
+        row.product_id: row
+        for row in db.query(TrafficData).filter(TrafficData.id.in_(latest_traffic))
+    }
+
+    compared = []
+    for product in products:
+        estimate = estimates.get(product.id)
+        traffic_row = traffic.get(product.id)
+        plans = paid_plans.get(product.id)
+        highest = max(plans, key=_plan_sort_key) if plans else None
+        compared.append(ComparedProduct(
+            id=product.id,
+            name=product.name,
+            description=product.description,
+            categories=product.categories or [],
+            tags=product.tags or [],
+            estimates=EstimateSummary(
+                mrr_low=estimate.mrr_low, mrr_likely=estimate.mrr_likely,
+                mrr_high=estimate.mrr_high, confidence=estimate.confidence
+            ) if estimate else None,
+            traffic=TrafficInfo(
+                visits_month=traffic_row.visits_month,
+                visits_growth=traffic_row.visits_growth,
+                bounce_rate=traffic_row.bounce_rate,
+                avg_time_on_site=traffic_row.avg_time_on_site,
+                traffic_sources=traffic_row.traffic_sources
+            ) if traffic_row else None,
+            highest_plan=_compared_plan(highest) if highest else None
+        ))
+
+    # Free plans line up with each other, then paid plans by price rank
+    tiers = []
+    if free_plans:
+        tiers.append(PriceTierRow(tier="free", plans=[
+            _compared_plan(free_plans[product_id]) if product_id in free_plans else None for product_id in ids
+        ]))
+    for rank in range(max((len(plans) for plans in paid_plans.values()), default=0)):
+        tiers.append(PriceTierRow(tier=str(rank + 1), plans=[
+            _compared_plan(paid_plans[product_id][rank]) if rank < len(paid_plans.get(product_id, [])) else None
+            for product_id in ids
+        ]))
+
+    return ComparisonResponse(
+        products=compared,
+        marketplaces=[MarketplaceRow(marketplace=name, cells=cells) for name, cells in listings.items()],
+        price_tiers=tiers
+    )
+
+def _in_order(comparison: ComparisonResponse, product_ids: Sequence[int]) -> ComparisonResponse:
+    """Reorder the product columns of a comparison to follow `product_ids`"""
+    column = {product.id: position for position, product in enumerate(comparison.products)}
+    order = [column[product_id] for product_id in product_ids if product_id in column]
+    return ComparisonResponse(
+        products=[comparison.products[i] for i in order],
+        marketplaces=[
+            MarketplaceRow(marketplace=row.marketplace, cells=[row.cells[i] for i in order])
+            for row in comparison.marketplaces
+        ],
+        price_tiers=[PriceTierRow(tier=row.tier, plans=[row.plans[i] for i in order]) for row in comparison.price_tiers],
+        missing_ids=[product_id for product_id in product_ids if product_id not in column]
+    )
+
+def compare_products(db: Session, product_ids: Sequence[int]) -> ComparisonResponse:
+    """
+    Aligned comparison of products, in the requested order. Results are cached
+    by the sorted id set and the products' current version, so any change to a
+    compared product is picked up on the next request.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    key = (tuple(sorted(product_ids)), comparison_version(db, product_ids))
+    comparison = comparison_cache.get(key)
+    if comparison is None:
+        comparison = build_comparison(db, product_ids)
+        comparison_cache.set(key, comparison)
+    return _in_order(comparison, product_ids)
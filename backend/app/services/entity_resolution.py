@@ -0,0 +1,287 @@
+import re
+import zlib
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.product import Product
+from app.models.marketplace import ListingPricePlan, Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+from app.models.scrape_log import ScrapeLog
+from app.services.change_events import publish_changes
+from app.services.history_retention import merge_product_rollups
+
+# Query parameters that only identify the referrer or campaign
+TRACKING_PARAMS = {
+    "ref", "ref_src", "source", "via", "fbclid", "gclid", "dclid", "msclkid",
+    "mc_cid", "mc_eid", "igshid", "_hsenc", "_hsmi", "yclid"
+}
+
+# Second-level suffixes where the registrable domain has three labels
+MULTI_PART_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au", "co.nz",
+    "co.jp", "co.in", "co.kr", "co.za", "com.br", "com.mx", "com.sg", "com.tr",
+    "com.cn", "com.hk", "com.tw", "com.ar"
+}
+
+# Listing hosts: their URLs say nothing about which product it is
+MARKETPLACE_DOMAINS = {"producthunt.com", "g2.com", "appsumo.com", "capterra.com"}
+
+# Name tokens that vary between listings of the same product
+NAME_NOISE = {"the", "inc", "llc", "ltd", "hq", "app"}
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+DIGITS = re.compile(r'\d+')
+
+# 64-bit safe universal hashing: a * x + b with a, b, x < 2**32
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+def normalize_url(url: Optional[str]) -> Optional[str]:
+    """Canonical form of a URL: https, no www, no tracking params, fragment or trailing slash"""
+    if not url:
+        return url
+    parts = urlsplit(url.strip() if "://" in url else f"https://{url.strip()}")
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    path = parts.path.rstrip("/")
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+def registrable_domain(url: Optional[str]) -> Optional[str]:
+    """The domain a registrant controls, e.g. app.example.co.uk -> example.co.uk"""
+    if not url:
+        return None
+    host = (urlsplit(url if "://" in url else f"https://{url}").hostname or "").lower().rstrip(".")
+    if not host or host.replace(".", "").isdigit():
+        return host or None
+    labels = host.split(".")
+    if len(labels) >= 3 and ".".join(labels[-2:]) in MULTI_PART_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase ASCII name without punctuation or noise words"""
+    if not name:
+        return ""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    tokens = NON_ALNUM.sub(" ", ascii_name.lower()).split()
+    return " ".join(token for token in tokens if token not in NAME_NOISE)
+
+def name_numbers(name: str) -> Set[str]:
+    """Version and edition numbers in a normalized name, e.g. "taskflow pro 17" -> {"17"}"""
+    return {digits.lstrip("0") or "0" for digits in DIGITS.findall(name)}
+
+def name_shingles(name: str, size: int = 3) -> Set[str]:
+    """Character n-grams of a normalized name"""
+    if len(name) <= size:
+        return {name} if name else set()
+    return {name[i:i + size] for i in range(len(name) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class MinHasher:
+    """MinHash signatures over string sets using numpy-vectorized hash permutations"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, items: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(item.encode("utf-8")) for item in items), dtype=np.uint64)
+        if hashes.size == 0:
+            return np.zeros(self.num_perm, dtype=np.uint64)
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+class _UnionFind:
+    """Union-find that also tracks each cluster's known domains"""
+
+    def __init__(self, domains: Dict[int, Set[str]]):
+        self.parent = {}
+        self.domains = domains
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x, y) -> bool:
+        root_x, root_y = self.find(x), self.find(y)
+        if root_x == root_y:
+            return True
+        domains_x, domains_y = self.domains.get(root_x, set()), self.domains.get(root_y, set())
+        if domains_x and domains_y and not domains_x & domains_y:
+            # Would chain two different websites together through a domainless record
+            return False
+        # Lowest id becomes the root, so the oldest record survives a merge
+        root, child = min(root_x, root_y), max(root_x, root_y)
+        self.parent[child] = root
+        self.domains[root] = domains_x | domains_y
+        return True
+
+class EntityResolver:
+    """
+    Finds records that describe the same product without comparing every pair.
+    Records are blocked by normalized URL, by registrable domain and by MinHash/LSH
+    buckets over name trigrams; only records sharing a block are compared.
+    """
+
+    def __init__(self, name_threshold: Optional[float] = None, num_perm: Optional[int] = None,
+                 bands: Optional[int] = None, max_block_size: Optional[int] = None,
+                 ignored_domains: Optional[Set[str]] = None):
+        self.name_threshold = name_threshold or settings.ENTITY_NAME_THRESHOLD
+        self.hasher = MinHasher(num_perm or settings.ENTITY_MINHASH_PERMUTATIONS)
+        self.bands = bands or settings.ENTITY_LSH_BANDS
+        if self.hasher.num_perm % self.bands:
+            raise ValueError("ENTITY_MINHASH_PERMUTATIONS must be a multiple of ENTITY_LSH_BANDS")
+        self.rows = self.hasher.num_perm // self.bands
+        self.max_block_size = max_block_size or settings.ENTITY_MAX_BLOCK_SIZE
+        self.ignored_domains = MARKETPLACE_DOMAINS | (ignored_domains or set())
+        self._shingles: Dict[int, Set[str]] = {}
+        self._numbers: Dict[int, Set[str]] = {}
+        self._urls: Dict[int, Set[str]] = {}
+        self._domains: Dict[int, Set[str]] = {}
+        self._blocks: Dict[tuple, List[int]] = defaultdict(list)
+
+    def add(self, record_id: int, name: Optional[str], urls: Iterable[Optional[str]] = ()):
+        """Index one record by its name and the product URLs it is known under"""
+        urls = [url for url in urls if url]
+        normalized_name = normalize_name(name)
+        shingles = name_shingles(normalized_name)
+        domains = {registrable_domain(url) for url in urls} - {None} - self.ignored_domains
+        self._shingles[record_id] = shingles
+        self._numbers[record_id] = name_numbers(normalized_name)
+        # Exact URLs also count on marketplace hosts: one listing is one product
+        self._urls[record_id] = {normalize_url(url) for url in urls}
+        self._domains[record_id] = domains
+
+        for url in self._urls[record_id]:
+            self._blocks[("url", url)].append(record_id)
+        for domain in domains:
+            self._blocks[("domain", domain)].append(record_id)
+        if shingles:
+            signature = self.hasher.signature(shingles)
+            for band in range(self.bands):
+                key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                self._blocks[("name", band, key)].append(record_id)
+
+    def is_match(self, a: int, b: int) -> bool:
+        if self._urls[a] & self._urls[b]:
+            return True
+        domains_a, domains_b = self._domains[a], self._domains[b]
+        if domains_a & domains_b:
+            return True
+        if domains_a and domains_b:
+            # Both have a website and they differ: a lookalike name isn't enough
+            return False
+        if self._numbers[a] != self._numbers[b]:
+            # "TaskFlow Pro 17" and "TaskFlow Pro 18" are separate listings, however alike the names
+            return False
+        return jaccard(self._shingles[a], self._shingles[b]) >= self.name_threshold
+
+    def candidate_pairs(self) -> Set[Tuple[int, int]]:
+        pairs = set()
+        for members in self._blocks.values():
+            # Oversized blocks (placeholder names, shared hosting domains) carry no signal
+            if len(members) < 2 or len(members) > self.max_block_size:
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if a != b:
+                        pairs.add((min(a, b), max(a, b)))
+        return pairs
+
+    def clusters(self) -> List[List[int]]:
+        """Groups of record ids that refer to the same product (singletons omitted)"""
+        union_find = _UnionFind(dict(self._domains))
+        matches = [(a, b) for a, b in self.candidate_pairs() if self.is_match(a, b)]
+        # Strongest evidence first: shared URLs, shared domains, then the most similar names
+        matches.sort(key=lambda pair: (
+            not self._urls[pair[0]] & self._urls[pair[1]],
+            not self._domains[pair[0]] & self._domains[pair[1]],
+            -jaccard(self._shingles[pair[0]], self._shingles[pair[1]]),
+            pair
+        ))
+        for a, b in matches:
+            union_find.union(a, b)
+
+        groups = defaultdict(list)
+        for record_id in list(union_find.parent):
+            groups[union_find.find(record_id)].append(record_id)
+        return [sorted(members) for members in groups.values() if len(members) > 1]
+
+def _merge_lists(*lists) -> list:
+    merged = []
+    for values in lists:
+        for value in values or []:
+            if value not in merged:
+                merged.append(value)
+    return merged
+
+def merge_products(db: Session, survivor: Product, duplicates: List[Product]):
+    """Move listings, estimates, traffic, rollups and logs onto the survivor and delete the duplicates"""
+    duplicate_ids = [duplicate.id for duplicate in duplicates]
+    for model in (ProductMarketplace, ListingPricePlan, MrrEstimate, TrafficData, ScrapeLog):
+        db.query(model).filter(model.product_id.in_(duplicate_ids)).update(
+            {model.product_id: survivor.id}, synchronize_session=False
+        )
+    merge_product_rollups(db, survivor.id, duplicate_ids)
+
+    survivor.tags = _merge_lists(survivor.tags, *[duplicate.tags for duplicate in duplicates])
+    survivor.categories = _merge_lists(survivor.categories, *[duplicate.categories for duplicate in duplicates])
+    if not survivor.description:
+        survivor.description = next((d.description for d in duplicates if d.description), None)
+    if not survivor.logo_url:
+        survivor.logo_url = next((d.logo_url for d in duplicates if d.logo_url), None)
+
+    for duplicate in duplicates:
+        db.delete(duplicate)
+    publish_changes(db, "merge", [survivor.id] + duplicate_ids)
+
+def resolve_entities(db: Session, resolver: Optional[EntityResolver] = None,
+                     dry_run: bool = False) -> List[List[int]]:
+    """
+    Cluster the catalog and merge each cluster into its oldest product.
+    Returns the clusters found (product ids, survivor first).
+    """
+    marketplace_domains = {
+        registrable_domain(base_url)
+        for (base_url,) in db.query(Marketplace.base_url) if base_url
+    }
+    resolver = resolver or EntityResolver(ignored_domains=marketplace_domains)
+
+    listing_urls = defaultdict(list)
+    for product_id, listing_url in db.query(ProductMarketplace.product_id, ProductMarketplace.listing_url).yield_per(10000):
+        listing_urls[product_id].append(listing_url)
+
+    for product_id, name, canonical_url in db.query(Product.id, Product.name, Product.canonical_url).yield_per(10000):
+        resolver.add(product_id, name, [canonical_url] + listing_urls.get(product_id, []))
+
+    clusters = resolver.clusters()
+    if dry_run:
+        return clusters
+
+    for cluster in clusters:
+        products = {product.id: product for product in db.query(Product).filter(Product.id.in_(cluster))}
+        survivor = products[cluster[0]]
+        merge_products(db, survivor, [products[product_id] for product_id in cluster[1:]])
+        db.commit()
+    return clusters
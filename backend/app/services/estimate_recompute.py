@@ -0,0 +1,263 @@
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import cast, func, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+from app.schemas.product import MarketplaceListing
+from app.services.mrr_estimator import MrrEstimator
+from app.services.change_events import publish_changes
+
+def latest_fingerprints(db: Session, product_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    """Input fingerprint of each product's most recent estimate"""
+    latest_ids = select(func.max(MrrEstimate.id)).where(
+        MrrEstimate.product_id.in_(list(product_ids))
+    ).group_by(MrrEstimate.product_id)
+    return dict(
+        db.query(MrrEstimate.product_id, MrrEstimate.input_fingerprint).filter(MrrEstimate.id.in_(latest_ids))
+    )
+
+def load_estimate_inputs(db: Session, product_ids: List[int]) -> Dict[int, Tuple[List[MarketplaceListing], dict]]:
+    """Listings (with price plans) and latest traffic figures for a batch of products"""
+    listings = {product_id: [] for product_id in product_ids}
+    for product_id, name, listing_url, price_plans in db.query(
+        ProductMarketplace.product_id, Marketplace.name, ProductMarketplace.listing_url, ProductMarketplace.price_plans
+    ).join(Marketplace, ProductMarketplace.marketplace_id == Marketplace.id).filter(
+        ProductMarketplace.product_id.in_(product_ids)
+    ).order_by(ProductMarketplace.id):
+        try:
+            listings[product_id].append(
+                MarketplaceListing(name=name, listing_url=listing_url or "", price_plans=price_plans or [])
+            )
+        except ValueError as e:
+            print(f"Skipping malformed {name} listing of product {product_id}: {e}")
+
+    latest_traffic = select(func.max(TrafficData.id)).where(
+        TrafficData.product_id.in_(product_ids)
+    ).group_by(TrafficData.product_id)
+    traffic = {
+        product_id: {"visits_month": visits_month or 0, "visits_growth": visits_growth}
+        for product_id, visits_month, visits_growth in db.query(
+            TrafficData.product_id, TrafficData.visits_month, TrafficData.visits_growth
+        ).filter(TrafficData.id.in_(latest_traffic))
+    }
+
+    return {
+        product_id: (listings[product_id], traffic.get(product_id, {"visits_month": 0, "visits_growth": None}))
+        for product_id in product_ids
+    }
+
+def build_estimates(estimator: MrrEstimator, product_ids: List[int], inputs: Dict[int, tuple],
+                    previous: Dict[int, Optional[str]]) -> Tuple[List[dict], int]:
+    """
+    Estimate a batch with estimate_mrr_batch and return insert rows for the products
+    whose input fingerprint changed, plus the number skipped as unchanged.
+    """
+    changed_ids, fingerprints = [], []
+    for product_id in product_ids:
+        marketplaces, traffic = inputs[product_id]
+        fingerprint = estimator.input_fingerprint(marketplaces, traffic)
+        if previous.get(product_id) == fingerprint:
+            continue
+        changed_ids.append(product_id)
+        fingerprints.append(fingerprint)
+
+    if not changed_ids:
+        return [], len(product_ids)
+
+    visits = [inputs[product_id][1]["visits_month"] for product_id in changed_ids]
+    if estimator.mode == "monte_carlo":
+        plans = [estimator.plan_inputs(inputs[product_id][0]) for product_id in changed_ids]
+        results = estimator.estimate_mrr_monte_carlo_batch(
+            [prices for prices, _ in plans], visits, [popular for _, popular in plans]
+        )
+    else:
+        prices = [estimator.highest_price(inputs[product_id][0]) for product_id in changed_ids]
+        results = estimator.estimate_mrr_batch(prices, visits)
+
+    rows = []
+    for i, product_id in enumerate(changed_ids):
+        if estimator.mode == "monte_carlo":
+            assumptions = estimator.simulation.assumptions(float(results["conversion_rate"][i]), visits[i])
+        else:
+            assumptions = estimator.build_assumptions(
+                float(results["conversion_rate"][i]), visits[i], int(results["estimated_customers"][i]), prices[i]
+            )
+        rows.append({
+            "product_id": product_id,
+            "mrr_low": float(results["mrr_low"][i]),
+            "mrr_likely": float(results["mrr_likely"][i]),
+            "mrr_high": float(results["mrr_high"][i]),
+            "confidence": float(results["confidence"][i]),
+            "assumptions": assumptions,
+            "methodology": estimator.methodology,
+            "input_fingerprint": fingerprints[i],
+            "estimator_version": estimator.VERSION
+        })
+    return rows, len(product_ids) - len(changed_ids)
+
+def has_stale_estimates(db: Session, version: str = MrrEstimator.VERSION) -> bool:
+    """Whether any product's latest estimate was produced by a different estimator version"""
+    latest_ids = select(func.max(MrrEstimate.id)).group_by(MrrEstimate.product_id)
+    return db.query(MrrEstimate.id).filter(
+        MrrEstimate.id.in_(latest_ids),
+        or_(MrrEstimate.estimator_version.is_(None), MrrEstimate.estimator_version != version)
+    ).first() is not None
+
+class RecomputeStats:
+    def __init__(self):
+        self.scanned = 0
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_product_id = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def products_per_second(self) -> float:
+        return self.scanned / self.elapsed if self.elapsed > 0 else 0.0
+
+def estimate_chunk(task: Tuple[MrrEstimator, List[int], Dict[int, tuple], Dict[int, Optional[str]]]):
+    """
+    Estimate one chunk; runs in a worker process when recomputing in parallel.
+    Returns (product_ids, rows, skipped, error).
+    """
+    estimator, product_ids, inputs, previous = task
+    try:
+        rows, skipped = build_estimates(estimator, product_ids, inputs, previous)
+    except Exception as e:
+        return product_ids, [], 0, str(e)
+    return product_ids, rows, skipped, None
+
+class EstimateRecomputer:
+    """
+    Recomputes MRR estimates across the catalog in product id order, writing a row
+    only when a product's input fingerprint changed. Chunks are read on one session,
+    estimated (optionally in a process pool) and bulk inserted on another, with an
+    optional pause between chunks so a full recompute after a version bump doesn't
+    swamp the database.
+    """
+
+    def __init__(self, estimator: Optional[MrrEstimator] = None, batch_size: Optional[int] = None,
+                 pause: Optional[float] = None, workers: int = 1, sleep=time.sleep):
+        self.estimator = estimator or MrrEstimator()
+        self.batch_size = batch_size or settings.ESTIMATE_RECOMPUTE_BATCH_SIZE
+        self.pause = settings.ESTIMATE_RECOMPUTE_PAUSE_SECONDS if pause is None else pause
+        self.workers = workers
+        self.sleep = sleep
+
+    def _product_query(self, db: Session, start_after: int, category: Optional[str]):
+        query = db.query(Product.id, Product.categories).filter(Product.id > start_after)
+        if category and db.get_bind().dialect.name == "postgresql":
+            # JSONB containment (@>); plain JSON has no operator for it, so other databases filter in Python
+            query = query.filter(cast(Product.categories, JSONB).contains([category]))
+        return query.order_by(Product.id)
+
+    @staticmethod
+    def _in_category(categories: Optional[list], category: Optional[str]) -> bool:
+        return not category or category in (categories or [])
+
+    def _streamed_ids(self, read_db: Session, start_after: int, category: Optional[str]) -> Iterator[List[int]]:
+        # Server-side cursor: ids arrive chunk by chunk instead of all at once
+        chunk = []
+        for product_id, categories in self._product_query(read_db, start_after, category).yield_per(self.batch_size):
+            if not self._in_category(categories, category):
+                continue
+            chunk.append(product_id)
+            if len(chunk) >= self.batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _paged_ids(self, db: Session, start_after: int, category: Optional[str]) -> Iterator[List[int]]:
+        # Keyset pagination, for when reads share the session that commits the writes
+        while True:
+            rows = self._product_query(db, start_after, category).limit(self.batch_size).all()
+            if not rows:
+                return
+            chunk = [product_id for product_id, categories in rows if self._in_category(categories, category)]
+            if chunk:
+                yield chunk
+            start_after = rows[-1][0]
+
+    def _tasks(self, read_db: Session, id_chunks: Iterator[List[int]], limit: Optional[int]):
+        scanned = 0
+        for product_ids in id_chunks:
+            if limit is not None:
+                product_ids = product_ids[:limit - scanned]
+                if not product_ids:
+                    return
+            scanned += len(product_ids)
+            yield (self.estimator, product_ids, load_estimate_inputs(read_db, product_ids),
+                   latest_fingerprints(read_db, product_ids))
+
+    def _results(self, tasks) -> Iterator[tuple]:
+        if self.workers <= 1:
+            for task in tasks:
+                yield estimate_chunk(task)
+            return
+
+        # Keep a bounded number of chunks in flight and yield them in order,
+        # so memory stays flat and a checkpoint never skips an unwritten chunk
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = deque()
+            for task in tasks:
+                in_flight.append(pool.submit(estimate_chunk, task))
+                if len(in_flight) >= self.workers * 2:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def run(self, db: Session, start_after: int = 0, limit: Optional[int] = None,
+            category: Optional[str] = None, read_db: Optional[Session] = None,
+            on_batch=None) -> RecomputeStats:
+        """
+        Walk the catalog after product id `start_after`, writing on `db`.
+        With a separate `read_db` on a database that supports server-side cursors
+        (Postgres), the catalog is streamed through one instead of paged.
+        `on_batch(stats)` runs after each chunk is committed; stats.last_product_id
+        is then safe to resume from.
+        """
+        stats = RecomputeStats()
+        stats.last_product_id = start_after
+        if read_db is not None and not read_db.get_bind().dialect.supports_server_side_cursors:
+            # e.g. SQLite, where an open read cursor would block the writes
+            read_db = None
+        if read_db is not None:
+            id_chunks = self._streamed_ids(read_db, start_after, category)
+        else:
+            id_chunks = self._paged_ids(db, start_after, category)
+
+        for product_ids, rows, skipped, error in self._results(self._tasks(read_db or db, id_chunks, limit)):
+            try:
+                if error:
+                    raise ValueError(error)
+                if rows:
+                    db.bulk_insert_mappings(MrrEstimate, rows)
+                    publish_changes(db, "estimate", {row["product_id"] for row in rows})
+                db.commit()
+                stats.written += len(rows)
+                stats.skipped += skipped
+            except Exception as e:
+                db.rollback()
+                stats.failed += len(product_ids)
+                print(f"Error recomputing estimates for products {product_ids[0]}-{product_ids[-1]}: {e}")
+
+            stats.scanned += len(product_ids)
+            stats.last_product_id = product_ids[-1]
+            if on_batch:
+                on_batch(stats)
+            if self.pause:
+                self.sleep(self.pause)
+        return stats
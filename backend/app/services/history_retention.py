@@ -0,0 +1,353 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import Float, and_, cast, exists, func, text
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.schema import AddConstraint
+from app.core.config import settings
+from app.models.scrape_log import ScrapeLog
+from app.models.traffic import TrafficData
+from app.models.estimate import MrrEstimate
+from app.models.history_rollup import MrrEstimateRollup, ScrapeLogRollup, TrafficRollup
+
+def period_start(value: datetime, granularity: str) -> date:
+    """First day of the day/week (Monday) bucket a timestamp falls in"""
+    day = value.date()
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+def _merge_average(old_avg: Optional[float], old_count: int, new_avg: Optional[float], new_count: int) -> Optional[float]:
+    if old_avg is None or not old_count:
+        return new_avg
+    if new_avg is None or not new_count:
+        return old_avg
+    return (old_avg * old_count + new_avg * new_count) / (old_count + new_count)
+
+def _avg(column):
+    # PostgreSQL averages integers as numeric, which comes back as Decimal
+    return cast(func.avg(column), Float)
+
+def _existing_rollups(db: Session, model: type, period_column: str, period: date, key: Callable) -> dict:
+    """The period's rollups keyed like the aggregated groups, loaded with one query"""
+    return {key(rollup): rollup for rollup in db.query(model).filter(getattr(model, period_column) == period)}
+
+def _rollup_scrape_logs(db: Session, window, period: date) -> int:
+    duration = func.coalesce(ScrapeLog.duration, 0)
+    groups = db.query(
+        ScrapeLog.marketplace_id, ScrapeLog.status, func.count(), func.sum(duration), func.max(duration)
+    ).filter(window).group_by(ScrapeLog.marketplace_id, ScrapeLog.status).all()
+    existing = _existing_rollups(db, ScrapeLogRollup, "day", period,
+                                 lambda rollup: (rollup.marketplace_id, rollup.status))
+
+    new_rollups = []
+    for marketplace_id, status, requests, total_duration, max_duration in groups:
+        rollup = existing.get((marketplace_id, status))
+        if not rollup:
+            rollup = ScrapeLogRollup(day=period, marketplace_id=marketplace_id, status=status,
+                                     requests=0, total_duration=0, max_duration=None)
+            new_rollups.append(rollup)
+        rollup.requests += requests
+        rollup.total_duration += total_duration
+        rollup.max_duration = max_duration if rollup.max_duration is None else max(rollup.max_duration, max_duration)
+    db.add_all(new_rollups)
+    return sum(group[2] for group in groups)
+
+def _rollup_traffic(db: Session, window, period: date) -> int:
+    groups = db.query(
+        TrafficData.product_id, func.count(), _avg(TrafficData.visits_month), func.min(TrafficData.visits_month),
+        func.max(TrafficData.visits_month), _avg(TrafficData.visits_growth)
+    ).filter(window).group_by(TrafficData.product_id).all()
+    existing = _existing_rollups(db, TrafficRollup, "week_start", period, lambda rollup: rollup.product_id)
+
+    new_rollups = []
+    for product_id, samples, visits_avg, visits_min, visits_max, growth_avg in groups:
+        rollup = existing.get(product_id)
+        if not rollup:
+            rollup = TrafficRollup(product_id=product_id, week_start=period, samples=0)
+            new_rollups.append(rollup)
+        rollup.visits_month_avg = _merge_average(rollup.visits_month_avg, rollup.samples, visits_avg, samples)
+        rollup.visits_growth_avg = _merge_average(rollup.visits_growth_avg, rollup.samples, growth_avg, samples)
+        if visits_min is not None:
+            rollup.visits_month_min = visits_min if rollup.visits_month_min is None else min(rollup.visits_month_min, visits_min)
+            rollup.visits_month_max = visits_max if rollup.visits_month_max is None else max(rollup.visits_month_max, visits_max)
+        rollup.samples += samples
+    db.add_all(new_rollups)
+    return sum(group[1] for group in groups)
+
+def _rollup_estimates(db: Session, window, period: date) -> int:
+    columns = ("mrr_low", "mrr_likely", "mrr_high", "confidence")
+    groups = db.query(
+        MrrEstimate.product_id, func.count(), *[_avg(getattr(MrrEstimate, column)) for column in columns]
+    ).filter(window).group_by(MrrEstimate.product_id).all()
+    existing = _existing_rollups(db, MrrEstimateRollup, "week_start", period, lambda rollup: rollup.product_id)
+
+    new_rollups = []
+    for product_id, samples, *averages in groups:
+        rollup = existing.get(product_id)
+        if not rollup:
+            rollup = MrrEstimateRollup(product_id=product_id, week_start=period, samples=0)
+            new_rollups.append(rollup)
+        for column, average in zip(columns, averages):
+            setattr(rollup, f"{column}_avg",
+                    _merge_average(getattr(rollup, f"{column}_avg"), rollup.samples, average, samples))
+        rollup.samples += samples
+    db.add_all(new_rollups)
+    return sum(group[1] for group in groups)
+
+def _merge_rollup(target, source, average_columns: Tuple[str, ...]):
+    """Fold one rollup of the same period into another, weighting averages by samples"""
+    for column in average_columns:
+        setattr(target, column, _merge_average(getattr(target, column), target.samples or 0,
+                                               getattr(source, column), source.samples or 0))
+    if isinstance(target, TrafficRollup) and source.visits_month_min is not None:
+        target.visits_month_min = source.visits_month_min if target.visits_month_min is None else min(target.visits_month_min, source.visits_month_min)
+        target.visits_month_max = source.visits_month_max if target.visits_month_max is None else max(target.visits_month_max, source.visits_month_max)
+    target.samples = (target.samples or 0) + (source.samples or 0)
+
+# Per-product rollups and their averaged columns
+PRODUCT_ROLLUPS = [
+    (TrafficRollup, ("visits_month_avg", "visits_growth_avg")),
+    (MrrEstimateRollup, ("mrr_low_avg", "mrr_likely_avg", "mrr_high_avg", "confidence_avg")),
+]
+
+def merge_product_rollups(db: Session, survivor_id: int, duplicate_ids: List[int]):
+    """Move the duplicates' weekly rollups onto the survivor, merging weeks both already have"""
+    for model, average_columns in PRODUCT_ROLLUPS:
+        by_week = {rollup.week_start: rollup for rollup in db.query(model).filter(model.product_id == survivor_id)}
+        for rollup in db.query(model).filter(model.product_id.in_(duplicate_ids)).order_by(model.id):
+            target = by_week.get(rollup.week_start)
+            if target is None:
+                rollup.product_id = survivor_id
+                by_week[rollup.week_start] = rollup
+            else:
+                _merge_rollup(target, rollup, average_columns)
+                db.delete(rollup)
+
+@dataclass
+class HistoryTable:
+    """A time-series table: how it is rolled up, how long raw rows are kept, how it is partitioned"""
+    model: type
+    time_column: str
+    granularity: str  # day or week
+    retention_setting: str
+    rollup: Callable  # (db, window filter, period start) -> raw rows rolled up
+    rollup_model: type
+    rollup_period_column: str
+    keep_latest: bool = False  # never compact each product's newest row; other code reads it
+
+    @property
+    def table_name(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def retention_days(self) -> int:
+        return getattr(settings, self.retention_setting)
+
+HISTORY_TABLES = [
+    HistoryTable(ScrapeLog, "timestamp", "day", "SCRAPE_LOG_RAW_RETENTION_DAYS",
+                 _rollup_scrape_logs, ScrapeLogRollup, "day"),
+    HistoryTable(TrafficData, "created_at", "week", "TRAFFIC_RAW_RETENTION_DAYS",
+                 _rollup_traffic, TrafficRollup, "week_start", keep_latest=True),
+    HistoryTable(MrrEstimate, "created_at", "week", "ESTIMATE_RAW_RETENTION_DAYS",
+                 _rollup_estimates, MrrEstimateRollup, "week_start", keep_latest=True),
+]
+
+# --- Partitioning (PostgreSQL only) ---
+
+def is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+def partitioned_tables(db: Session) -> set:
+    """Names of the natively partitioned tables in the current database"""
+    if not is_postgres(db):
+        return set()
+    return {name for (name,) in db.execute(text(
+        "SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid"
+    ))}
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_p{month:%Y%m}"
+
+def partition_ddl(table_name: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, month)} PARTITION OF {table_name} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+
+def ensure_partitions_for(db: Session, table_name: str, since: date, today: Optional[date] = None) -> List[str]:
+    """Create the monthly partitions from `since` through PARTITION_MONTHS_AHEAD months after today"""
+    today = today or date.today()
+    month, last = month_start(since), month_start(today)
+    for _ in range(settings.PARTITION_MONTHS_AHEAD):
+        last = next_month(last)
+    names = []
+    while month <= last:
+        db.execute(text(partition_ddl(table_name, month)))
+        names.append(partition_name(table_name, month))
+        month = next_month(month)
+    return names
+
+def ensure_partitions(db: Session, today: Optional[date] = None) -> List[str]:
+    """Make sure every partitioned history table has partitions for this month and the next few"""
+    today = today or date.today()
+    existing = partitioned_tables(db)
+    names = []
+    for table in HISTORY_TABLES:
+        if table.table_name in existing:
+            names += ensure_partitions_for(db, table.table_name, today, today)
+    db.commit()
+    return names
+
+def partition_table(db: Session, table: HistoryTable, today: Optional[date] = None) -> bool:
+    """
+    Convert an existing table into one range-partitioned by month on its time
+    column, in a single transaction. The primary key becomes (id, time column),
+    as PostgreSQL requires the partition key in it. Returns False when the
+    table is already partitioned or the database isn't PostgreSQL.
+    """
+    if not is_postgres(db) or table.table_name in partitioned_tables(db):
+        return False
+    name, column = table.table_name, table.time_column
+    sql_table = table.model.__table__
+    old = f"{name}_unpartitioned"
+
+    db.execute(text(f"UPDATE {name} SET {column} = now() WHERE {column} IS NULL"))
+    oldest = db.execute(text(f"SELECT min({column}) FROM {name}")).scalar()
+    db.execute(text(f"ALTER TABLE {name} RENAME TO {old}"))
+    # Free the primary key name for the new table
+    db.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {name}_pkey TO {old}_pkey"))
+    db.execute(text(
+        f"CREATE TABLE {name} (LIKE {old} INCLUDING DEFAULTS INCLUDING STORAGE) PARTITION BY RANGE ({column})"
+    ))
+    db.execute(text(f"ALTER TABLE {name} ALTER COLUMN {column} SET NOT NULL"))
+    db.execute(text(f"ALTER TABLE {name} ALTER COLUMN {column} SET DEFAULT now()"))
+    db.execute(text(f"ALTER TABLE {name} ADD PRIMARY KEY (id, {column})"))
+    ensure_partitions_for(db, name, oldest.date() if oldest else (today or date.today()), today)
+    db.execute(text(f"INSERT INTO {name} SELECT * FROM {old}"))
+    # The id sequence belongs to the old table and would be dropped with it
+    db.execute(text(f"ALTER SEQUENCE IF EXISTS {name}_id_seq OWNED BY {name}.id"))
+    db.execute(text(f"DROP TABLE {old}"))
+
+    # Index names are schema-wide, so they can only be recreated once the old table is gone
+    connection = db.connection()
+    for index in sql_table.indexes:
+        index.create(connection)
+    for constraint in sql_table.foreign_key_constraints:
+        connection.execute(AddConstraint(constraint))
+    db.commit()
+    return True
+
+def drop_expired_partitions(db: Session, table: HistoryTable, cutoff: datetime) -> List[str]:
+    """Drop the monthly partitions that end before the raw cutoff, once compaction has rolled them up"""
+    if table.table_name not in partitioned_tables(db):
+        return []
+    dropped = []
+    children = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :name"
+    ), {"name": table.table_name}).scalars().all()
+    for child in sorted(children):
+        suffix = child.rsplit("_p", 1)[-1]
+        if not suffix.isdigit() or len(suffix) != 6:
+            continue
+        month = date(int(suffix[:4]), int(suffix[4:]), 1)
+        if datetime.combine(next_month(month), time.min) > cutoff:
+            continue
+        # Tables that keep each product's latest row can't drop a partition still holding one
+        if table.keep_latest and db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {child})")).scalar():
+            continue
+        db.execute(text(f"ALTER TABLE {table.table_name} DETACH PARTITION {child}"))
+        db.execute(text(f"DROP TABLE {child}"))
+        dropped.append(child)
+    db.commit()
+    return dropped
+
+# --- Compaction ---
+
+@dataclass
+class CompactionStats:
+    rolled_up: Dict[str, int] = field(default_factory=dict)
+    partitions_ensured: List[str] = field(default_factory=list)
+    partitions_dropped: List[str] = field(default_factory=list)
+    rollups_deleted: int = 0
+
+def _window_filter(table: HistoryTable, start: datetime, end: datetime):
+    column = getattr(table.model, table.time_column)
+    conditions = [column >= start, column < end]
+    if table.keep_latest:
+        newer = aliased(table.model)
+        conditions.append(exists().where(and_(newer.product_id == table.model.product_id, newer.id > table.model.id)))
+    return and_(*conditions)
+
+def compact_table(db: Session, table: HistoryTable, now: Optional[datetime] = None,
+                  partitioned: bool = False) -> Tuple[int, Optional[datetime]]:
+    """
+    Roll raw rows older than the table's retention into its rollup table one
+    period at a time, committing after each, and delete them. In partitioned
+    tables without keep_latest the rows are left for drop_expired_partitions.
+    Returns the rows rolled up and the cutoff used.
+    """
+    if table.retention_days <= 0:
+        return 0, None
+    now = now or datetime.utcnow()
+    column = getattr(table.model, table.time_column)
+    step = timedelta(days=7 if table.granularity == "week" else 1)
+    # Align to a period boundary so no bucket is ever rolled up from half its rows
+    cutoff = datetime.combine(period_start(now - timedelta(days=table.retention_days), table.granularity), time.min)
+
+    rolled_up = 0
+    start_from = datetime.min
+    deletes = table.keep_latest or not partitioned
+    if not deletes:
+        # Rolled-up rows stay until their partition is dropped; resume after the last rolled-up period
+        last_period = db.query(func.max(getattr(table.rollup_model, table.rollup_period_column))).scalar()
+        if last_period is not None:
+            start_from = datetime.combine(last_period, time.min) + step
+    while True:
+        # Jump straight to the next period that has rows, so gaps in history cost nothing
+        oldest = db.query(func.min(column)).filter(_window_filter(table, start_from, cutoff)).scalar()
+        if oldest is None:
+            break
+        window_start = datetime.combine(period_start(oldest, table.granularity), time.min)
+        window_end = window_start + step
+        window = _window_filter(table, window_start, window_end)
+
+        # Aggregated in the database: one GROUP BY per period, never the raw rows
+        rolled_up += table.rollup(db, window, window_start.date())
+        if deletes:
+            db.query(table.model).filter(window).delete(synchronize_session=False)
+        db.commit()
+        start_from = window_end
+    return rolled_up, cutoff
+
+def delete_expired_rollups(db: Session, today: Optional[date] = None) -> int:
+    if settings.ROLLUP_RETENTION_DAYS <= 0:
+        return 0
+    cutoff = (today or date.today()) - timedelta(days=settings.ROLLUP_RETENTION_DAYS)
+    deleted = 0
+    for table in HISTORY_TABLES:
+        period = getattr(table.rollup_model, table.rollup_period_column)
+        deleted += db.query(table.rollup_model).filter(period < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def maintain_history(db: Session, now: Optional[datetime] = None) -> CompactionStats:
+    """Create upcoming partitions, compact raw history past retention, and expire old rollups"""
+    now = now or datetime.utcnow()
+    stats = CompactionStats()
+    stats.partitions_ensured = ensure_partitions(db, today=now.date())
+    partitioned = partitioned_tables(db)
+    for table in HISTORY_TABLES:
+        rolled_up, cutoff = compact_table(db, table, now, partitioned=table.table_name in partitioned)
+        stats.rolled_up[table.table_name] = rolled_up
+        if cutoff is not None:
+            stats.partitions_dropped += drop_expired_partitions(db, table, cutoff)
+    stats.rollups_deleted = delete_expired_rollups(db, now.date())
+    return stats
@@ -0,0 +1,237 @@
+from sqlalchemy.orm import selectinload
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+from app.services.mrr_estimator import MrrEstimator
+from app.services.traffic_estimator import TrafficEstimator
+from app.services.recrawl_scheduler import RecrawlScheduler
+from app.schemas.product import MarketplaceListing
+from app.services.pipeline import FAILED, Pipeline, Stage
+from app.services.estimate_recompute import latest_fingerprints
+from app.services.pricing import fx_rate_cache, sync_price_plans
+from app.services.change_events import publish_changes
+from app.services.entity_resolution import normalize_url
+
+def setup_marketplace(db):
+    """Ensure Product Hunt marketplace exists in database"""
+    marketplace = db.query(Marketplace).filter(Marketplace.name == "Product Hunt").first()
+    if not marketplace:
+        marketplace = Marketplace(
+            name="Product Hunt",
+            base_url="https://www.producthunt.com",
+            is_api_available=False,
+            is_scraping_allowed=True
+        )
+        db.add(marketplace)
+        db.commit()
+        db.refresh(marketplace)
+    return marketplace
+
+def estimate_inputs(product_data, marketplace_name, traffic_data):
+    """Listings and traffic figures the MRR estimate of a scraped product is based on"""
+    marketplace_listings = [MarketplaceListing(
+        name=marketplace_name,
+        listing_url=product_data['url'],
+        price_plans=product_data.get('price_plans', [])
+    )]
+    traffic = {
+        "visits_month": traffic_data.visits_month,
+        "visits_growth": traffic_data.visits_growth
+    }
+    return marketplace_listings, traffic
+
+def estimate_product(product_data, marketplace_name, traffic_estimator, mrr_estimator):
+    """Estimate traffic and MRR for one scraped product"""
+    traffic_data = traffic_estimator.estimate_traffic(product_data['url'])
+    
+    marketplace_listings, traffic = estimate_inputs(product_data, marketplace_name, traffic_data)
+    mrr_estimate_data = mrr_estimator.estimate_mrr(product_data, marketplace_listings, traffic)
+    return traffic_data, mrr_estimate_data
+
+def save_products_to_db(products, db, with_estimates=True, record_history=True, estimates=None,
+                        marketplace=None, outcomes=None):
+    """
+    Save scraped products to database.
+    Existing products and listings for the batch are loaded with one query each.
+    Each product is written in its own savepoint so one bad row doesn't discard the batch.
+    A new MRR estimate is only stored when its input fingerprint differs from the latest one.
+    `estimates` optionally holds precomputed (traffic, mrr_estimate) pairs, one per product.
+    Listings go to `marketplace` (Product Hunt by default). If `outcomes` is a list, one
+    (status, error) pair per product is appended: inserted, updated or failed.
+    """
+    marketplace = marketplace or setup_marketplace(db)
+    mrr_estimator = MrrEstimator()
+    traffic_estimator = TrafficEstimator()
+    scheduler = RecrawlScheduler()
+    fx_rates = fx_rate_cache.rates(db)
+    
+    urls = list({product_data.get('url') for product_data in products} - {None})
+    canonical_urls = {url: normalize_url(url) for url in urls}
+    # Canonical URLs are stored normalized; raw ones may predate that
+    existing_products = {
+        normalize_url(product.canonical_url): product
+        for product in db.query(Product).filter(
+            Product.canonical_url.in_(set(urls) | set(canonical_urls.values()))
+        )
+    }
+    # Listings merged into another product by entity resolution keep their URL
+    for listing_url, product in db.query(ProductMarketplace.listing_url, Product).join(
+        Product, ProductMarketplace.product_id == Product.id
+    ).filter(
+        ProductMarketplace.marketplace_id == marketplace.id,
+        ProductMarketplace.listing_url.in_(urls)
+    ):
+        existing_products.setdefault(canonical_urls[listing_url], product)
+    # A product can hold several listings per marketplace once duplicates are merged
+    existing_listings = {
+        (listing.product_id, listing.listing_url): listing
+        for listing in db.query(ProductMarketplace).options(selectinload(ProductMarketplace.plans)).filter(
+            ProductMarketplace.marketplace_id == marketplace.id,
+            ProductMarketplace.product_id.in_([product.id for product in existing_products.values()])
+        )
+    }
+    previous_fingerprints = latest_fingerprints(db, {product.id for product in existing_products.values()})
+    
+    saved_count = 0
+    saved_ids = set()
+    for position, product_data in enumerate(products):
+        savepoint = db.begin_nested()
+        try:
+            canonical_url = normalize_url(product_data['url'])
+            existing_product = existing_products.get(canonical_url)
+            
+            if existing_product:
+                # Update existing product
+                existing_product.name = product_data['name']
+                existing_product.description = product_data['description']
+                existing_product.tags = product_data.get('tags', [])
+                existing_product.categories = product_data.get('categories', [])
+                product_obj = existing_product
+            else:
+                # Create new product
+                product_obj = Product(
+                    name=product_data['name'],
+                    canonical_url=canonical_url,
+                    description=product_data['description'],
+                    tags=product_data.get('tags', []),
+                    categories=product_data.get('categories', [])
+                )
+                db.add(product_obj)
+                db.flush()  # Get the ID without committing
+            
+            # Save marketplace listing, reusing the existing one so its change history is kept
+            product_marketplace = existing_listings.get((product_obj.id, product_data['url']))
+            if not product_marketplace:
+                product_marketplace = ProductMarketplace(
+                    product_id=product_obj.id,
+                    marketplace_id=marketplace.id
+                )
+                db.add(product_marketplace)
+            product_marketplace.listing_url = product_data['url']
+            product_marketplace.upvotes = product_data.get('upvotes', 0)
+            product_marketplace.price_plans = product_data.get('price_plans', [])
+            sync_price_plans(db, product_marketplace, fx_rates=fx_rates)
+            if record_history:
+                scheduler.record_scrape(product_marketplace, product_data)
+            
+            if estimates is not None:
+                traffic_data, mrr_estimate_data = estimates[position]
+            elif with_estimates:
+                traffic_data, mrr_estimate_data = estimate_product(
+                    product_data, marketplace.name, traffic_estimator, mrr_estimator
+                )
+            else:
+                traffic_data = mrr_estimate_data = None
+            
+            if traffic_data is not None:
+                traffic_obj = TrafficData(
+                    product_id=product_obj.id,
+                    visits_month=traffic_data.visits_month,
+                    visits_growth=traffic_data.visits_growth,
+                    bounce_rate=traffic_data.bounce_rate,
+                    avg_time_on_site=traffic_data.avg_time_on_site,
+                    traffic_sources=traffic_data.traffic_sources
+                )
+                db.add(traffic_obj)
+            
+            fingerprint = None
+            if mrr_estimate_data is not None:
+                fingerprint = mrr_estimator.input_fingerprint(
+                    *estimate_inputs(product_data, marketplace.name, traffic_data)
+                )
+            
+            if mrr_estimate_data is not None and fingerprint != previous_fingerprints.get(product_obj.id):
+                mrr_estimate = MrrEstimate(
+                    product_id=product_obj.id,
+                    mrr_low=mrr_estimate_data.mrr_low,
+                    mrr_likely=mrr_estimate_data.mrr_likely,
+                    mrr_high=mrr_estimate_data.mrr_high,
+                    confidence=mrr_estimate_data.confidence,
+                    assumptions=mrr_estimate_data.assumptions,
+                    methodology=mrr_estimate_data.methodology,
+                    input_fingerprint=fingerprint,
+                    estimator_version=mrr_estimator.VERSION
+                )
+                db.add(mrr_estimate)
+            
+            savepoint.commit()
+            existing_products[canonical_url] = product_obj
+            if fingerprint is not None:
+                previous_fingerprints[product_obj.id] = fingerprint
+            existing_listings[(product_obj.id, product_data['url'])] = product_marketplace
+            saved_count += 1
+            saved_ids.add(product_obj.id)
+            if outcomes is not None:
+                outcomes.append(("updated" if existing_product else "inserted", None))
+            
+        except Exception as e:
+            print(f"Error saving product {product_data.get('name', 'Unknown')}: {e}")
+            savepoint.rollback()
+            if outcomes is not None:
+                outcomes.append(("failed", str(e)))
+            continue
+    
+    if saved_ids:
+        publish_changes(db, "product", saved_ids)
+    db.commit()
+    return saved_count
+
+def build_scrape_pipeline(scraper, db, fetch_urls=False, fetch_workers=1, estimate_workers=2,
+                          batch_size=50, queue_size=100, checkpoint=None, on_saved=None):
+    """
+    Build the streaming scrape -> estimate -> persist pipeline.
+    With fetch_urls the source yields listing URLs that go through fetch and parse
+    stages; otherwise it yields already-scraped product dicts.
+    """
+    mrr_estimator = MrrEstimator()
+    traffic_estimator = TrafficEstimator()
+    
+    def estimate(product_data):
+        traffic_data, mrr_estimate_data = estimate_product(
+            product_data, scraper.marketplace_name, traffic_estimator, mrr_estimator
+        )
+        return product_data, traffic_data, mrr_estimate_data
+    
+    def write(batch):
+        products = [product_data for product_data, _, _ in batch]
+        estimates = [(traffic_data, mrr_data) for _, traffic_data, mrr_data in batch]
+        outcomes = []
+        save_products_to_db(products, db, estimates=estimates, outcomes=outcomes)
+        # Rows that failed to save count as failed in the write stage's stats
+        results = [
+            product_data if status != "failed" else FAILED
+            for product_data, (status, _) in zip(products, outcomes)
+        ]
+        if on_saved:
+            on_saved([result for result in results if result is not FAILED])
+        return results
+    
+    stages = []
+    if fetch_urls:
+        stages.append(Stage("fetch", scraper.fetch_page, workers=fetch_workers, queue_size=queue_size))
+        stages.append(Stage("parse", scraper.process_page, queue_size=queue_size))
+    stages.append(Stage("estimate", estimate, workers=estimate_workers, queue_size=queue_size))
+    stages.append(Stage("write", write, queue_size=queue_size, batch_size=batch_size))
+    
+    return Pipeline(stages, checkpoint=checkpoint, progress_every=10)
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.scrape_job import ScrapeJob
+
+class ScrapeJobQueue:
+    """
+    Durable scrape job queue stored in the scrape_jobs table.
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    processes or hosts can pull from the same queue without handing out a job twice.
+    """
+
+    def __init__(self, lease_seconds: Optional[int] = None, max_attempts: Optional[int] = None):
+        self.lease = timedelta(seconds=lease_seconds or settings.JOB_LEASE_SECONDS)
+        self.max_attempts = max_attempts or settings.MAX_RETRIES
+
+    def enqueue(self, db: Session, run_id: str, marketplace_id: int, urls: Iterable[str]) -> int:
+        """Add URLs to a run, skipping ones the run already has. Returns the number added"""
+        existing = {
+            url for (url,) in db.query(ScrapeJob.url).filter(ScrapeJob.run_id == run_id)
+        }
+
+        added = 0
+        for url in urls:
+            if url in existing:
+                continue
+            existing.add(url)
+            db.add(ScrapeJob(run_id=run_id, url=url, marketplace_id=marketplace_id,
+                             state="pending", attempts=0))
+            added += 1
+
+        db.commit()
+        return added
+
+    def claim(self, db: Session, worker_id: str, limit: int = 1,
+              run_id: Optional[str] = None, now: Optional[datetime] = None) -> List[ScrapeJob]:
+        """
+        Lease up to `limit` jobs to a worker.
+        Pending jobs (unless deferred into the future) and running jobs whose lease
+        expired (crashed workers) are eligible.
+        """
+        now = now or datetime.utcnow()
+
+        query = db.query(ScrapeJob).filter(
+            or_(and_(ScrapeJob.state == "pending",
+                     or_(ScrapeJob.lease_expires_at.is_(None), ScrapeJob.lease_expires_at <= now)),
+                and_(ScrapeJob.state == "running", ScrapeJob.lease_expires_at < now))
+        )
+        if run_id:
+            query = query.filter(ScrapeJob.run_id == run_id)
+
+        jobs = query.order_by(ScrapeJob.id).limit(limit).with_for_update(skip_locked=True).all()
+
+        claimed = []
+        for job in jobs:
+            if job.attempts >= self.max_attempts:
+                # Lease expired on the last attempt: give up on it
+                job.state = "failed"
+                job.lease_owner = None
+                job.finished_at = now
+                job.last_error = job.last_error or "Lease expired on final attempt"
+                continue
+            job.state = "running"
+            job.attempts += 1
+            job.lease_owner = worker_id
+            job.lease_expires_at = now + self.lease
+            claimed.append(job)
+
+        db.commit()
+        return claimed
+
+    def renew_lease(self, db: Session, job_id: int, worker_id: str,
+                    now: Optional[datetime] = None) -> bool:
+        """Extend a running job's lease. Returns False if the worker no longer holds it"""
+        now = now or datetime.utcnow()
+        updated = db.query(ScrapeJob).filter(
+            ScrapeJob.id == job_id,
+            ScrapeJob.state == "running",
+            ScrapeJob.lease_owner == worker_id
+        ).update({ScrapeJob.lease_expires_at: now + self.lease}, synchronize_session=False)
+        db.commit()
+        return updated == 1
+
+    def _finish_lease(self, db: Session, job: ScrapeJob, worker_id: str, values: dict,
+                      now: Optional[datetime] = None) -> bool:
+        """
+        Apply `values` to a job only while `worker_id` still holds an unexpired lease on it.
+        Returns False (and changes nothing) if the lease was lost, e.g. reclaimed after expiring.
+        """
+        now = now or datetime.utcnow()
+        updated = db.query(ScrapeJob).filter(
+            ScrapeJob.id == job.id,
+            ScrapeJob.state == "running",
+            ScrapeJob.lease_owner == worker_id,
+            ScrapeJob.lease_expires_at >= now
+        ).update(values, synchronize_session=False)
+        db.commit()
+        return updated == 1
+
+    def complete(self, db: Session, job: ScrapeJob, worker_id: str,
+                 now: Optional[datetime] = None) -> bool:
+        """Mark a job as done. Returns False if the worker no longer holds it"""
+        now = now or datetime.utcnow()
+        return self._finish_lease(db, job, worker_id, {
+            ScrapeJob.state: "done",
+            ScrapeJob.lease_owner: None,
+            ScrapeJob.lease_expires_at: None,
+            ScrapeJob.last_error: None,
+            ScrapeJob.finished_at: now
+        }, now)
+
+    def fail(self, db: Session, job: ScrapeJob, worker_id: str, error: str,
+             now: Optional[datetime] = None) -> bool:
+        """
+        Record a failure; the job is retried until it runs out of attempts.
+        Returns False if the worker no longer holds it
+        """
+        now = now or datetime.utcnow()
+        values = {
+            ScrapeJob.last_error: error,
+            ScrapeJob.lease_owner: None,
+            ScrapeJob.lease_expires_at: None
+        }
+        if job.attempts >= self.max_attempts:
+            values[ScrapeJob.state] = "failed"
+            values[ScrapeJob.finished_at] = now
+        else:
+            values[ScrapeJob.state] = "pending"
+        return self._finish_lease(db, job, worker_id, values, now)
+
+    def defer(self, db: Session, job: ScrapeJob, worker_id: str, until: datetime,
+              now: Optional[datetime] = None) -> bool:
+        """
+        Hand a job back without counting the attempt, e.g. while its marketplace
+        is paused by the circuit breaker. It becomes claimable again at `until`.
+        Returns False if the worker no longer holds it
+        """
+        return self._finish_lease(db, job, worker_id, {
+            ScrapeJob.state: "pending",
+            # A running job was counted when it was claimed, so this never goes below zero
+            ScrapeJob.attempts: ScrapeJob.attempts - 1,
+            ScrapeJob.lease_owner: None,
+            ScrapeJob.lease_expires_at: until
+        }, now)
+
+    def resume(self, db: Session, run_id: str, retry_failed: bool = True,
+               now: Optional[datetime] = None) -> int:
+        """
+        Put a run's stuck jobs back in the queue: running jobs with an expired lease
+        and, optionally, failed jobs (with a fresh attempt count). Returns the number requeued.
+        """
+        now = now or datetime.utcnow()
+        conditions = [and_(ScrapeJob.state == "running", ScrapeJob.lease_expires_at < now)]
+        if retry_failed:
+            conditions.append(ScrapeJob.state == "failed")
+
+        requeued = db.query(ScrapeJob).filter(
+            ScrapeJob.run_id == run_id,
+            or_(*conditions)
+        ).update({
+            ScrapeJob.state: "pending",
+            ScrapeJob.attempts: 0,
+            ScrapeJob.lease_owner: None,
+            ScrapeJob.lease_expires_at: None,
+            ScrapeJob.finished_at: None
+        }, synchronize_session=False)
+        db.commit()
+        return requeued
+
+    def stats(self, db: Session, run_id: Optional[str] = None) -> Dict[str, int]:
+        """Count jobs per state"""
+        query = db.query(ScrapeJob.state, func.count(ScrapeJob.id))
+        if run_id:
+            query = query.filter(ScrapeJob.run_id == run_id)
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        for state, count in query.group_by(ScrapeJob.state):
+            counts[state] = count
+        return counts
@@ -1,40 +1,122 @@
+import json
 import random
-from typing import List
+import hashlib
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.config import settings
 from app.schemas.product import MrrEstimate, PricePlan, MarketplaceListing
+from app.services.mrr_simulation import MonteCarloMrrModel
 
 class MrrEstimator:
-    def __init__(self):
-        pass
+    # Bump whenever the model changes; stored estimates from older versions get recomputed
+    VERSION = "1"
     
-    def estimate_mrr(self, product: dict, marketplaces: List[MarketplaceListing], traffic: dict) -> MrrEstimate:
-        """
-        Estimate MRR for a product based on pricing, traffic, and market data.
-        This is a simple rule-based model for the MVP.
-        """
-        # Get the highest price plan as a baseline
+    # (visits above which the rate applies, conversion rate), highest tier first:
+    # more traffic = lower conversion
+    CONVERSION_TIERS = [
+        (100000, 0.005),  # 0.5% for high traffic sites
+        (10000, 0.01),    # 1% for medium traffic sites
+        (1000, 0.02),     # 2% for low traffic sites
+    ]
+    DEFAULT_CONVERSION_RATE = 0.03  # 3% for very low traffic sites
+    LOW_FACTOR = 0.5
+    HIGH_FACTOR = 1.5
+    FULL_CONFIDENCE_VISITS = 100000.0
+    METHODOLOGY = "Rule-based estimation using traffic data and pricing information"
+    MONTE_CARLO_METHODOLOGY = "Monte Carlo simulation of conversion rate, traffic and plan mix uncertainty"
+    MODES = ("rule", "monte_carlo")
+    
+    def __init__(self, mode: Optional[str] = None, simulation: Optional[MonteCarloMrrModel] = None):
+        self.mode = mode or settings.MRR_ESTIMATION_MODE
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown MRR estimation mode: {self.mode}. Available: {', '.join(self.MODES)}")
+        self.simulation = simulation or (MonteCarloMrrModel() if self.mode == "monte_carlo" else None)
+    
+    @property
+    def methodology(self) -> str:
+        return self.MONTE_CARLO_METHODOLOGY if self.mode == "monte_carlo" else self.METHODOLOGY
+    
+    @staticmethod
+    def plan_inputs(marketplaces: List[MarketplaceListing]):
+        """Plan prices and popular flags across all listings"""
+        plans = [plan for marketplace in marketplaces for plan in marketplace.price_plans]
+        return [plan.price for plan in plans], [plan.is_popular for plan in plans]
+    
+    @staticmethod
+    def highest_price(marketplaces: List[MarketplaceListing]) -> float:
+        """Highest plan price across all listings (0.0 without plans)"""
         highest_price = 0.0
         for marketplace in marketplaces:
             for plan in marketplace.price_plans:
                 if plan.price > highest_price:
                     highest_price = plan.price
-        
+        return highest_price
+    
+    def input_fingerprint(self, marketplaces: List[MarketplaceListing], traffic: Optional[dict]) -> str:
+        """Hash of everything estimate_mrr depends on, including the estimator version"""
+        plans = sorted(
+            json.dumps(plan.model_dump(), sort_keys=True)
+            for marketplace in marketplaces for plan in marketplace.price_plans
+        )
+        traffic = traffic or {}
+        inputs = {
+            "version": self.VERSION,
+            "price_plans": plans,
+            "visits_month": traffic.get('visits_month'),
+            "visits_growth": traffic.get('visits_growth')
+        }
+        if self.mode == "monte_carlo":
+            inputs["monte_carlo"] = self.simulation.config()
+        payload = json.dumps(inputs, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def conversion_rate(self, visits_month: int) -> float:
+        for min_visits, rate in self.CONVERSION_TIERS:
+            if visits_month > min_visits:
+                return rate
+        return self.DEFAULT_CONVERSION_RATE
+    
+    @staticmethod
+    def build_assumptions(conversion_rate: float, visits_month: int, estimated_customers: int,
+                          highest_price: float) -> List[str]:
+        """Assumptions used in the model"""
+        return [
+            f"Conversion rate estimated at {conversion_rate*100:.2f}% based on {visits_month} monthly visits",
+            f"Estimated {estimated_customers} customers based on traffic and conversion rate",
+            f"Highest price plan of ${highest_price} used as baseline",
+            "Assumes SaaS business model with monthly recurring revenue",
+            "Does not account for churn, expansion revenue, or enterprise deals"
+        ]
+    
+    def estimate_mrr(self, product: dict, marketplaces: List[MarketplaceListing], traffic: dict) -> MrrEstimate:
+        """
+        Estimate MRR for a product based on pricing, traffic, and market data.
+        This is a simple rule-based model for the MVP; in monte_carlo mode the
+        bands come from MonteCarloMrrModel instead.
+        """
         # Get traffic data
         visits_month = traffic.get('visits_month', 0) if traffic else 0
         
+        if self.mode == "monte_carlo":
+            prices, popular = self.plan_inputs(marketplaces)
+            result = self.estimate_mrr_monte_carlo_batch([prices], [visits_month], [popular])
+            return MrrEstimate(
+                mrr_low=float(result["mrr_low"][0]),
+                mrr_likely=float(result["mrr_likely"][0]),
+                mrr_high=float(result["mrr_high"][0]),
+                confidence=float(result["confidence"][0]),
+                assumptions=self.simulation.assumptions(float(result["conversion_rate"][0]), visits_month),
+                methodology=self.methodology
+            )
+        
+        # Get the highest price plan as a baseline
+        highest_price = self.highest_price(marketplaces)
+        
         # Simple estimation model:
         # 1. Estimate conversion rate based on traffic (more traffic = lower conversion)
         # 2. Estimate customers based on conversion rate and traffic
         # 3. Calculate MRR based on price and customers
-        
-        # Conversion rate estimation (simplistic model)
-        if visits_month > 100000:
-            conversion_rate = 0.005  # 0.5% for high traffic sites
-        elif visits_month > 10000:
-            conversion_rate = 0.01   # 1% for medium traffic sites
-        elif visits_month > 1000:
-            conversion_rate = 0.02   # 2% for low traffic sites
-        else:
-            conversion_rate = 0.03   # 3% for very low traffic sites
+        conversion_rate = self.conversion_rate(visits_month)
         
         # Estimate number of customers
         estimated_customers = max(1, int(visits_month * conversion_rate))
@@ -43,28 +125,78 @@ class MrrEstimator:
         mrr_likely = highest_price * estimated_customers
         
         # Low scenario: 50% of likely
-        mrr_low = mrr_likely * 0.5
+        mrr_low = mrr_likely * self.LOW_FACTOR
         
         # High scenario: 150% of likely
-        mrr_high = mrr_likely * 1.5
+        mrr_high = mrr_likely * self.HIGH_FACTOR
         
         # Confidence based on traffic volume (more traffic = higher confidence)
-        confidence = min(1.0, visits_month / 100000.0)
-        
-        # Assumptions used in the model
-        assumptions = [
-            f"Conversion rate estimated at {conversion_rate*100:.2f}% based on {visits_month} monthly visits",
-            f"Estimated {estimated_customers} customers based on traffic and conversion rate",
-            f"Highest price plan of ${highest_price} used as baseline",
-            "Assumes SaaS business model with monthly recurring revenue",
-            "Does not account for churn, expansion revenue, or enterprise deals"
-        ]
+        confidence = min(1.0, visits_month / self.FULL_CONFIDENCE_VISITS)
         
         return MrrEstimate(
             mrr_low=round(mrr_low, 2),
             mrr_likely=round(mrr_likely, 2),
             mrr_high=round(mrr_high, 2),
             confidence=round(confidence, 2),
-            assumptions=assumptions,
-            methodology="Rule-based estimation using traffic data and pricing information"
-        )
\ No newline at end of file
+            assumptions=self.build_assumptions(conversion_rate, visits_month, estimated_customers, highest_price),
+            methodology=self.METHODOLOGY
+        )
+    
+    def estimate_mrr_batch(self, highest_price, visits_month) -> Dict[str, np.ndarray]:
+        """
+        Vectorized `estimate_mrr` over columnar inputs (one element per product).
+        Returns arrays for mrr_low, mrr_likely, mrr_high and confidence, identical to
+        the per-product results, plus conversion_rate and estimated_customers so
+        callers can build assumptions only for the rows they keep.
+        """
+        highest_price = np.asarray(highest_price, dtype=np.float64)
+        visits_month = np.asarray(visits_month, dtype=np.int64)
+        
+        conversion_rate = self.conversion_rates(visits_month)
+        
+        estimated_customers = np.maximum(1, np.trunc(visits_month * conversion_rate)).astype(np.int64)
+        mrr_likely = highest_price * estimated_customers
+        confidence = np.minimum(1.0, visits_month / self.FULL_CONFIDENCE_VISITS)
+        
+        return {
+            "mrr_low": round_half_even(mrr_likely * self.LOW_FACTOR),
+            "mrr_likely": round_half_even(mrr_likely),
+            "mrr_high": round_half_even(mrr_likely * self.HIGH_FACTOR),
+            "confidence": round_half_even(confidence),
+            "conversion_rate": conversion_rate,
+            "estimated_customers": estimated_customers
+        }
+
+    def conversion_rates(self, visits_month: np.ndarray) -> np.ndarray:
+        """Vectorized conversion_rate"""
+        conversion_rate = np.full(visits_month.shape, self.DEFAULT_CONVERSION_RATE)
+        # Apply tiers lowest first so higher tiers overwrite them
+        for min_visits, rate in reversed(self.CONVERSION_TIERS):
+            conversion_rate[visits_month > min_visits] = rate
+        return conversion_rate
+    
+    def estimate_mrr_monte_carlo_batch(self, plan_prices, visits_month, popular_plans=None) -> Dict[str, np.ndarray]:
+        """
+        Probabilistic bands for many products at once: `plan_prices` holds each
+        product's plan prices (ragged), `popular_plans` the matching is_popular flags.
+        """
+        simulation = self.simulation or MonteCarloMrrModel()
+        visits_month = np.asarray(visits_month, dtype=np.int64)
+        conversion_rate = self.conversion_rates(visits_month)
+        result = simulation.simulate(plan_prices, visits_month, conversion_rate, popular_plans)
+        result["conversion_rate"] = conversion_rate
+        return result
+
+def round_half_even(values: np.ndarray, decimals: int = 2) -> np.ndarray:
+    """
+    np.round that agrees with Python's round() on every element.
+    np.round scales by 10**decimals first, which can push a value that is just
+    below or above a half across it; Python rounds the exact binary value.
+    Those near-ties are rare, so they are recomputed with round().
+    """
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in np.flatnonzero(near_tie):
+        rounded.flat[index] = round(float(values.flat[index]), decimals)
+    return rounded
@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.core.config import settings
+
+def _lognormal(rng: np.random.Generator, spread: float, size: int) -> np.ndarray:
+    # Mean-preserving: E[exp(sigma * z - sigma^2 / 2)] = 1
+    return np.exp(spread * rng.standard_normal(size) - spread ** 2 / 2)
+
+def _uniform(rng: np.random.Generator, spread: float, size: int) -> np.ndarray:
+    spread = min(spread, 0.99)
+    return rng.uniform(1 - spread, 1 + spread, size)
+
+def _triangular(rng: np.random.Generator, spread: float, size: int) -> np.ndarray:
+    spread = min(spread, 0.99)
+    return rng.triangular(1 - spread, 1, 1 + spread, size)
+
+# Multiplicative noise around 1.0, by name
+DISTRIBUTIONS = {
+    "lognormal": _lognormal,
+    "uniform": _uniform,
+    "triangular": _triangular,
+}
+
+class MonteCarloMrrModel:
+    """
+    Samples conversion rate, traffic and plan mix uncertainty to turn a point
+    MRR estimate into percentile bands.
+
+    All products in a batch share the same random draws (common random numbers),
+    so a product's bands depend only on its inputs and the seed, never on which
+    other products were in the batch. That also keeps the work to a few
+    (samples x products) matrix products.
+    """
+
+    def __init__(self, samples: Optional[int] = None, seed: Optional[int] = None,
+                 conversion_distribution: Optional[str] = None, conversion_spread: Optional[float] = None,
+                 traffic_distribution: Optional[str] = None, traffic_spread: Optional[float] = None,
+                 plan_mix_alpha: Optional[float] = None, popular_plan_weight: Optional[float] = None,
+                 percentiles: Optional[Sequence[float]] = None, max_plans: int = 8):
+        self.samples = samples or settings.MRR_MC_SAMPLES
+        self.seed = settings.MRR_MC_SEED if seed is None else seed
+        self.conversion_distribution = conversion_distribution or settings.MRR_MC_CONVERSION_DISTRIBUTION
+        self.conversion_spread = settings.MRR_MC_CONVERSION_SPREAD if conversion_spread is None else conversion_spread
+        self.traffic_distribution = traffic_distribution or settings.MRR_MC_TRAFFIC_DISTRIBUTION
+        self.traffic_spread = settings.MRR_MC_TRAFFIC_SPREAD if traffic_spread is None else traffic_spread
+        self.plan_mix_alpha = plan_mix_alpha or settings.MRR_MC_PLAN_MIX_ALPHA
+        self.popular_plan_weight = popular_plan_weight or settings.MRR_MC_POPULAR_PLAN_WEIGHT
+        self.percentiles = list(percentiles or settings.MRR_MC_PERCENTILES)
+        self.max_plans = max_plans
+        for name in (self.conversion_distribution, self.traffic_distribution):
+            if name not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown distribution: {name}. Available: {', '.join(DISTRIBUTIONS)}")
+        self._draws = None
+
+    def __getstate__(self):
+        # Don't ship the cached draws to worker processes; they are cheap to regenerate
+        state = self.__dict__.copy()
+        state["_draws"] = None
+        return state
+
+    def config(self) -> dict:
+        """Parameters that change the output; part of the estimate fingerprint"""
+        return {
+            "samples": self.samples,
+            "seed": self.seed,
+            "conversion": [self.conversion_distribution, self.conversion_spread],
+            "traffic": [self.traffic_distribution, self.traffic_spread],
+            "plan_mix_alpha": self.plan_mix_alpha,
+            "popular_plan_weight": self.popular_plan_weight,
+            "percentiles": self.percentiles,
+        }
+
+    def _random_draws(self):
+        # Drawn once per model and reused for every batch
+        if self._draws is None:
+            rng = np.random.default_rng(self.seed)
+            conversion = DISTRIBUTIONS[self.conversion_distribution](rng, self.conversion_spread, self.samples)
+            traffic = DISTRIBUTIONS[self.traffic_distribution](rng, self.traffic_spread, self.samples)
+            # Independent gammas normalized over a product's plans form a Dirichlet plan mix
+            plan_mix = rng.gamma(self.plan_mix_alpha, size=(self.samples, self.max_plans))
+            self._draws = (conversion * traffic, plan_mix)
+        return self._draws
+
+    def plan_matrix(self, plan_prices: Sequence[Sequence[float]],
+                    popular_plans: Optional[Sequence[Sequence[bool]]] = None):
+        """
+        Pad per-product paid plan prices into (products x max_plans) price and weight
+        matrices. Free plans are dropped (they don't pay); plans beyond max_plans
+        keep the most expensive ones.
+        """
+        prices = np.zeros((len(plan_prices), self.max_plans))
+        weights = np.zeros((len(plan_prices), self.max_plans))
+        for i, product_prices in enumerate(plan_prices):
+            popular = popular_plans[i] if popular_plans is not None else [False] * len(product_prices)
+            paid = sorted(
+                ((price, is_popular) for price, is_popular in zip(product_prices, popular) if price > 0),
+                reverse=True
+            )[:self.max_plans]
+            for k, (price, is_popular) in enumerate(paid):
+                prices[i, k] = price
+                weights[i, k] = self.popular_plan_weight if is_popular else 1.0
+        return prices, weights
+
+    def simulate(self, plan_prices: Sequence[Sequence[float]], visits_month, conversion_rate,
+                 popular_plans: Optional[Sequence[Sequence[bool]]] = None,
+                 chunk_size: int = 256) -> Dict[str, np.ndarray]:
+        """
+        Percentile MRR bands and a spread-based confidence for each product.
+        `conversion_rate` is the point estimate the sampled rates are centered on.
+        """
+        noise, plan_mix = self._random_draws()
+        prices, weights = self.plan_matrix(plan_prices, popular_plans)
+        visits_month = np.asarray(visits_month, dtype=np.float64)
+        conversion_rate = np.asarray(conversion_rate, dtype=np.float64)
+
+        bands = np.empty((len(self.percentiles), len(visits_month)))
+        # Chunk products so the (samples x products) matrices stay small
+        for start in range(0, len(visits_month), chunk_size):
+            end = start + chunk_size
+            revenue = plan_mix @ (weights[start:end] * prices[start:end]).T
+            shares = plan_mix @ weights[start:end].T
+            # Average revenue per customer under each sampled plan mix
+            arpu = np.divide(revenue, shares, out=np.zeros_like(revenue), where=shares > 0)
+            customers = np.maximum(1.0, noise[:, None] * (visits_month[start:end] * conversion_rate[start:end]))
+            bands[:, start:end] = np.percentile(customers * arpu, self.percentiles, axis=0)
+
+        low, likely, high = bands[0], bands[len(self.percentiles) // 2], bands[-1]
+        # Narrow bands relative to their level mean a confident estimate
+        spread = np.divide(high - low, high + low, out=np.ones_like(high), where=(high + low) > 0)
+        return {
+            "mrr_low": np.round(low, 2),
+            "mrr_likely": np.round(likely, 2),
+            "mrr_high": np.round(high, 2),
+            "confidence": np.round(np.clip(1.0 - spread, 0.0, 1.0), 2),
+        }
+
+    def assumptions(self, conversion_rate: float, visits_month: int) -> List[str]:
+        return [
+            f"Conversion rate centered on {conversion_rate*100:.2f}% ({self.conversion_distribution}, "
+            f"spread {self.conversion_spread}) based on {visits_month} monthly visits",
+            f"Traffic uncertainty modeled as {self.traffic_distribution} with spread {self.traffic_spread}",
+            f"Paid plan mix drawn from a Dirichlet(alpha={self.plan_mix_alpha}) with popular plans "
+            f"weighted {self.popular_plan_weight}x",
+            f"Bands are the P{self.percentiles[0]:g}/P{self.percentiles[len(self.percentiles) // 2]:g}/"
+            f"P{self.percentiles[-1]:g} of {self.samples} samples (seed {self.seed})",
+            "Does not account for churn, expansion revenue, or enterprise deals"
+        ]
@@ -0,0 +1,335 @@
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import func, select
+from sqlalchemy.orm import Query, Session
+from app.core.config import settings
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+def _json(value) -> Optional[str]:
+    return None if value is None else json.dumps(value)
+
+@dataclass
+class ExportTable:
+    """
+    A catalog table written to Parquet. Incremental exports hold the rows whose
+    `watermark_column` moved past the last export, so readers keep the newest
+    row per `key` across snapshot partitions; keys that disappear (e.g. merged
+    duplicates) are written to the deletions dataset.
+    """
+    name: str
+    key: str
+    key_column: Any
+    watermark_column: Any
+    id_column: Any
+    schema: pa.Schema
+    query: Callable[[Session], Query]
+    row: Callable[[Any], Dict[str, Any]]
+
+def _products(db: Session) -> Query:
+    return db.query(Product)
+
+def _product_row(product: Product) -> Dict[str, Any]:
+    return {
+        "id": product.id, "name": product.name, "canonical_url": product.canonical_url,
+        "description": product.description, "logo_url": product.logo_url,
+        "categories": product.categories or [], "tags": product.tags or [],
+        "created_at": product.created_at, "updated_at": product.updated_at
+    }
+
+def _listings(db: Session) -> Query:
+    return db.query(ProductMarketplace, Marketplace.name).outerjoin(
+        Marketplace, ProductMarketplace.marketplace_id == Marketplace.id
+    )
+
+def _listing_row(result) -> Dict[str, Any]:
+    listing, marketplace_name = result
+    return {
+        "id": listing.id, "product_id": listing.product_id, "marketplace": marketplace_name,
+        "listing_url": listing.listing_url, "upvotes": listing.upvotes,
+        "reviews_count": listing.reviews_count, "rating": listing.rating,
+        "price_plans": _json(listing.price_plans),
+        "is_blocked": listing.is_blocked, "is_unstable": listing.is_unstable,
+        "last_scraped_at": listing.last_scraped_at, "last_changed_at": listing.last_changed_at,
+        "created_at": listing.created_at, "updated_at": listing.updated_at
+    }
+
+def _latest(model) -> Callable[[Session], Query]:
+    """Only each product's latest row: the catalog's current state, not the history"""
+    def query(db: Session) -> Query:
+        latest_ids = select(func.max(model.id)).group_by(model.product_id)
+        return db.query(model).filter(model.id.in_(latest_ids))
+    return query
+
+def _estimate_row(estimate: MrrEstimate) -> Dict[str, Any]:
+    return {
+        "id": estimate.id, "product_id": estimate.product_id,
+        "mrr_low": estimate.mrr_low, "mrr_likely": estimate.mrr_likely, "mrr_high": estimate.mrr_high,
+        "confidence": estimate.confidence, "methodology": estimate.methodology,
+        "assumptions": _json(estimate.assumptions), "estimator_version": estimate.estimator_version,
+        "created_at": estimate.created_at
+    }
+
+def _traffic_row(traffic: TrafficData) -> Dict[str, Any]:
+    return {
+        "id": traffic.id, "product_id": traffic.product_id,
+        "visits_month": traffic.visits_month, "visits_growth": traffic.visits_growth,
+        "bounce_rate": traffic.bounce_rate, "avg_time_on_site": traffic.avg_time_on_site,
+        "traffic_sources": traffic.traffic_sources, "created_at": traffic.created_at
+    }
+
+TIMESTAMP = pa.timestamp("us")
+
+EXPORT_TABLES = [
+    ExportTable(
+        name="products", key="id", key_column=Product.id,
+        watermark_column=Product.updated_at, id_column=Product.id,
+        schema=pa.schema([
+            ("id", pa.int64()), ("name", pa.string()), ("canonical_url", pa.string()),
+            ("description", pa.string()), ("logo_url", pa.string()),
+            ("categories", pa.list_(pa.string())), ("tags", pa.list_(pa.string())),
+            ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP)
+        ]),
+        query=_products, row=_product_row
+    ),
+    ExportTable(
+        name="listings", key="id", key_column=ProductMarketplace.id,
+        watermark_column=ProductMarketplace.updated_at, id_column=ProductMarketplace.id,
+        schema=pa.schema([
+            ("id", pa.int64()), ("product_id", pa.int64()), ("marketplace", pa.string()),
+            ("listing_url", pa.string()), ("upvotes", pa.int64()), ("reviews_count", pa.int64()),
+            ("rating", pa.int64()), ("price_plans", pa.string()),  # JSON, as scraped
+            ("is_blocked", pa.bool_()), ("is_unstable", pa.bool_()),
+            ("last_scraped_at", TIMESTAMP), ("last_changed_at", TIMESTAMP),
+            ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP)
+        ]),
+        query=_listings, row=_listing_row
+    ),
+    ExportTable(
+        name="estimates", key="product_id", key_column=MrrEstimate.product_id,
+        watermark_column=MrrEstimate.created_at, id_column=MrrEstimate.id,
+        schema=pa.schema([
+            ("id", pa.int64()), ("product_id", pa.int64()),
+            ("mrr_low", pa.float64()), ("mrr_likely", pa.float64()), ("mrr_high", pa.float64()),
+            ("confidence", pa.float64()), ("methodology", pa.string()),
+            ("assumptions", pa.string()),  # JSON
+            ("estimator_version", pa.string()), ("created_at", TIMESTAMP)
+        ]),
+        query=_latest(MrrEstimate), row=_estimate_row
+    ),
+    ExportTable(
+        name="traffic", key="product_id", key_column=TrafficData.product_id,
+        watermark_column=TrafficData.created_at, id_column=TrafficData.id,
+        schema=pa.schema([
+            ("id", pa.int64()), ("product_id", pa.int64()),
+            ("visits_month", pa.int64()), ("visits_growth", pa.float64()),
+            ("bounce_rate", pa.float64()), ("avg_time_on_site", pa.float64()),
+            ("traffic_sources", pa.string()), ("created_at", TIMESTAMP)
+        ]),
+        query=_latest(TrafficData), row=_traffic_row
+    ),
+]
+
+# Keys removed from the catalog since they were exported: (table, key, deleted_at)
+DELETIONS = "deletions"
+DELETIONS_SCHEMA = pa.schema([("table", pa.string()), ("key", pa.int64()), ("deleted_at", TIMESTAMP)])
+
+@dataclass
+class ExportStats:
+    mode: str
+    snapshot_date: str
+    rows: Dict[str, int] = field(default_factory=dict)
+    files: List[str] = field(default_factory=list)
+
+def load_manifest(export_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(export_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_manifest(export_dir: str, manifest: Dict[str, Any]):
+    path = os.path.join(export_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _exported_recently(state: Optional[Dict[str, Any]]) -> set:
+    """(id, watermark value) of the rows already exported inside the lag window"""
+    if not state:
+        return set()
+    if "recent" in state:
+        return {(row_id, datetime.fromisoformat(value)) for row_id, value in state["recent"]}
+    # Manifests written before the lag window only remember the rows tying the watermark
+    watermark = datetime.fromisoformat(state["watermark"]) if state.get("watermark") else None
+    return {(row_id, watermark) for row_id in state.get("watermark_ids") or []} if watermark else set()
+
+def _changed_since(table: ExportTable, query: Query, state: Dict[str, Any]) -> Query:
+    """
+    Rows at or past the stored watermark less PARQUET_EXPORT_WATERMARK_LAG_SECONDS.
+    PostgreSQL stamps rows with now(), the transaction's start, so a row can commit
+    after an export with a timestamp below its watermark; re-reading the lag window
+    picks it up, and export_table skips the rows in it that were already exported.
+    """
+    watermark = datetime.fromisoformat(state["watermark"])
+    return query.filter(table.watermark_column >= watermark - _watermark_lag())
+
+def _watermark_lag() -> timedelta:
+    return timedelta(seconds=settings.PARQUET_EXPORT_WATERMARK_LAG_SECONDS)
+
+def export_table(db: Session, table: ExportTable, export_dir: str, snapshot_date: str, run_stamp: str,
+                 state: Optional[Dict[str, Any]], batch_size: int) -> Dict[str, Any]:
+    """Write one table's full or incremental snapshot; returns the table's new manifest state"""
+    query = table.query(db)
+    if state and state.get("watermark"):
+        query = _changed_since(table, query, state)
+    query = query.order_by(table.id_column)
+
+    partition_dir = os.path.join(export_dir, table.name, f"snapshot_date={snapshot_date}")
+    relative_path = os.path.join(table.name, f"snapshot_date={snapshot_date}", f"part-{run_stamp}.parquet")
+    path = os.path.join(export_dir, relative_path)
+    tmp_path = f"{path}.tmp"
+
+    watermark = datetime.fromisoformat(state["watermark"]) if state and state.get("watermark") else None
+    exported = _exported_recently(state)
+    writer = None
+    rows_written = 0
+    batch = []
+
+    def flush():
+        nonlocal writer
+        if writer is None:
+            os.makedirs(partition_dir, exist_ok=True)
+            writer = pq.ParquetWriter(tmp_path, table.schema, compression="zstd")
+        writer.write_table(pa.Table.from_pylist(batch, schema=table.schema))
+        batch.clear()
+
+    try:
+        for result in query.yield_per(batch_size):
+            row = table.row(result)
+            value = row[table.watermark_column.key]
+            if (row["id"], value) in exported:
+                continue
+            batch.append(row)
+            rows_written += 1
+            if value is not None:
+                if watermark is None or value > watermark:
+                    watermark = value
+                if value >= watermark - _watermark_lag():
+                    exported.add((row["id"], value))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+    if rows_written:
+        os.replace(tmp_path, path)
+
+    files = list(state.get("files", [])) if state else []
+    if rows_written:
+        files.append({"path": relative_path, "rows": rows_written, "snapshot_date": snapshot_date})
+    return {
+        "key": table.key,
+        "watermark_column": table.watermark_column.key,
+        "watermark": watermark.isoformat() if watermark else None,
+        "recent": [[row_id, value.isoformat()] for row_id, value in sorted(exported)
+                   if value >= watermark - _watermark_lag()] if watermark else [],
+        "files": files
+    }
+
+def _file_keys(export_dir: str, files: List[Dict[str, Any]], column: str, filters=None) -> set:
+    keys = set()
+    for entry in files:
+        keys.update(pq.read_table(os.path.join(export_dir, entry["path"]), columns=[column],
+                                  filters=filters).column(column).to_pylist())
+    return keys
+
+def export_deletions(db: Session, export_dir: str, snapshot_date: str, run_stamp: str, now: datetime,
+                     tables_state: Dict[str, Any], state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Write a tombstone for every exported key that is no longer in the database,
+    e.g. products and listings deleted by entity resolution merges. Keys are
+    read back from the exported files, so only keys (never rows) are compared.
+    """
+    files = list(state.get("files", [])) if state else []
+    tombstones = []
+    for table in EXPORT_TABLES:
+        table_files = tables_state.get(table.name, {}).get("files", [])
+        if not table_files:
+            continue
+        exported = _file_keys(export_dir, table_files, table.key)
+        exported -= _file_keys(export_dir, files, "key", filters=[("table", "=", table.name)])
+        current = {key for (key,) in db.query(table.key_column).distinct()}
+        tombstones += [
+            {"table": table.name, "key": key, "deleted_at": now} for key in sorted(exported - current)
+        ]
+
+    if tombstones:
+        relative_path = os.path.join(DELETIONS, f"snapshot_date={snapshot_date}", f"part-{run_stamp}.parquet")
+        path = os.path.join(export_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(pa.Table.from_pylist(tombstones, schema=DELETIONS_SCHEMA), f"{path}.tmp", compression="zstd")
+        os.replace(f"{path}.tmp", path)
+        files.append({"path": relative_path, "rows": len(tombstones), "snapshot_date": snapshot_date})
+    return {"files": files}
+
+def export_catalog(db: Session, export_dir: Optional[str] = None, full: bool = False,
+                   batch_size: int = 10000, now: Optional[datetime] = None) -> ExportStats:
+    """
+    Export products, listings and each product's latest estimate and traffic to
+    {export_dir}/{table}/snapshot_date=YYYY-MM-DD/part-*.parquet. The first run
+    (or `full`) writes everything; later runs only rows changed since the
+    watermarks in manifest.json, which also lists every file written.
+    Incremental runs also write tombstones for keys deleted since they were
+    exported to {export_dir}/deletions/.
+    """
+    export_dir = export_dir or settings.PARQUET_EXPORT_DIR
+    now = now or datetime.utcnow()
+    snapshot_date = now.strftime("%Y-%m-%d")
+    run_stamp = now.strftime("%Y%m%dT%H%M%S")
+
+    manifest = None if full else load_manifest(export_dir)
+    stats = ExportStats(mode="incremental" if manifest else "full", snapshot_date=snapshot_date)
+    tables_state = manifest["tables"] if manifest else {}
+
+    os.makedirs(export_dir, exist_ok=True)
+    new_state = {}
+    for table in EXPORT_TABLES:
+        state = export_table(db, table, export_dir, snapshot_date, run_stamp,
+                             tables_state.get(table.name), batch_size)
+        new_state[table.name] = state
+        previous_files = len(tables_state.get(table.name, {}).get("files", []))
+        written = state["files"][previous_files:]
+        stats.rows[table.name] = sum(entry["rows"] for entry in written)
+        stats.files.extend(entry["path"] for entry in written)
+
+    # A full export starts over from the current rows, so there is nothing to tombstone
+    deletions_state = manifest.get(DELETIONS) if manifest else None
+    if manifest:
+        deletions_state = export_deletions(db, export_dir, snapshot_date, run_stamp, now, new_state, deletions_state)
+        written = deletions_state["files"][len((manifest.get(DELETIONS) or {}).get("files", [])):]
+        stats.rows[DELETIONS] = sum(entry["rows"] for entry in written)
+        stats.files.extend(entry["path"] for entry in written)
+
+    # Written last, so an interrupted export is simply redone by the next run
+    _write_manifest(export_dir, {
+        "version": MANIFEST_VERSION,
+        "last_export_at": now.isoformat(),
+        "last_mode": stats.mode,
+        "tables": new_state,
+        DELETIONS: deletions_state or {"files": []}
+    })
+    return stats
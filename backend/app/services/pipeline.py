@@ -0,0 +1,217 @@
+import os
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Marks the end of a stage's input
+_DONE = object()
+# Returned by a stage in place of an item it could not handle: counted as failed, not dropped
+FAILED = object()
+
+class Stage:
+    """
+    One pipeline step. `func` takes an item and returns the item for the next stage
+    (None drops it, FAILED marks it failed). With batch_size > 1, `func` gets a list
+    of items instead and returns one result per item.
+    """
+
+    def __init__(self, name: str, func: Callable, workers: int = 1,
+                 queue_size: int = 100, batch_size: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, count: int, seconds: float, dropped: int = 0, failed: int = 0):
+        with self._lock:
+            self.processed += count
+            self.dropped += dropped
+            self.failed += failed
+            self.busy_seconds += seconds
+
+    @property
+    def items_per_second(self) -> float:
+        """Throughput per busy worker-second"""
+        return self.processed / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(self.items_per_second, 1)
+        }
+
+class Checkpoint:
+    """
+    Tracks the source position below which every item has left the pipeline
+    (written, dropped or failed), and persists it so a crashed run can resume.
+    Items past the watermark may be processed twice on resume, so the last
+    stage must be idempotent.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self.next_index = 0
+        self._finished = set()
+        self._since_flush = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.next_index = json.load(f).get("next_index", 0)
+
+    def finish(self, index: int):
+        with self._lock:
+            self._finished.add(index)
+            while self.next_index in self._finished:
+                self._finished.remove(self.next_index)
+                self.next_index += 1
+            self._since_flush += 1
+            if self._since_flush >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        self._since_flush = 0
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"next_index": self.next_index}, f)
+        os.replace(tmp_path, self.path)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def clear(self):
+        """Remove the checkpoint after a run completes"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+class Pipeline:
+    """
+    Runs stages concurrently, connected by bounded queues.
+    A full queue blocks the stage feeding it, so a slow stage (e.g. DB writes)
+    throttles the crawl instead of letting items pile up in memory.
+    """
+
+    def __init__(self, stages: List[Stage], checkpoint: Optional[Checkpoint] = None,
+                 progress_every: float = 0):
+        self.stages = stages
+        self.checkpoint = checkpoint or Checkpoint()
+        self.progress_every = progress_every
+        self.stats = {stage.name: StageStats(stage.name) for stage in stages}
+        self.source_count = 0
+        self.errors: List[str] = []
+
+    def _put_downstream(self, queues, position, envelopes):
+        if position + 1 < len(queues):
+            for envelope in envelopes:
+                queues[position + 1].put(envelope)
+        else:
+            for index, _ in envelopes:
+                self.checkpoint.finish(index)
+
+    def _run_worker(self, position: int, queues: List[queue.Queue]):
+        stage = self.stages[position]
+        stats = self.stats[stage.name]
+        inbox = queues[position]
+        batch = []
+
+        def process(envelopes):
+            started = time.perf_counter()
+            try:
+                if stage.batch_size > 1:
+                    results = stage.func([item for _, item in envelopes])
+                    outputs = [(index, result) for (index, _), result in zip(envelopes, results)]
+                else:
+                    outputs = [(envelopes[0][0], stage.func(envelopes[0][1]))]
+            except Exception as e:
+                stats.record(0, time.perf_counter() - started, failed=len(envelopes))
+                self.errors.append(f"{stage.name}: {e}")
+                print(f"Pipeline stage {stage.name} failed: {e}")
+                for index, _ in envelopes:
+                    self.checkpoint.finish(index)
+                return
+
+            kept = [(index, result) for index, result in outputs if result is not None and result is not FAILED]
+            failed = sum(1 for _, result in outputs if result is FAILED)
+            stats.record(len(kept), time.perf_counter() - started,
+                         dropped=len(outputs) - len(kept) - failed, failed=failed)
+            for index, result in outputs:
+                if result is None or result is FAILED:
+                    self.checkpoint.finish(index)
+            self._put_downstream(queues, position, kept)
+
+        while True:
+            envelope = inbox.get()
+            if envelope is _DONE:
+                break
+            batch.append(envelope)
+            if len(batch) >= stage.batch_size:
+                process(batch)
+                batch = []
+            elif stage.batch_size > 1 and inbox.empty():
+                # Don't hold a partial batch while upstream is slow
+                process(batch)
+                batch = []
+        if batch:
+            process(batch)
+
+    def _report_progress(self, stopped: threading.Event):
+        while not stopped.wait(self.progress_every):
+            summary = ", ".join(
+                f"{name}: {stats.processed}" for name, stats in self.stats.items()
+            )
+            print(f"[pipeline] source: {self.source_count}, {summary}")
+
+    def run(self, source: Iterable) -> Dict[str, StageStats]:
+        """Feed the source through all stages, skipping items before the checkpoint"""
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        threads = []
+        for position, stage in enumerate(self.stages):
+            stage_threads = [
+                threading.Thread(target=self._run_worker, args=(position, queues),
+                                 name=f"{stage.name}-{i}", daemon=True)
+                for i in range(stage.workers)
+            ]
+            threads.append(stage_threads)
+            for thread in stage_threads:
+                thread.start()
+
+        stopped = threading.Event()
+        if self.progress_every:
+            threading.Thread(target=self._report_progress, args=(stopped,), daemon=True).start()
+
+        try:
+            start_index = self.checkpoint.next_index
+            for index, item in enumerate(source):
+                if index < start_index:
+                    continue
+                self.source_count += 1
+                queues[0].put((index, item))
+        finally:
+            # Shut stages down in order so every item drains through
+            for position, stage_threads in enumerate(threads):
+                for _ in stage_threads:
+                    queues[position].put(_DONE)
+                for thread in stage_threads:
+                    thread.join()
+            stopped.set()
+            self.checkpoint.flush()
+
+        return self.stats
@@ -0,0 +1,135 @@
+import time
+import threading
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.marketplace import ListingPricePlan, ProductMarketplace
+from app.models.fx_rate import FxRate
+
+# Months of service a plan's price pays for, by (lowercased) period
+PERIOD_MONTHS = {
+    "monthly": 1, "month": 1, "mo": 1,
+    "quarterly": 3, "quarter": 3,
+    "annually": 12, "annual": 12, "yearly": 12, "year": 12, "yr": 12,
+    "weekly": 12 / 52, "week": 12 / 52,
+}
+
+# Seeded into fx_rates when the table is empty; refresh the table to update them
+DEFAULT_FX_RATES = {
+    "USD": 1.0,
+    "EUR": 1.08,
+    "GBP": 1.27,
+    "CAD": 0.73,
+    "AUD": 0.66,
+    "INR": 0.012,
+    "JPY": 0.0067,
+    "CHF": 1.12,
+}
+
+def period_months(period: Optional[str]) -> float:
+    """Months a payment covers; lifetime deals are spread over LIFETIME_PRICE_MONTHS, unknown periods count as monthly"""
+    period = (period or "monthly").strip().lower()
+    if period == "lifetime":
+        return settings.LIFETIME_PRICE_MONTHS
+    return PERIOD_MONTHS.get(period, 1)
+
+class FxRateCache:
+    """FX rates from the fx_rates table, reloaded at most every `ttl` seconds"""
+
+    def __init__(self, ttl: Optional[float] = None, clock=time.monotonic):
+        self.ttl = settings.FX_RATE_CACHE_SECONDS if ttl is None else ttl
+        self.clock = clock
+        self._rates: Optional[Dict[str, float]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def rates(self, db: Session) -> Dict[str, float]:
+        with self._lock:
+            if self._rates is None or self.clock() - self._loaded_at > self.ttl:
+                self._rates = load_fx_rates(db)
+                self._loaded_at = self.clock()
+            return self._rates
+
+    def invalidate(self):
+        with self._lock:
+            self._rates = None
+
+fx_rate_cache = FxRateCache()
+
+def load_fx_rates(db: Session) -> Dict[str, float]:
+    """All FX rates, seeding the defaults into an empty table"""
+    rates = {currency.upper(): usd_rate for currency, usd_rate in db.query(FxRate.currency, FxRate.usd_rate)}
+    if not rates:
+        db.add_all([FxRate(currency=currency, usd_rate=rate) for currency, rate in DEFAULT_FX_RATES.items()])
+        db.flush()
+        rates = dict(DEFAULT_FX_RATES)
+    return rates
+
+def usd_monthly_price(price: float, currency: Optional[str], period: Optional[str],
+                      fx_rates: Dict[str, float]) -> Optional[float]:
+    """Price normalized to USD per month, or None when the currency has no rate"""
+    rate = fx_rates.get((currency or "USD").strip().upper())
+    if rate is None:
+        return None
+    return round(price * rate / period_months(period), 4)
+
+def build_plan_rows(listing: ProductMarketplace, price_plans: Optional[List[dict]],
+                    fx_rates: Dict[str, float]) -> List[ListingPricePlan]:
+    rows = []
+    for plan in price_plans or []:
+        price = plan.get('price') if isinstance(plan, dict) else None
+        if not isinstance(price, (int, float)):
+            continue
+        rows.append(ListingPricePlan(
+            product_id=listing.product_id,
+            name=plan.get('name'),
+            price=float(price),
+            currency=plan.get('currency'),
+            period=plan.get('period'),
+            is_popular=bool(plan.get('is_popular', False)),
+            is_free=price == 0,
+            usd_monthly_price=usd_monthly_price(float(price), plan.get('currency'), plan.get('period'), fx_rates)
+        ))
+    return rows
+
+def sync_price_plans(db: Session, listing: ProductMarketplace, price_plans: Optional[List[dict]] = None,
+                     fx_rates: Optional[Dict[str, float]] = None):
+    """Replace a listing's plan rows with `price_plans` (defaults to listing.price_plans)"""
+    if fx_rates is None:
+        fx_rates = fx_rate_cache.rates(db)
+    listing.plans = build_plan_rows(listing, listing.price_plans if price_plans is None else price_plans, fx_rates)
+
+def max_usd_monthly_prices(db: Session, product_ids: Iterable[int]) -> Dict[int, float]:
+    """Highest USD-monthly plan price of each product, answered from the (product_id, price) index"""
+    return dict(
+        db.query(ListingPricePlan.product_id, func.max(ListingPricePlan.usd_monthly_price))
+        .filter(ListingPricePlan.product_id.in_(list(product_ids)))
+        .group_by(ListingPricePlan.product_id)
+    )
+
+def backfill_price_plans(db: Session, batch_size: int = 500) -> int:
+    """Rebuild plan rows for every listing, e.g. after FX rates change; returns listings processed"""
+    from app.services.change_events import publish_changes  # change_events imports fx_rate_cache from here
+    fx_rates = load_fx_rates(db)
+    processed = 0
+    last_id = 0
+    while True:
+        listings = (
+            db.query(ProductMarketplace)
+            .filter(ProductMarketplace.id > last_id)
+            .order_by(ProductMarketplace.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not listings:
+            break
+        for listing in listings:
+            sync_price_plans(db, listing, fx_rates=fx_rates)
+        publish_changes(db, "price_plans", {listing.product_id for listing in listings})
+        db.commit()
+        processed += len(listings)
+        last_id = listings[-1].id
+    publish_changes(db, "fx_rates")
+    db.commit()
+    return processed
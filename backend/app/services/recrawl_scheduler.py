@@ -0,0 +1,131 @@
+import json
+import heapq
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.marketplace import ProductMarketplace
+
+class RecrawlScheduler:
+    """
+    Decides when each marketplace listing should be scraped again.
+    Listings that change are re-scraped often; unchanged listings back off
+    exponentially up to a maximum interval.
+    """
+
+    def __init__(self, min_interval_hours: Optional[float] = None,
+                 max_interval_hours: Optional[float] = None,
+                 backoff: Optional[float] = None):
+        # Explicit zeros are valid (e.g. re-crawl on every run), so only None falls back to settings
+        if min_interval_hours is None:
+            min_interval_hours = settings.RECRAWL_MIN_INTERVAL_HOURS
+        if max_interval_hours is None:
+            max_interval_hours = settings.RECRAWL_MAX_INTERVAL_HOURS
+        self.min_interval = timedelta(hours=min_interval_hours)
+        self.max_interval = timedelta(hours=max_interval_hours)
+        self.backoff = settings.RECRAWL_BACKOFF if backoff is None else backoff
+        self.blocked_penalty = timedelta(hours=settings.RECRAWL_BLOCKED_PENALTY_HOURS)
+
+    @staticmethod
+    def content_hash(product_data: dict) -> str:
+        """Hash the scraped fields that matter for change detection"""
+        relevant = {
+            'name': product_data.get('name'),
+            'description': product_data.get('description'),
+            'upvotes': product_data.get('upvotes'),
+            'tags': product_data.get('tags'),
+            'categories': product_data.get('categories'),
+            'price_plans': product_data.get('price_plans')
+        }
+        payload = json.dumps(relevant, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def next_interval(self, unchanged_count: int) -> timedelta:
+        """Interval until the next scrape after `unchanged_count` unchanged scrapes"""
+        # Cap the exponent so the multiplication cannot overflow timedelta
+        exponent = min(unchanged_count, 64)
+        interval = self.min_interval * (self.backoff ** exponent)
+        return min(interval, self.max_interval)
+
+    def record_scrape(self, listing: ProductMarketplace, product_data: Optional[dict],
+                      now: Optional[datetime] = None) -> bool:
+        """
+        Update a listing's change history after a scrape and schedule the next one.
+        product_data is None when the page was not modified (HTTP 304).
+        Returns True if the listing changed.
+        """
+        now = now or datetime.utcnow()
+
+        if product_data is None:
+            changed = False
+        else:
+            new_hash = self.content_hash(product_data)
+            changed = new_hash != listing.content_hash
+            listing.content_hash = new_hash
+
+        if changed:
+            listing.unchanged_count = 0
+            listing.last_changed_at = now
+        else:
+            listing.unchanged_count = (listing.unchanged_count or 0) + 1
+
+        listing.last_scraped_at = now
+        listing.next_scrape_at = now + self.next_interval(listing.unchanged_count)
+        return changed
+
+    def record_failure(self, listing: ProductMarketplace, now: Optional[datetime] = None):
+        """Schedule a retry after a failed scrape: blocked listings wait out the penalty"""
+        now = now or datetime.utcnow()
+        listing.next_scrape_at = now + (self.blocked_penalty if listing.is_blocked else self.min_interval)
+
+    def crawl_budget(self, window_hours: Optional[float] = None) -> int:
+        """Number of requests that fit in the crawl window at REQUEST_DELAY spacing"""
+        window_seconds = (window_hours or settings.RECRAWL_WINDOW_HOURS) * 3600
+        if settings.REQUEST_DELAY <= 0:
+            return int(window_seconds)
+        return int(window_seconds / settings.REQUEST_DELAY)
+
+    def _priority(self, listing: ProductMarketplace, now: datetime) -> float:
+        """Overdue time relative to the listing's interval; higher is more urgent"""
+        if listing.next_scrape_at is None:
+            # Never scraped listings go first
+            return float('inf')
+        overdue = (now - listing.next_scrape_at).total_seconds()
+        # A zero minimum interval is allowed; rank those by overdue seconds alone
+        interval = max(self.next_interval(listing.unchanged_count or 0).total_seconds(), 1.0)
+        return overdue / interval
+
+    def due_listings(self, db: Session, now: Optional[datetime] = None,
+                     budget: Optional[int] = None,
+                     marketplace_id: Optional[int] = None) -> List[ProductMarketplace]:
+        """
+        Return the most urgent due listings, at most `budget` of them.
+        Fast-changing listings that are overdue outrank slow ones that are
+        overdue by the same wall-clock time.
+        """
+        now = now or datetime.utcnow()
+        budget = self.crawl_budget() if budget is None else budget
+        if budget <= 0:
+            return []
+
+        # Blocked listings come back once their penalty (pushed into next_scrape_at) has passed
+        query = db.query(ProductMarketplace).filter(
+            or_(ProductMarketplace.next_scrape_at <= now,
+                and_(ProductMarketplace.next_scrape_at.is_(None), ProductMarketplace.is_blocked.isnot(True)))
+        )
+        if marketplace_id is not None:
+            query = query.filter(ProductMarketplace.marketplace_id == marketplace_id)
+
+        # Keep only the top `budget` entries in a bounded heap while streaming
+        heap = []
+        for listing in query.yield_per(1000):
+            entry = (self._priority(listing, now), -listing.id, listing)
+            if len(heap) < budget:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+        heap.sort(key=lambda entry: entry[:2], reverse=True)
+        return [listing for _, _, listing in heap]
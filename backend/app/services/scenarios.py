@@ -0,0 +1,86 @@
+import time
+from typing import Dict, Optional
+import numpy as np
+from app.schemas.scenario import ScenarioGroup, ScenarioRequest, ScenarioResponse, ScenarioTotals
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.services.mrr_estimator import MrrEstimator
+
+# Price basis -> CatalogSnapshot column
+PRICE_BASES = {
+    "highest": "max_price",
+    "lowest_paid": "min_paid_price",
+    "average_paid": "mean_paid_price",
+}
+
+def scenario_estimator(request: ScenarioRequest) -> MrrEstimator:
+    """A rule-based estimator with the request's parameters in place of the defaults"""
+    estimator = MrrEstimator(mode="rule")
+    tiers = estimator.CONVERSION_TIERS
+    if request.conversion_tiers is not None:
+        # estimate_mrr_batch expects the highest threshold first
+        tiers = sorted(((tier.min_visits, tier.rate) for tier in request.conversion_tiers), reverse=True)
+    default_rate = request.default_conversion_rate or estimator.DEFAULT_CONVERSION_RATE
+
+    estimator.CONVERSION_TIERS = [(min_visits, rate * request.conversion_multiplier) for min_visits, rate in tiers]
+    estimator.DEFAULT_CONVERSION_RATE = default_rate * request.conversion_multiplier
+    if request.low_factor is not None:
+        estimator.LOW_FACTOR = request.low_factor
+    if request.high_factor is not None:
+        estimator.HIGH_FACTOR = request.high_factor
+    return estimator
+
+def _totals(results: Dict[str, np.ndarray], rows: Optional[np.ndarray] = None) -> ScenarioTotals:
+    def total(key):
+        values = results[key] if rows is None else results[key][rows]
+        return round(float(values.sum()), 2)
+    count = len(results["mrr_likely"]) if rows is None else len(rows)
+    return ScenarioTotals(products=count, mrr_low=total("mrr_low"),
+                          mrr_likely=total("mrr_likely"), mrr_high=total("mrr_high"))
+
+def evaluate_scenario(snapshot: CatalogSnapshot, request: ScenarioRequest) -> ScenarioResponse:
+    """Estimate the whole snapshot under default and scenario parameters and aggregate both"""
+    started = time.perf_counter()
+
+    rows = None
+    if request.category is not None:
+        grouping = snapshot.groupings["category"]
+        code = grouping.label_code(request.category)
+        rows = grouping.rows[grouping.codes == code] if code is not None else np.array([], dtype=np.int64)
+
+    def select(column):
+        return column if rows is None else column[rows]
+
+    visits = select(snapshot.visits_month)
+    baseline = MrrEstimator(mode="rule").estimate_mrr_batch(select(snapshot.max_price), visits)
+    scenario = scenario_estimator(request).estimate_mrr_batch(
+        select(getattr(snapshot, PRICE_BASES[request.price_basis])), visits
+    )
+
+    groups = []
+    if request.group_by:
+        grouping = snapshot.groupings[request.group_by]
+        # Positions within the selected rows, per group label
+        position = np.full(len(snapshot), -1, dtype=np.int64)
+        selected = np.arange(len(snapshot)) if rows is None else rows
+        position[selected] = np.arange(len(selected))
+        member_positions = position[grouping.rows]
+        for code, label in enumerate(grouping.labels):
+            members = member_positions[(grouping.codes == code) & (member_positions >= 0)]
+            if len(members):
+                groups.append(ScenarioGroup(group=label, baseline=_totals(baseline, members),
+                                            scenario=_totals(scenario, members)))
+        groups.sort(key=lambda group: group.scenario.mrr_likely, reverse=True)
+
+    baseline_totals, scenario_totals = _totals(baseline), _totals(scenario)
+    change = None
+    if baseline_totals.mrr_likely:
+        change = round((scenario_totals.mrr_likely / baseline_totals.mrr_likely - 1) * 100, 2)
+
+    return ScenarioResponse(
+        baseline=baseline_totals,
+        scenario=scenario_totals,
+        mrr_likely_change_pct=change,
+        groups=groups,
+        snapshot_age_seconds=round(snapshot.age_seconds, 1),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
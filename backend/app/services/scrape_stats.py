@@ -0,0 +1,135 @@
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.scrape_log import ScrapeLog
+from app.schemas.scrape_stats import ScrapeStatsResponse, ThroughputBucket
+from app.services.response_cache import ResponseCache
+
+# Statuses written by BaseScraper, always reported even when zero
+STATUSES = ["success", "not_modified", "blocked", "timeout", "error"]
+DURATION_PERCENTILES = [50, 90, 99]
+
+UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+WINDOW_PATTERN = re.compile(r'^(\d+)([mhd])$')
+
+stats_cache = ResponseCache("scrape_stats", ttl=settings.SCRAPE_STATS_CACHE_SECONDS, max_entries=100)
+
+def parse_window(value: str) -> timedelta:
+    """Parse '15m', '24h' or '7d' into a timedelta"""
+    match = WINDOW_PATTERN.match(value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid window: {value} (use e.g. 15m, 24h or 7d)")
+    return timedelta(**{UNITS[match.group(2)]: int(match.group(1))})
+
+def default_bucket(window: timedelta) -> str:
+    """Bucket size that keeps a window to at most ~120 points"""
+    if window <= timedelta(hours=2):
+        return "1m"
+    if window <= timedelta(days=2):
+        return "1h"
+    return "1d"
+
+def floor_time(value: datetime, bucket: timedelta) -> datetime:
+    seconds = (value - datetime.min).total_seconds()
+    return datetime.min + timedelta(seconds=seconds - seconds % bucket.total_seconds())
+
+EPOCH = datetime(1970, 1, 1)
+
+def _bucket_index(db: Session, origin: datetime, bucket_size: timedelta):
+    """SQL expression numbering the bucket a log's timestamp falls in, counting from `origin`"""
+    origin_seconds = int((origin - EPOCH).total_seconds())
+    bucket_seconds = int(bucket_size.total_seconds())
+    if db.get_bind().dialect.name == "postgresql":
+        return func.floor((func.extract("epoch", ScrapeLog.timestamp) - origin_seconds) / bucket_seconds)
+    # Whole seconds are enough: buckets are at least a minute and start on a minute
+    return (cast(func.strftime("%s", ScrapeLog.timestamp), Integer) - origin_seconds) // bucket_seconds
+
+def _duration_percentiles(db: Session, filters: list) -> Dict[str, float]:
+    """Linearly interpolated duration percentiles, computed by the database"""
+    if db.get_bind().dialect.name == "postgresql":
+        values = db.query(*[
+            func.percentile_cont(p / 100).within_group(ScrapeLog.duration) for p in DURATION_PERCENTILES
+        ]).filter(*filters, ScrapeLog.duration.isnot(None)).one()
+        if values[0] is None:
+            return {}
+        return {f"p{p}": round(float(value), 1) for p, value in zip(DURATION_PERCENTILES, values)}
+
+    # Elsewhere read only the two ranks around each percentile, like percentile_cont interpolates
+    durations = db.query(ScrapeLog.duration).filter(*filters, ScrapeLog.duration.isnot(None))
+    count = durations.count()
+    percentiles = {}
+    for p in DURATION_PERCENTILES:
+        if not count:
+            break
+        rank = (count - 1) * p / 100
+        neighbours = [value for (value,) in durations.order_by(ScrapeLog.duration).offset(int(rank)).limit(2)]
+        upper = neighbours[-1]
+        percentiles[f"p{p}"] = round(float(neighbours[0] + (upper - neighbours[0]) * (rank - int(rank))), 1)
+    return percentiles
+
+def compute_scrape_stats(db: Session, marketplace_id: Optional[int], window: str, bucket: Optional[str] = None,
+                         marketplace_name: Optional[str] = None, now: Optional[datetime] = None) -> ScrapeStatsResponse:
+    """
+    Status rates, duration percentiles and per-bucket throughput over the last
+    `window`. Counts are grouped and percentiles computed in the database, so
+    no per-request rows are loaded; the (marketplace_id, timestamp) index
+    covers the window.
+    """
+    window_size = parse_window(window)
+    bucket = bucket or default_bucket(window_size)
+    bucket_size = parse_window(bucket)
+    if window_size / bucket_size > 1000:
+        raise ValueError("Window holds too many buckets; use a larger bucket")
+
+    now = now or datetime.utcnow()
+    since = now - window_size
+    filters = [ScrapeLog.timestamp >= since]
+    if marketplace_id is not None:
+        filters.append(ScrapeLog.marketplace_id == marketplace_id)
+
+    origin = floor_time(since, bucket_size)
+    bucket_count = int((now - origin) / bucket_size) + 1
+    # Counted by the database: one row per (bucket, status) instead of one per request
+    bucket_index = _bucket_index(db, origin, bucket_size).label("bucket")
+    status_counts = Counter()
+    bucket_statuses = [Counter() for _ in range(bucket_count)]
+    for index, status, count in db.query(bucket_index, ScrapeLog.status, func.count()).filter(
+        *filters
+    ).group_by(bucket_index, ScrapeLog.status):
+        status = status or "unknown"
+        status_counts[status] += count
+        bucket_statuses[min(int(index), bucket_count - 1)][status] += count
+
+    percentiles = _duration_percentiles(db, filters)
+
+    total = sum(status_counts.values())
+    return ScrapeStatsResponse(
+        marketplace=marketplace_name,
+        window=window,
+        bucket=bucket,
+        since=since,
+        requests=total,
+        rates={
+            status: round(status_counts.get(status, 0) / total, 4) if total else 0.0
+            for status in list(dict.fromkeys(STATUSES + sorted(status_counts)))
+        },
+        duration_percentiles=percentiles,
+        throughput=[
+            ThroughputBucket(start=origin + index * bucket_size, requests=sum(counts.values()), statuses=dict(counts))
+            for index, counts in enumerate(bucket_statuses)
+        ]
+    )
+
+def scrape_stats(db: Session, marketplace_id: Optional[int], window: str, bucket: Optional[str] = None,
+                 marketplace_name: Optional[str] = None) -> ScrapeStatsResponse:
+    """compute_scrape_stats, shared between callers for SCRAPE_STATS_CACHE_SECONDS"""
+    key = (marketplace_id, window, bucket)
+    stats = stats_cache.get(key)
+    if stats is None:
+        stats = compute_scrape_stats(db, marketplace_id, window, bucket, marketplace_name)
+        stats_cache.set(key, stats)
+    return stats
@@ -0,0 +1,152 @@
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.scrape_log import ScrapeLog
+from app.models.marketplace import ProductMarketplace
+from app.scrapers.producthunt import ProductHuntScraper
+
+# Snapshot filename prefix -> scraper that produced it
+SNAPSHOT_SCRAPERS = {
+    "producthunt": ProductHuntScraper,
+}
+
+CANONICAL_URL = re.compile(
+    r'<link[^>]+rel=["\']canonical["\'][^>]*href=["\']([^"\']+)["\']'
+    r'|<meta[^>]+property=["\']og:url["\'][^>]*content=["\']([^"\']+)["\']',
+    re.IGNORECASE
+)
+
+_scrapers = {}
+
+def iter_snapshots(snapshot_dir: str, prefix: str = "producthunt") -> Iterator[str]:
+    """Yield snapshot paths in filename (i.e. chronological) order"""
+    names = sorted(
+        entry.name for entry in os.scandir(snapshot_dir)
+        if entry.is_file() and entry.name.startswith(f"{prefix}_") and entry.name.endswith(".html")
+    )
+    for name in names:
+        yield os.path.join(snapshot_dir, name)
+
+def load_snapshot_urls(db: Session) -> Dict[str, str]:
+    """Map snapshot filenames to the URL they were scraped from"""
+    urls = {}
+    for snapshot_path, url in db.query(ProductMarketplace.snapshot_path, ProductMarketplace.listing_url).filter(
+        ProductMarketplace.snapshot_path.isnot(None)
+    ).yield_per(10000):
+        urls[os.path.basename(snapshot_path)] = url
+    # Scrape logs are newer and more complete than listings, so they win
+    for snapshot_path, url in db.query(ScrapeLog.snapshot_path, ScrapeLog.url).filter(
+        ScrapeLog.snapshot_path.isnot(None)
+    ).yield_per(10000):
+        urls[os.path.basename(snapshot_path)] = url
+    return urls
+
+def _get_scraper(prefix: str):
+    # One scraper per worker process, created on first use
+    if prefix not in _scrapers:
+        _scrapers[prefix] = SNAPSHOT_SCRAPERS[prefix]()
+    return _scrapers[prefix]
+
+def parse_snapshot(task: Tuple[str, Optional[str], str]) -> Tuple[str, Optional[dict], Optional[str]]:
+    """
+    Re-parse one snapshot with its scraper's extraction methods.
+    Runs in a worker process; returns (path, product_data, error).
+    """
+    path, url, prefix = task
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        if not url:
+            match = CANONICAL_URL.search(html)
+            url = (match.group(1) or match.group(2)) if match else None
+        if not url:
+            return path, None, "source URL unknown"
+        return path, _get_scraper(prefix).parse_product_page(html, url), None
+    except Exception as e:
+        return path, None, str(e)
+
+def parse_snapshots(tasks: List[Tuple[str, Optional[str], str]]) -> List[Tuple[str, Optional[dict], Optional[str]]]:
+    """parse_snapshot over a chunk of tasks, so each pool round trip carries many pages"""
+    return [parse_snapshot(task) for task in tasks]
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class ReplayStats:
+    def __init__(self):
+        self.parsed = 0
+        self.failed = 0
+        self.saved = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def pages_per_second(self) -> float:
+        return (self.parsed + self.failed) / self.elapsed if self.elapsed > 0 else 0.0
+
+def replay_snapshots(snapshot_dir: str, snapshot_urls: Dict[str, str], save_batch=None,
+                     prefix: str = "producthunt", workers: Optional[int] = None,
+                     batch_size: int = 500, limit: Optional[int] = None,
+                     progress_every: int = 10000) -> ReplayStats:
+    """
+    Re-parse snapshots in a process pool and hand the results to `save_batch`
+    in batches of `batch_size`. Results arrive in snapshot order, so when a page
+    was captured several times the newest capture is written last. Only a few
+    chunks per worker are in flight, so memory stays flat when saving is slow.
+    """
+    stats = ReplayStats()
+    workers = workers or os.cpu_count() or 1
+
+    def tasks():
+        for i, path in enumerate(iter_snapshots(snapshot_dir, prefix)):
+            if limit is not None and i >= limit:
+                return
+            yield path, snapshot_urls.get(os.path.basename(path)), prefix
+
+    def results(pool):
+        # Bounded window of futures: pool.map would read every task up front
+        in_flight = deque()
+        for chunk in _chunks(tasks(), 64):
+            in_flight.append(pool.submit(parse_snapshots, chunk))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, product_data, error in results(pool):
+            if error:
+                stats.failed += 1
+                print(f"Error replaying {path}: {error}")
+            else:
+                stats.parsed += 1
+                # A dry run only counts; holding every result would grow without bound
+                if save_batch:
+                    batch.append(product_data)
+
+            if save_batch and len(batch) >= batch_size:
+                stats.saved += save_batch(batch)
+                batch = []
+
+            processed = stats.parsed + stats.failed
+            if progress_every and processed % progress_every == 0:
+                print(f"{processed} snapshots replayed ({stats.pages_per_second:.0f} pages/sec)")
+
+    if save_batch and batch:
+        stats.saved += save_batch(batch)
+    return stats
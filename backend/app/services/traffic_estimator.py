@@ -1,31 +1,29 @@
-import random
-from typing import Optional
-from app.core.config import settings
+from typing import Dict, Iterable, Optional
 from app.schemas.product import TrafficInfo
+from app.services.traffic_providers import TrafficCache, TrafficProvider, get_traffic_provider, traffic_key
 
 class TrafficEstimator:
-    def __init__(self):
-        self.stub_mode = settings.SIMILARWEB_STUB_MODE
-    
+    def __init__(self, provider: Optional[TrafficProvider] = None, cache: Optional[TrafficCache] = None):
+        self.provider = provider or get_traffic_provider()
+        self.cache = cache if cache is not None else TrafficCache()
+
     def estimate_traffic(self, product_url: str) -> TrafficInfo:
         """
         Estimate traffic for a product.
-        In stub mode, returns random but realistic values.
+        Results are cached per domain; in stub mode they are deterministic per domain.
         """
-        if self.stub_mode:
-            return self._generate_stub_traffic()
-        else:
-            # In real implementation, this would call SimilarWeb API
-            # For now, we'll return stub data even when stub mode is off
-            # to avoid requiring an API key
-            return self._generate_stub_traffic()
-    
-    def _generate_stub_traffic(self) -> TrafficInfo:
-        """Generate realistic stub traffic data"""
-        return TrafficInfo(
-            visits_month=random.randint(1000, 1000000),
-            visits_growth=round(random.uniform(-20.0, 50.0), 2),
-            bounce_rate=round(random.uniform(20.0, 80.0), 2),
-            avg_time_on_site=round(random.uniform(30.0, 300.0), 2),
-            traffic_sources='{"direct": 30, "search": 50, "referral": 20}'
-        )
\ No newline at end of file
+        return self.estimate_traffic_batch([product_url])[product_url]
+
+    def estimate_traffic_batch(self, product_urls: Iterable[str]) -> Dict[str, TrafficInfo]:
+        """Estimate traffic for many products, looking up each uncached domain once"""
+        keys = {url: traffic_key(url) for url in product_urls}
+        results = self.cache.get_many(set(keys.values()))
+
+        missing = sorted(set(keys.values()) - set(results))
+        if missing:
+            fetched = self.provider.fetch(missing)
+            self.cache.set_many(fetched)
+            results.update(fetched)
+
+        # Domains the provider has no data for count as no traffic
+        return {url: results.get(key, TrafficInfo()) for url, key in keys.items()}
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import settings
+from app.schemas.product import TrafficInfo
+from app.scrapers.resilience import RetryPolicy, parse_retry_after
+from app.services.entity_resolution import MARKETPLACE_DOMAINS, normalize_url, registrable_domain
+
+def traffic_key(url: str) -> str:
+    """
+    Cache and lookup key for a product URL: its registrable domain, or the
+    normalized URL for listings hosted on a marketplace (whose domain is shared).
+    """
+    domain = registrable_domain(url)
+    if not domain or domain in MARKETPLACE_DOMAINS:
+        return normalize_url(url)
+    return domain
+
+class TrafficProvider(ABC):
+    """Looks up traffic for many keys (domains) per call"""
+
+    name = "base"
+
+    @abstractmethod
+    def fetch(self, keys: List[str]) -> Dict[str, TrafficInfo]:
+        """Return traffic for the keys the provider knows; unknown keys are left out"""
+        pass
+
+class StubTrafficProvider(TrafficProvider):
+    """Realistic-looking traffic that is the same on every call for a given key"""
+
+    name = "stub"
+
+    def _generate(self, key: str) -> TrafficInfo:
+        seed = int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+        rng = random.Random(seed)
+        return TrafficInfo(
+            visits_month=rng.randint(1000, 1000000),
+            visits_growth=round(rng.uniform(-20.0, 50.0), 2),
+            bounce_rate=round(rng.uniform(20.0, 80.0), 2),
+            avg_time_on_site=round(rng.uniform(30.0, 300.0), 2),
+            traffic_sources='{"direct": 30, "search": 50, "referral": 20}'
+        )
+
+    def fetch(self, keys: List[str]) -> Dict[str, TrafficInfo]:
+        return {key: self._generate(key) for key in keys}
+
+class RateLimiter:
+    """Spaces calls at least 1 / rate seconds apart across threads"""
+
+    def __init__(self, requests_per_second: float, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = self.clock()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            self.sleep(wait)
+
+class HttpTrafficProvider(TrafficProvider):
+    """
+    Batch traffic API client. Sends GET {base_url}/traffic?domains=a.com,b.com with
+    the API key in X-API-Key and expects {"a.com": {"visits_month": ...}, ...}.
+    Requests share one pooled session, are rate limited, and 429/5xx responses are
+    retried with backoff that honors Retry-After.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 batch_size: Optional[int] = None, requests_per_second: Optional[float] = None,
+                 pool_size: int = 10, retry_policy: Optional[RetryPolicy] = None, sleep=time.sleep):
+        self.base_url = (base_url or settings.TRAFFIC_API_URL).rstrip('/')
+        if not self.base_url:
+            raise ValueError("TRAFFIC_API_URL must be set when SIMILARWEB_STUB_MODE is off")
+        self.batch_size = batch_size or settings.TRAFFIC_BATCH_SIZE
+        self.rate_limiter = RateLimiter(
+            settings.TRAFFIC_REQUESTS_PER_SECOND if requests_per_second is None else requests_per_second,
+            sleep=sleep
+        )
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.sleep = sleep
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': 'Marketplace Intelligence Bot 1.0',
+            'X-API-Key': api_key if api_key is not None else settings.SIMILARWEB_API_KEY
+        })
+
+    def _request(self, keys: List[str]) -> dict:
+        for attempt in range(self.retry_policy.max_retries + 1):
+            self.rate_limiter.wait()
+            response = self.session.get(
+                f"{self.base_url}/traffic", params={"domains": ",".join(keys)}, timeout=settings.TIMEOUT
+            )
+            if self.retry_policy.should_retry(response.status_code) and attempt < self.retry_policy.max_retries:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.sleep(self.retry_policy.delay(attempt, retry_after))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def fetch(self, keys: List[str]) -> Dict[str, TrafficInfo]:
+        results = {}
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            for key, data in self._request(batch).items():
+                if key in batch and data is not None:
+                    results[key] = TrafficInfo(**data)
+        return results
+
+class TrafficCache:
+    """
+    TTL cache of traffic lookups: an in-process dict in front of a SQLite file,
+    so results survive restarts and are shared by worker processes.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, path: Optional[str] = None, clock=time.time):
+        self.ttl = settings.TRAFFIC_CACHE_TTL_HOURS * 3600 if ttl_seconds is None else ttl_seconds
+        self.path = settings.TRAFFIC_CACHE_PATH if path is None else path
+        self.clock = clock
+        self._memory: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        # sqlite3 connections can't be shared across threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS traffic_cache (key TEXT PRIMARY KEY, expires_at REAL, data TEXT)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, TrafficInfo]:
+        now = self.clock()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry and entry[0] > now:
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+
+        connection = self._connection()
+        if connection is not None and missing:
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = connection.execute(
+                    f"SELECT key, expires_at, data FROM traffic_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, expires_at, data in rows:
+                    if expires_at > now:
+                        info = TrafficInfo(**json.loads(data))
+                        found[key] = info
+                        with self._lock:
+                            self._memory[key] = (expires_at, info)
+        return found
+
+    def set_many(self, results: Dict[str, TrafficInfo]):
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            for key, info in results.items():
+                self._memory[key] = (expires_at, info)
+
+        connection = self._connection()
+        if connection is not None and results:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO traffic_cache (key, expires_at, data) VALUES (?, ?, ?)",
+                    [(key, expires_at, json.dumps(info.model_dump())) for key, info in results.items()]
+                )
+
+def get_traffic_provider() -> TrafficProvider:
+    """Provider selected by SIMILARWEB_STUB_MODE"""
+    if settings.SIMILARWEB_STUB_MODE:
+        return StubTrafficProvider()
+    return HttpTrafficProvider()
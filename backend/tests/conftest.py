@@ -24,4 +24,30 @@ def db():
     finally:
         db.close()
         # Drop all tables after test
-        Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(autouse=True)
+def memory_traffic_cache(monkeypatch):
+    """Keep test runs from writing the persistent traffic cache"""
+    monkeypatch.setattr(settings, "TRAFFIC_CACHE_PATH", "")
+
+@pytest.fixture
+def http_server():
+    """Start local HTTP fixture servers; yields a factory taking a handler class"""
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    servers = []
+
+    def start(handler_class):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
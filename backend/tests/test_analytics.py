@@ -0,0 +1,130 @@
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+from app.core.database import get_read_db
+from app.api.v1.endpoints import analytics
+from app.services import catalog_snapshot
+from app.services.catalog_snapshot import (
+    SnapshotRefresher, build_catalog_snapshot, get_catalog_snapshot, invalidate_catalog_snapshot,
+    mark_catalog_snapshot_stale
+)
+from tests.conftest import TestingSessionLocal
+
+PLANS = [{"name": "Pro", "price": 10, "currency": "USD", "period": "monthly", "features": []}]
+
+def seed_catalog(db):
+    hunt = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    store = Marketplace(name="App Store", base_url="https://apps.example.com")
+    db.add_all([hunt, store])
+    db.flush()
+    rows = [("A", ["AI"], ["saas"], 1000.0), ("B", ["AI"], None, 3000.0), ("C", ["Dev"], ["saas"], 500.0), ("D", None, None, None)]
+    for name, categories, tags, mrr in rows:
+        product = Product(name=name, canonical_url=f"https://{name.lower()}.example.com", categories=categories, tags=tags)
+        db.add(product)
+        db.flush()
+        db.add(ProductMarketplace(product_id=product.id, marketplace_id=hunt.id,
+                                  listing_url=f"https://www.producthunt.com/posts/{name}", price_plans=PLANS))
+        if name == "A":
+            db.add(ProductMarketplace(product_id=product.id, marketplace_id=store.id,
+                                      listing_url="https://apps.example.com/a", price_plans=PLANS))
+        db.add(TrafficData(product_id=product.id, visits_month=1000))
+        if mrr is not None:
+            # An older estimate that must not be counted
+            db.add(MrrEstimate(product_id=product.id, mrr_low=1, mrr_likely=1, mrr_high=1))
+            db.add(MrrEstimate(product_id=product.id, mrr_low=mrr / 2, mrr_likely=mrr, mrr_high=mrr * 1.5))
+    db.commit()
+
+@pytest.fixture
+def client(db):
+    invalidate_catalog_snapshot()
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/v1/analytics")
+    app.dependency_overrides[get_read_db] = lambda: db
+    yield TestClient(app)
+    invalidate_catalog_snapshot()
+
+def test_distribution_overall_and_by_category(client, db):
+    """Test totals, percentiles and histograms from the latest estimate of each product"""
+    seed_catalog(db)
+    body = client.get("/api/v1/analytics/distribution", params={"metric": "mrr_likely", "group_by": "category", "bins": 5}).json()
+    assert body["snapshot_products"] == 4
+    overall = body["overall"]
+    assert overall["count"] == 3
+    assert overall["total"] == 4500
+    assert overall["percentiles"]["p50"] == 1000
+    assert overall["histogram"]["edges"] == [500, 1000, 1500, 2000, 2500, 3000]
+    assert overall["histogram"]["counts"] == [1, 1, 0, 0, 1]
+
+    groups = [(group["group"], group["count"], group["total"]) for group in body["groups"]]
+    assert groups == [("AI", 2, 4000), ("Dev", 1, 500)]
+    assert body["groups"][0]["histogram"]["edges"] == overall["histogram"]["edges"]
+
+def test_distribution_by_marketplace_and_tag(client, db):
+    seed_catalog(db)
+    by_marketplace = client.get("/api/v1/analytics/distribution", params={"metric": "visits_month", "group_by": "marketplace"}).json()
+    assert {group["group"]: group["count"] for group in by_marketplace["groups"]} == {"Product Hunt": 4, "App Store": 1}
+
+    by_tag = client.get("/api/v1/analytics/distribution", params={"group_by": "tag", "scale": "log"}).json()
+    assert [(group["group"], group["total"]) for group in by_tag["groups"]] == [("saas", 1500)]
+    assert by_tag["overall"]["histogram"]["edges"][0] == 0
+
+    assert client.get("/api/v1/analytics/distribution", params={"metric": "revenue"}).status_code == 422
+
+def test_refresher_swaps_in_new_snapshot(db):
+    """Test that the background refresher rebuilds the shared snapshot"""
+    seed_catalog(db)
+    invalidate_catalog_snapshot()
+    refresher = SnapshotRefresher(TestingSessionLocal, interval=0.05)
+    refresher.start()
+    try:
+        deadline = time.time() + 5
+        while catalog_snapshot._snapshot is None and time.time() < deadline:
+            time.sleep(0.01)
+        first = catalog_snapshot._snapshot
+        assert first is not None and len(first) == 4
+        while catalog_snapshot._snapshot is first and time.time() < deadline:
+            time.sleep(0.01)
+        assert catalog_snapshot._snapshot is not first
+    finally:
+        refresher.stop()
+        invalidate_catalog_snapshot()
+
+def test_stale_snapshot_is_served_until_refresher_swaps(db, monkeypatch):
+    """Test that a change wakes the refresher instead of making requests rebuild the snapshot"""
+    seed_catalog(db)
+    invalidate_catalog_snapshot()
+    refresher = SnapshotRefresher(TestingSessionLocal, interval=60)
+    refresher.start()
+    try:
+        deadline = time.time() + 5
+        while catalog_snapshot._snapshot is None and time.time() < deadline:
+            time.sleep(0.01)
+        first = catalog_snapshot._snapshot
+        mark_catalog_snapshot_stale()
+        while catalog_snapshot._snapshot is first and time.time() < deadline:
+            time.sleep(0.01)
+        assert catalog_snapshot._snapshot is not first  # Well before the 60s interval
+    finally:
+        refresher.stop()
+        invalidate_catalog_snapshot()
+
+    first = get_catalog_snapshot(db)
+    monkeypatch.setattr(catalog_snapshot, "build_catalog_snapshot", lambda db: pytest.fail("rebuilt in a request"))
+    catalog_snapshot._refresher_running.set()
+    try:
+        mark_catalog_snapshot_stale()
+        assert get_catalog_snapshot(db) is first
+    finally:
+        catalog_snapshot._refresher_running.clear()
+    monkeypatch.undo()
+
+    # Without a refresher, a stale snapshot is rebuilt by the next request
+    mark_catalog_snapshot_stale()
+    assert get_catalog_snapshot(db) is not first
+    invalidate_catalog_snapshot()
@@ -0,0 +1,138 @@
+import pytest
+from http.server import BaseHTTPRequestHandler
+from app.scrapers.browser import BrowserPool, BrowserUnavailableError, is_tracker
+from app.scrapers.producthunt import ProductHuntScraper
+
+STATIC_PAGE = b"""<html><head><meta name="description" content="Static"></head>
+<body><h1>Static Product</h1></body></html>"""
+
+# Product name is only added by JavaScript, like client-rendered marketplace pages
+SCRIPTED_PAGE = b"""<html><head><meta name="description" content="Scripted"></head>
+<body><img src="/logo.png"><div id="root"></div>
+<script>var h = document.createElement('h1'); h.textContent = 'Rendered Product';
+document.getElementById('root').appendChild(h);</script></body></html>"""
+
+class PageHandler(BaseHTTPRequestHandler):
+    requested = []
+
+    def do_GET(self):
+        PageHandler.requested.append(self.path)
+        body = {"/static": STATIC_PAGE, "/scripted": SCRIPTED_PAGE}.get(self.path, b"")
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakePool:
+    def __init__(self, html=None, error=None):
+        self.html = html
+        self.error = error
+        self.rendered = []
+
+    def render(self, url, wait_for=None):
+        self.rendered.append(url)
+        if self.error:
+            raise self.error
+        return self.html
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    """Scraper with captured side effects"""
+    scraper = ProductHuntScraper()
+    scraper.delay = 0
+    scraper.http_cache = None
+    scraper.snapshots = []
+    monkeypatch.setattr(scraper, "_log_scrape_attempt", lambda **kwargs: None)
+    monkeypatch.setattr(scraper, "_update_listing_health", lambda url, blocked, unstable: None)
+    monkeypatch.setattr(scraper, "_save_snapshot",
+                        lambda content, filename: scraper.snapshots.append(content) or str(tmp_path / filename))
+    PageHandler.requested = []
+    return scraper
+
+def use_pool(monkeypatch, pool):
+    monkeypatch.setattr("app.scrapers.producthunt.get_browser_pool", lambda: pool)
+
+def test_static_page_skips_browser(scraper, http_server, monkeypatch):
+    """Test that pages with the required nodes are never rendered"""
+    pool = FakePool(html="<h1>Should not be used</h1>")
+    use_pool(monkeypatch, pool)
+    base_url = http_server(PageHandler)
+
+    product = scraper.scrape_product(f"{base_url}/static")
+
+    assert product["name"] == "Static Product"
+    assert pool.rendered == []
+
+def test_scripted_page_falls_back_to_browser(scraper, http_server, monkeypatch):
+    """Test that a page missing its h1 is re-parsed from the rendered HTML"""
+    pool = FakePool(html="<html><body><h1>Rendered Product</h1></body></html>")
+    use_pool(monkeypatch, pool)
+    base_url = http_server(PageHandler)
+
+    product = scraper.scrape_product(f"{base_url}/scripted")
+
+    assert product["name"] == "Rendered Product"
+    assert pool.rendered == [f"{base_url}/scripted"]
+    assert "Rendered Product" in scraper.snapshots[-1]
+
+def test_unavailable_browser_disables_fallback(scraper, http_server, monkeypatch):
+    """Test that a missing browser degrades to the static result once"""
+    pool = FakePool(error=BrowserUnavailableError("no chromium"))
+    use_pool(monkeypatch, pool)
+    base_url = http_server(PageHandler)
+
+    assert scraper.scrape_product(f"{base_url}/scripted")["name"] == "Unknown Product"
+    assert scraper.scrape_product(f"{base_url}/scripted")["name"] == "Unknown Product"
+    assert len(pool.rendered) == 1
+
+def test_failed_render_keeps_static_result(scraper, http_server, monkeypatch):
+    """Test that a render timeout falls back to the static parse without disabling the browser"""
+    pool = FakePool(error=TimeoutError("Timeout 30000ms exceeded"))
+    use_pool(monkeypatch, pool)
+    base_url = http_server(PageHandler)
+
+    assert scraper.scrape_product(f"{base_url}/scripted")["name"] == "Unknown Product"
+    assert scraper.scrape_product(f"{base_url}/scripted")["name"] == "Unknown Product"
+    assert len(pool.rendered) == 2
+    assert len(scraper.snapshots) == 2  # Static snapshots kept, nothing rendered to replace them
+
+def test_rendered_snapshot_replaces_static_one(scraper, http_server, monkeypatch, tmp_path):
+    """Test that the static snapshot is removed once the rendered one is saved, even within the same instant"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delattr(scraper, "_save_snapshot")
+    monkeypatch.setattr("app.scrapers.producthunt.time.time_ns", lambda: 1760000000000000000)
+    logged = []
+    monkeypatch.setattr(scraper, "_log_scrape_attempt", lambda **kwargs: logged.append(kwargs))
+    use_pool(monkeypatch, FakePool(html="<html><body><h1>Rendered Product</h1></body></html>"))
+    base_url = http_server(PageHandler)
+
+    assert scraper.scrape_product(f"{base_url}/scripted")["name"] == "Rendered Product"
+    snapshots = list((tmp_path / "data" / "raw").iterdir())
+    assert len(snapshots) == 1 and "Rendered Product" in snapshots[0].read_text(encoding="utf-8")
+    assert (tmp_path / logged[-1]["snapshot_path"]).exists()
+
+def test_tracker_hosts():
+    assert is_tracker("https://www.google-analytics.com/collect")
+    assert is_tracker("https://stats.g.doubleclick.net/r")
+    assert not is_tracker("https://www.producthunt.com/posts/x")
+
+def test_browser_pool_renders_and_blocks_images(http_server):
+    """Test a real render when Chromium is installed"""
+    pool = BrowserPool(contexts=2, max_pages=2, timeout=10)
+    try:
+        pool.start()
+    except BrowserUnavailableError as e:
+        pytest.skip(str(e))
+
+    base_url = http_server(PageHandler)
+    try:
+        html = pool.render(f"{base_url}/scripted", wait_for="h1")
+    finally:
+        pool.close()
+
+    assert "Rendered Product" in html
+    assert "/logo.png" not in PageHandler.requested
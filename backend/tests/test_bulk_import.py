@@ -0,0 +1,62 @@
+import asyncio
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.product import Product
+from app.models.marketplace import ListingPricePlan, Marketplace
+from app.core.config import settings
+from app.core.database import get_db
+from app.api.v1.endpoints import products
+from app.services.bulk_import import ndjson_lines
+
+def collect(chunks, max_line_bytes=100):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [line async for line in ndjson_lines(stream(), max_line_bytes)]
+    return asyncio.run(run())
+
+def test_lines_split_across_chunks():
+    assert collect([b'{"a":', b' 1}\n{"b"', b': 2}\n\n{"c": 3}']) == [
+        (1, b'{"a": 1}'), (2, b'{"b": 2}'), (3, b''), (4, b'{"c": 3}')
+    ]
+    # An over-long line is dropped while streaming, the following ones still come through
+    assert collect([b'x' * 8, b'x' * 8, b'\nok\n'], max_line_bytes=10) == [(1, None), (2, b'ok')]
+
+def line(name, url, **fields):
+    return json.dumps(dict({"name": name, "description": f"{name} app", "url": url}, **fields))
+
+def test_bulk_endpoint_upserts_in_chunks(db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_CHUNK_SIZE", 2)
+    db.add(Marketplace(name="G2", base_url="https://www.g2.com"))
+    db.commit()
+    app = FastAPI()
+    app.include_router(products.router, prefix="/api/v1/products")
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    body = "\n".join([
+        line("Alpha", "https://g2.com/alpha", tags=["crm"],
+             price_plans=[{"name": "Pro", "price": 20, "currency": "USD", "period": "monthly", "features": []}]),
+        "{not json",
+        line("Beta", "https://g2.com/beta"),
+        json.dumps({"name": "No URL"}),
+        "",
+        line("Alpha Renamed", "https://g2.com/alpha"),
+    ]) + "\n"
+    response = client.post("/api/v1/products/bulk", params={"marketplace": "G2", "with_estimates": False},
+                           content=body.encode("utf-8"), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["lines"], result["inserted"], result["updated"], result["failed"]) == (5, 2, 1, 2)
+    assert [error["line"] for error in result["errors"]] == [2, 4]
+    assert "Invalid JSON" in result["errors"][0]["error"]
+    assert "url" in result["errors"][1]["error"]
+
+    assert sorted(name for (name,) in db.query(Product.name)) == ["Alpha Renamed", "Beta"]
+    assert db.query(ListingPricePlan).count() == 0  # The later Alpha line had no plans
+
+    assert client.post("/api/v1/products/bulk", params={"marketplace": "Nope"}, content=b"").status_code == 404
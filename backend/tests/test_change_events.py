@@ -0,0 +1,62 @@
+import json
+import pytest
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.services import change_events
+from app.services.change_events import _messages, handle_notification, publish_changes
+from app.services.comparison import comparison_cache
+from app.services.ingestion import save_products_to_db
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Record the changes applied to this process's caches"""
+    changes = []
+    monkeypatch.setattr(change_events, "apply_change", lambda kind, ids=(): changes.append((kind, sorted(ids))))
+    return changes
+
+def test_changes_apply_on_commit_only(db, applied):
+    publish_changes(db, "product", [2, 1])
+    assert applied == []
+    db.commit()
+    assert applied == [("product", [1, 2])]
+
+    publish_changes(db, "estimate", [3])
+    db.rollback()
+    db.commit()
+    assert applied == [("product", [1, 2])]
+
+def test_savepoint_changes_wait_for_outer_commit(db, applied):
+    savepoint = db.begin_nested()
+    publish_changes(db, "merge", [4, 5])
+    savepoint.commit()
+    assert applied == []
+    db.commit()
+    assert applied == [("merge", [4, 5])]
+
+def test_ingestion_publishes_saved_products(db, applied):
+    save_products_to_db([
+        {"name": "Alpha", "url": "https://alpha.example.com", "description": "A"},
+        {"name": "Beta", "url": "https://beta.example.com", "description": "B"}
+    ], db, with_estimates=False)
+    assert [kind for kind, _ in applied] == ["product"]
+    assert len(applied[0][1]) == 2
+
+def test_comparison_entries_dropped_by_product():
+    comparison_cache.clear()
+    comparison_cache.set(((1, 2), ()), "one-two")
+    comparison_cache.set(((3,), ()), "three")
+    handle_notification(json.dumps({"kind": "product", "ids": [2]}))
+    assert comparison_cache.get(((1, 2), ())) is None
+    assert comparison_cache.get(((3,), ())) == "three"
+
+    handle_notification("not json")
+    handle_notification(json.dumps({"kind": "fx_rates", "ids": []}))
+    assert len(comparison_cache) == 0
+
+def test_messages_fit_notify_payload_limit():
+    messages = list(_messages("product", range(100000, 101200)))
+    assert len(messages) == 3
+    assert all(len(message) < 8000 for message in messages)
+    assert sum(len(json.loads(message)["ids"]) for message in messages) == 1200
+    assert [json.loads(message) for message in _messages("fx_rates", [])] == [{"kind": "fx_rates", "ids": []}]
+    with pytest.raises(ValueError):
+        publish_changes(None, "unknown")
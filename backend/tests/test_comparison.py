@@ -0,0 +1,95 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models import product, marketplace, estimate, traffic, scrape_log, fx_rate
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+from app.core.database import get_read_db
+from app.api.v1.endpoints import products
+from app.services import comparison
+from app.services.pricing import sync_price_plans
+
+def plan(name, price, period="monthly"):
+    return {"name": name, "price": price, "currency": "USD", "period": period, "features": []}
+
+def seed_catalog(db):
+    hunt = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    g2 = Marketplace(name="G2", base_url="https://www.g2.com")
+    db.add_all([hunt, g2])
+    db.flush()
+    alpha = Product(name="Alpha", canonical_url="https://alpha.example.com")
+    beta = Product(name="Beta", canonical_url="https://beta.example.com")
+    db.add_all([alpha, beta])
+    db.flush()
+    listings = [
+        ProductMarketplace(product_id=alpha.id, marketplace_id=hunt.id, listing_url="https://www.producthunt.com/posts/alpha",
+                           upvotes=100, rating=4, price_plans=[plan("Free", 0), plan("Pro", 20), plan("Team", 50)]),
+        # Same plans repeated on a second marketplace
+        ProductMarketplace(product_id=alpha.id, marketplace_id=g2.id, listing_url="https://www.g2.com/products/alpha",
+                           upvotes=5, rating=5, price_plans=[plan("Pro", 20)]),
+        ProductMarketplace(product_id=beta.id, marketplace_id=hunt.id, listing_url="https://www.producthunt.com/posts/beta",
+                           upvotes=300, rating=3, price_plans=[plan("Business", 1200, period="annually")]),
+    ]
+    db.add_all(listings)
+    db.flush()
+    for listing in listings:
+        sync_price_plans(db, listing)
+    db.add(MrrEstimate(product_id=alpha.id, mrr_low=1, mrr_likely=2, mrr_high=3, confidence=0.1))
+    db.add(MrrEstimate(product_id=alpha.id, mrr_low=500, mrr_likely=1000, mrr_high=1500, confidence=0.5))
+    db.add(TrafficData(product_id=beta.id, visits_month=42000, visits_growth=3.0))
+    db.commit()
+    return alpha, beta
+
+@pytest.fixture
+def client(db):
+    comparison.comparison_cache.clear()
+    app = FastAPI()
+    app.include_router(products.router, prefix="/api/v1/products")
+    app.dependency_overrides[get_read_db] = lambda: db
+    yield TestClient(app)
+    comparison.comparison_cache.clear()
+
+def test_compare_aligns_marketplaces_and_price_tiers(client, db):
+    """Test that columns follow the requested order and plans line up by normalized price"""
+    alpha, beta = seed_catalog(db)
+    response = client.get("/api/v1/products/compare", params={"ids": f"{beta.id},{alpha.id},999"})
+    assert response.status_code == 200
+    body = response.json()
+
+    assert [product["name"] for product in body["products"]] == ["Beta", "Alpha"]
+    assert body["missing_ids"] == [999]
+    assert body["products"][1]["estimates"]["mrr_likely"] == 1000
+    assert body["products"][0]["traffic"]["visits_month"] == 42000
+    assert body["products"][0]["highest_plan"]["usd_monthly_price"] == 100
+
+    rows = {row["marketplace"]: row["cells"] for row in body["marketplaces"]}
+    assert rows["G2"][0] is None and rows["G2"][1]["rating"] == 5
+    assert [cell["upvotes"] for cell in rows["Product Hunt"]] == [300, 100]
+
+    tiers = {row["tier"]: [plan and plan["name"] for plan in row["plans"]] for row in body["price_tiers"]}
+    assert tiers == {"free": [None, "Free"], "1": ["Business", "Pro"], "2": [None, "Team"]}
+
+def test_compare_cache_follows_product_changes(client, db):
+    """Test that cached comparisons are reused until a compared product changes"""
+    alpha, beta = seed_catalog(db)
+    ids = f"{alpha.id},{beta.id}"
+    first = client.get("/api/v1/products/compare", params={"ids": ids}).json()
+    assert len(comparison.comparison_cache) == 1
+
+    # Same id set in another order is served from the same entry
+    client.get("/api/v1/products/compare", params={"ids": f"{beta.id},{alpha.id}"})
+    assert len(comparison.comparison_cache) == 1
+
+    db.add(MrrEstimate(product_id=beta.id, mrr_low=10, mrr_likely=20, mrr_high=30, confidence=0.2))
+    db.commit()
+    second = client.get("/api/v1/products/compare", params={"ids": ids}).json()
+    assert first["products"][1]["estimates"] is None
+    assert second["products"][1]["estimates"]["mrr_likely"] == 20
+
+def test_compare_rejects_bad_ids(client, db):
+    seed_catalog(db)
+    assert client.get("/api/v1/products/compare", params={"ids": "1,x"}).status_code == 400
+    assert client.get("/api/v1/products/compare", params={"ids": ",".join(str(i) for i in range(20))}).status_code == 400
+    assert client.get("/api/v1/products/compare", params={"ids": "998,999"}).status_code == 404
@@ -0,0 +1,136 @@
+import pytest
+from datetime import date
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.history_rollup import MrrEstimateRollup, TrafficRollup
+from app.services.entity_resolution import (
+    EntityResolver, merge_products, normalize_name, normalize_url, registrable_domain, resolve_entities
+)
+from app.services.ingestion import save_products_to_db
+
+def test_normalize_url():
+    """Test that cosmetic URL differences normalize away"""
+    assert normalize_url("http://www.Example.com/pricing/?utm_source=ph&ref=x#plans") == \
+        "https://example.com/pricing"
+    assert normalize_url("example.com/app?b=2&a=1") == "https://example.com/app?a=1&b=2"
+    assert normalize_url("https://example.com:8080/") == "https://example.com:8080"
+
+def test_registrable_domain():
+    assert registrable_domain("https://app.example.com/login") == "example.com"
+    assert registrable_domain("https://www.shop.example.co.uk") == "example.co.uk"
+    assert registrable_domain("example.io") == "example.io"
+    assert registrable_domain(None) is None
+
+def test_normalize_name():
+    assert normalize_name("TaskFlow, Inc.") == "taskflow"
+    assert normalize_name("Café App") == "cafe"
+
+def test_resolver_clusters_by_name_and_domain():
+    """Test that lookalike names and shared domains match, while distinct products don't"""
+    resolver = EntityResolver(name_threshold=0.85)
+    resolver.add(1, "DataViz Studio", ["https://www.producthunt.com/posts/dataviz-studio"])
+    resolver.add(2, "DataViz Studio, Inc.", ["https://www.g2.com/products/dataviz-studio"])
+    resolver.add(3, "Acme Notes", ["https://acmenotes.io/?ref=producthunt"])
+    resolver.add(4, "Notes by Acme", ["https://app.acmenotes.io"])
+    resolver.add(5, "DataViz Studio", ["https://dataviz.dev"])
+    resolver.add(6, "DataViz Studio", ["https://othervizstudio.com"])
+    resolver.add(7, "CloudSync", [])
+
+    clusters = sorted(resolver.clusters())
+
+    # 5 and 6 share a name but have different websites, so at most one joins 1 and 2
+    assert [3, 4] in clusters
+    assert any(cluster[:2] == [1, 2] for cluster in clusters)
+    assert not any(5 in cluster and 6 in cluster for cluster in clusters)
+    assert not any(7 in cluster for cluster in clusters)
+
+def test_resolver_never_merges_numbered_variants():
+    """Test that names differing only in a version or edition number stay apart"""
+    resolver = EntityResolver(name_threshold=0.85)
+    for record_id, name in enumerate(["TaskFlow Pro 17", "TaskFlow Pro 18", "DataViz Studio 3", "DataViz Studio 4"]):
+        resolver.add(record_id, name, [f"https://www.producthunt.com/posts/{record_id}"])
+    resolver.add(4, "DataViz Studio, Inc. 4", ["https://www.g2.com/products/dataviz-studio-4"])
+
+    assert resolver.clusters() == [[3, 4]]
+
+def test_resolver_matches_normalized_urls():
+    """Test that one listing URL in two spellings is one product, even on a marketplace host"""
+    resolver = EntityResolver(name_threshold=0.85)
+    resolver.add(1, "TaskFlow", ["https://www.producthunt.com/posts/taskflow"])
+    resolver.add(2, "TaskFlow 2", ["http://producthunt.com/posts/taskflow/?utm_source=feed"])
+
+    assert resolver.clusters() == [[1, 2]]
+
+def test_ingestion_normalizes_canonical_urls(db):
+    """Test that saved canonical URLs are normalized and later spellings update the same product"""
+    product_data = {"name": "TaskFlow", "description": "Tasks", "url": "https://www.taskflow.io/?utm_source=ph"}
+    assert save_products_to_db([product_data], db, with_estimates=False) == 1
+    assert db.query(Product.canonical_url).scalar() == "https://taskflow.io"
+
+    renamed = dict(product_data, name="TaskFlow Pro", url="http://taskflow.io/")
+    assert save_products_to_db([renamed], db, with_estimates=False) == 1
+    assert [name for (name,) in db.query(Product.name)] == ["TaskFlow Pro"]
+
+def test_resolve_entities_merges_listings(db):
+    """Test that duplicates are folded into the oldest product with their listings and estimates"""
+    ph = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    g2 = Marketplace(name="G2", base_url="https://www.g2.com")
+    first = Product(name="TaskFlow Pro", canonical_url="https://www.producthunt.com/posts/taskflow-pro",
+                    tags=["saas"], categories=["Productivity"])
+    second = Product(name="TaskFlow Pro", canonical_url="https://www.g2.com/products/taskflow-pro",
+                     tags=["ai", "saas"], categories=[])
+    other = Product(name="SecureChat", canonical_url="https://www.producthunt.com/posts/securechat")
+    db.add_all([ph, g2, first, second, other])
+    db.flush()
+    db.add_all([
+        ProductMarketplace(product_id=first.id, marketplace_id=ph.id, listing_url=first.canonical_url),
+        ProductMarketplace(product_id=second.id, marketplace_id=g2.id, listing_url=second.canonical_url),
+        MrrEstimate(product_id=second.id, mrr_low=1, mrr_likely=2, mrr_high=3, confidence=0.5)
+    ])
+    db.commit()
+    first_id, second_id = first.id, second.id
+
+    clusters = resolve_entities(db)
+
+    assert clusters == [[first_id, second_id]]
+    assert db.query(Product).count() == 2
+    survivor = db.get(Product, first_id)
+    assert survivor.tags == ["saas", "ai"]
+    assert sorted(listing.marketplace_id for listing in survivor.marketplaces) == sorted([ph.id, g2.id])
+    assert db.query(MrrEstimate).filter(MrrEstimate.product_id == first_id).count() == 1
+
+def test_merge_products_folds_rollups(db):
+    """Test that weekly rollups move to the survivor and colliding weeks are merged by sample weight"""
+    week, next_week = date(2024, 1, 1), date(2024, 1, 8)
+    survivor = Product(name="TaskFlow Pro", canonical_url="https://www.producthunt.com/posts/taskflow-pro")
+    duplicate = Product(name="TaskFlow Pro", canonical_url="https://www.g2.com/products/taskflow-pro")
+    db.add_all([survivor, duplicate])
+    db.flush()
+    db.add_all([
+        TrafficRollup(product_id=survivor.id, week_start=week, samples=1, visits_month_avg=100,
+                      visits_month_min=100, visits_month_max=100, visits_growth_avg=0.1),
+        TrafficRollup(product_id=duplicate.id, week_start=week, samples=3, visits_month_avg=200,
+                      visits_month_min=150, visits_month_max=250, visits_growth_avg=0.3),
+        TrafficRollup(product_id=duplicate.id, week_start=next_week, samples=2, visits_month_avg=300,
+                      visits_month_min=300, visits_month_max=300, visits_growth_avg=0.2),
+        MrrEstimateRollup(product_id=duplicate.id, week_start=week, samples=2, mrr_low_avg=1,
+                          mrr_likely_avg=2, mrr_high_avg=3, confidence_avg=0.5)
+    ])
+    db.commit()
+    survivor_id = survivor.id
+
+    merge_products(db, survivor, [duplicate])
+    db.commit()
+
+    traffic = {rollup.week_start: rollup for rollup in db.query(TrafficRollup)}
+    assert {rollup.product_id for rollup in traffic.values()} == {survivor_id}
+    assert traffic[week].samples == 4
+    assert traffic[week].visits_month_avg == 175
+    assert traffic[week].visits_month_min == 100
+    assert traffic[week].visits_month_max == 250
+    assert traffic[week].visits_growth_avg == pytest.approx(0.25)
+    assert traffic[next_week].samples == 2
+    estimates = db.query(MrrEstimateRollup).all()
+    assert [(rollup.product_id, rollup.samples) for rollup in estimates] == [(survivor_id, 2)]
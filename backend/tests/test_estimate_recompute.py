@@ -0,0 +1,107 @@
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+from app.schemas.product import TrafficInfo
+from app.services.mrr_estimator import MrrEstimator
+from app.services.estimate_recompute import EstimateRecomputer, has_stale_estimates
+from app.services.ingestion import save_products_to_db
+
+PLANS = [{"name": "Pro", "price": 49, "currency": "USD", "period": "monthly", "features": [], "is_popular": True}]
+
+def seed_catalog(db, count=3):
+    marketplace = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    db.add(marketplace)
+    db.flush()
+    for i in range(count):
+        product = Product(name=f"Product {i}", canonical_url=f"https://www.producthunt.com/posts/p{i}")
+        db.add(product)
+        db.flush()
+        db.add(ProductMarketplace(product_id=product.id, marketplace_id=marketplace.id,
+                                  listing_url=product.canonical_url, price_plans=PLANS))
+        db.add(TrafficData(product_id=product.id, visits_month=20000 * (i + 1), visits_growth=5.0))
+    db.commit()
+
+def test_recompute_skips_unchanged_products(db):
+    """Test that a second pass writes nothing and only changed inputs produce new rows"""
+    seed_catalog(db)
+    recomputer = EstimateRecomputer(batch_size=2, pause=0)
+
+    first = recomputer.run(db)
+    assert (first.written, first.skipped) == (3, 0)
+    assert not has_stale_estimates(db)
+
+    second = recomputer.run(db)
+    assert (second.written, second.skipped) == (0, 3)
+
+    db.add(TrafficData(product_id=2, visits_month=999999, visits_growth=1.0))
+    db.commit()
+    third = recomputer.run(db)
+    assert (third.written, third.skipped) == (1, 2)
+
+    latest = db.query(MrrEstimate).filter(MrrEstimate.product_id == 2).order_by(MrrEstimate.id.desc()).first()
+    assert latest.mrr_likely == 49 * int(999999 * 0.005)
+
+def test_version_bump_recomputes_everything(db):
+    """Test that estimates from an older estimator version are treated as stale"""
+    seed_catalog(db)
+    EstimateRecomputer(pause=0).run(db)
+
+    class NextEstimator(MrrEstimator):
+        VERSION = "next"
+
+    assert has_stale_estimates(db, version="next")
+    pauses = []
+    stats = EstimateRecomputer(estimator=NextEstimator(), batch_size=1, pause=0.25, sleep=pauses.append).run(db)
+    assert stats.written == 3
+    assert pauses == [0.25, 0.25, 0.25]
+    assert not has_stale_estimates(db, version="next")
+
+class FixedTraffic:
+    def estimate_traffic(self, url):
+        return TrafficInfo(visits_month=5000, visits_growth=2.0)
+
+def test_ingestion_skips_unchanged_estimates(db, monkeypatch):
+    """Test that re-saving an unchanged product doesn't add another estimate"""
+    monkeypatch.setattr("app.services.ingestion.TrafficEstimator", FixedTraffic)
+    product_data = {"name": "Same", "description": "", "url": "https://www.producthunt.com/posts/same",
+                    "price_plans": PLANS}
+
+    save_products_to_db([product_data], db, record_history=False)
+    save_products_to_db([product_data], db, record_history=False)
+    assert db.query(MrrEstimate).count() == 1
+
+    save_products_to_db([dict(product_data, price_plans=[dict(PLANS[0], price=99)])], db, record_history=False)
+    assert db.query(MrrEstimate).count() == 2
+
+def test_parallel_recompute_with_category_and_resume(db):
+    """Test process-pool recompute filtered by category and resumed after a product id"""
+    seed_catalog(db, count=6)
+    for product in db.query(Product):
+        product.categories = ["Finance"] if product.id % 2 else ["Design"]
+    db.commit()
+
+    recomputer = EstimateRecomputer(batch_size=2, pause=0, workers=2)
+    stats = recomputer.run(db, category="Finance", read_db=db)
+    assert (stats.scanned, stats.written) == (3, 3)
+    assert {e.product_id for e in db.query(MrrEstimate)} == {1, 3, 5}
+
+    resumed = recomputer.run(db, start_after=4)
+    assert (resumed.scanned, resumed.written, resumed.skipped) == (2, 1, 1)
+    assert resumed.last_product_id == 6
+
+def test_category_filter_matches_whole_categories(db):
+    """Test that --category matches one of several categories exactly, never a substring"""
+    seed_catalog(db, count=5)
+    categories = [["Design", "Finance"], ["Fintech"], ["Finance"], ["Personal Finance", "AI"], None]
+    for product, product_categories in zip(db.query(Product).order_by(Product.id), categories):
+        product.categories = product_categories
+    db.commit()
+
+    recomputer = EstimateRecomputer(batch_size=2, pause=0)
+    assert recomputer.run(db, category="Finance").scanned == 2
+    assert {e.product_id for e in db.query(MrrEstimate)} == {1, 3}
+    # Streamed ids take the same filter
+    assert [chunk for chunk in recomputer._streamed_ids(db, 0, "AI")] == [[4]]
+
@@ -0,0 +1,101 @@
+from datetime import date, datetime, timedelta
+from app.models import product, marketplace, estimate, traffic, scrape_log, history_rollup
+from app.models.product import Product
+from app.models.scrape_log import ScrapeLog
+from app.models.traffic import TrafficData
+from app.models.estimate import MrrEstimate
+from app.models.history_rollup import MrrEstimateRollup, ScrapeLogRollup, TrafficRollup
+from app.core.config import settings
+from app.services.history_retention import maintain_history, next_month, partition_ddl, period_start
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+def test_scrape_logs_rolled_up_per_day(db, monkeypatch):
+    """Test that old logs become daily counts and recent ones stay raw"""
+    monkeypatch.setattr(settings, "SCRAPE_LOG_RAW_RETENTION_DAYS", 30)
+    old = NOW - timedelta(days=60)
+    db.add_all([
+        ScrapeLog(url="a", status="success", duration=100, timestamp=old),
+        ScrapeLog(url="b", status="success", duration=300, timestamp=old + timedelta(hours=1)),
+        ScrapeLog(url="c", status="error", duration=50, timestamp=old),
+        ScrapeLog(url="d", status="success", duration=10, timestamp=NOW - timedelta(days=1)),
+    ])
+    db.commit()
+
+    stats = maintain_history(db, now=NOW)
+    assert stats.rolled_up["scrape_logs"] == 3
+    assert [log.url for log in db.query(ScrapeLog)] == ["d"]
+    rollups = {rollup.status: rollup for rollup in db.query(ScrapeLogRollup)}
+    assert rollups["success"].day == old.date()
+    assert (rollups["success"].requests, rollups["success"].total_duration, rollups["success"].max_duration) == (2, 400, 300)
+    assert rollups["error"].requests == 1
+
+    # A second run has nothing left to roll up and doesn't double count
+    assert maintain_history(db, now=NOW).rolled_up["scrape_logs"] == 0
+    assert db.query(ScrapeLogRollup).filter(ScrapeLogRollup.status == "success").one().requests == 2
+
+def test_rollups_merge_into_existing_period(db, monkeypatch):
+    """Test that a period already rolled up (e.g. after a retention change) is added to, not replaced"""
+    monkeypatch.setattr(settings, "SCRAPE_LOG_RAW_RETENTION_DAYS", 30)
+    old = NOW - timedelta(days=60)
+    db.add_all([
+        ScrapeLogRollup(day=old.date(), status="success", requests=1, total_duration=500, max_duration=500),
+        ScrapeLog(url="a", status="success", duration=100, timestamp=old),
+        ScrapeLog(url="b", status="success", duration=None, timestamp=old),
+        ScrapeLog(url="c", status="timeout", duration=900, timestamp=old),
+    ])
+    db.commit()
+
+    assert maintain_history(db, now=NOW).rolled_up["scrape_logs"] == 3
+    rollups = {rollup.status: rollup for rollup in db.query(ScrapeLogRollup)}
+    assert (rollups["success"].requests, rollups["success"].total_duration, rollups["success"].max_duration) == (3, 600, 500)
+    assert (rollups["timeout"].requests, rollups["timeout"].max_duration) == (1, 900)
+
+def test_traffic_and_estimates_keep_latest_row(db, monkeypatch):
+    """Test weekly rollups that never remove a product's most recent row"""
+    monkeypatch.setattr(settings, "TRAFFIC_RAW_RETENTION_DAYS", 90)
+    monkeypatch.setattr(settings, "ESTIMATE_RAW_RETENTION_DAYS", 90)
+    active = Product(name="Active", canonical_url="https://active.example.com")
+    stale = Product(name="Stale", canonical_url="https://stale.example.com")
+    db.add_all([active, stale])
+    db.flush()
+    monday = datetime(2026, 3, 2, 9, 0)
+    db.add_all([
+        TrafficData(product_id=active.id, visits_month=1000, visits_growth=1.0, created_at=monday),
+        TrafficData(product_id=active.id, visits_month=3000, visits_growth=3.0, created_at=monday + timedelta(days=3)),
+        TrafficData(product_id=active.id, visits_month=5000, created_at=NOW - timedelta(days=1)),
+        # The only traffic row of a product that hasn't been scraped in a long time
+        TrafficData(product_id=stale.id, visits_month=700, created_at=monday),
+        MrrEstimate(product_id=active.id, mrr_low=50, mrr_likely=100, mrr_high=150, confidence=0.5, created_at=monday),
+        MrrEstimate(product_id=active.id, mrr_low=100, mrr_likely=200, mrr_high=300, confidence=0.7, created_at=NOW),
+    ])
+    db.commit()
+
+    stats = maintain_history(db, now=NOW)
+    assert stats.rolled_up == {"scrape_logs": 0, "traffic_data": 2, "mrr_estimates": 1}
+    assert sorted(row.visits_month for row in db.query(TrafficData)) == [700, 5000]
+
+    rollup = db.query(TrafficRollup).one()
+    assert (rollup.product_id, rollup.week_start, rollup.samples) == (active.id, date(2026, 3, 2), 2)
+    assert (rollup.visits_month_avg, rollup.visits_month_min, rollup.visits_month_max) == (2000, 1000, 3000)
+    assert rollup.visits_growth_avg == 2.0
+    assert db.query(MrrEstimateRollup).one().mrr_likely_avg == 100
+    assert db.query(MrrEstimate).one().mrr_likely == 200
+
+def test_expired_rollups_deleted(db, monkeypatch):
+    monkeypatch.setattr(settings, "ROLLUP_RETENTION_DAYS", 365)
+    db.add_all([
+        ScrapeLogRollup(day=date(2024, 1, 1), status="success", requests=1, total_duration=1),
+        ScrapeLogRollup(day=date(2026, 1, 1), status="success", requests=1, total_duration=1),
+    ])
+    db.commit()
+    assert maintain_history(db, now=NOW).rollups_deleted == 1
+    assert db.query(ScrapeLogRollup).one().day == date(2026, 1, 1)
+
+def test_partition_helpers():
+    assert period_start(datetime(2026, 10, 18, 23, 0), "week") == date(2026, 10, 12)
+    assert next_month(date(2026, 12, 1)) == date(2027, 1, 1)
+    assert partition_ddl("scrape_logs", date(2026, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS scrape_logs_p202612 PARTITION OF scrape_logs "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+    )
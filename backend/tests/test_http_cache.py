@@ -0,0 +1,81 @@
+import pytest
+from http.server import BaseHTTPRequestHandler
+from app.scrapers.http_cache import HttpValidatorCache
+from app.scrapers.producthunt import ProductHuntScraper
+
+PAGE = """<html><head><meta name="description" content="A test product"></head>
+<body><h1>Fixture Product</h1><button>150 upvotes</button>
+<a href="/topics/productivity">Productivity</a></body></html>"""
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """Serves a single page with an ETag and a Last-Modified date"""
+    etag = '"v1"'
+    last_modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+    requests_seen = []
+
+    def do_GET(self):
+        ConditionalHandler.requests_seen.append(dict(self.headers))
+        if self.path == "/etag-only" and self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path == "/date-only" and self.headers.get("If-Modified-Since") == self.last_modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/etag-only":
+            self.send_header("ETag", self.etag)
+        elif self.path == "/date-only":
+            self.send_header("Last-Modified", self.last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    """Product Hunt scraper with no delay, a temp cache and captured scrape logs"""
+    scraper = ProductHuntScraper()
+    scraper.delay = 0
+    scraper.http_cache = HttpValidatorCache(str(tmp_path / "http_cache"))
+    scraper.logged = []
+    monkeypatch.setattr(scraper, "_log_scrape_attempt", lambda **kwargs: scraper.logged.append(kwargs))
+    monkeypatch.setattr(scraper, "_save_snapshot", lambda content, filename: str(tmp_path / filename))
+    ConditionalHandler.requests_seen = []
+    return scraper
+
+def test_etag_revalidation_short_circuits(scraper, http_server):
+    """Test that a 304 on If-None-Match skips parsing and logs not_modified"""
+    base_url = http_server(ConditionalHandler)
+    url = f"{base_url}/etag-only"
+
+    first = scraper.scrape_product(url)
+    assert first["name"] == "Fixture Product"
+    assert first["upvotes"] == 150
+    assert scraper.logged[-1]["status"] == "success"
+
+    second = scraper.scrape_product(url)
+    assert second is None
+    assert ConditionalHandler.requests_seen[-1]["If-None-Match"] == '"v1"'
+    assert scraper.logged[-1]["status"] == "not_modified"
+    assert scraper.logged[-1]["status_code"] == 304
+
+def test_last_modified_revalidation(scraper, http_server):
+    """Test that Last-Modified is replayed as If-Modified-Since"""
+    base_url = http_server(ConditionalHandler)
+    url = f"{base_url}/date-only"
+
+    assert scraper.scrape_product(url) is not None
+    assert scraper.scrape_product(url) is None
+    assert ConditionalHandler.requests_seen[-1]["If-Modified-Since"] == ConditionalHandler.last_modified
+
+def test_no_validators_means_unconditional_request(tmp_path):
+    """Test that URLs without stored validators get no conditional headers"""
+    cache = HttpValidatorCache(str(tmp_path))
+    assert cache.conditional_headers("https://example.com/unknown") == {}
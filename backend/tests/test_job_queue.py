@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job
+from app.models.marketplace import Marketplace
+from app.services.job_queue import ScrapeJobQueue
+
+@pytest.fixture
+def marketplace_id(db):
+    marketplace = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    db.add(marketplace)
+    db.commit()
+    return marketplace.id
+
+def test_enqueue_skips_duplicate_urls(db, marketplace_id):
+    """Test that re-enqueueing a URL in the same run is a no-op"""
+    queue = ScrapeJobQueue(lease_seconds=60, max_attempts=3)
+
+    assert queue.enqueue(db, "run1", marketplace_id, ["https://a.test/1", "https://a.test/2"]) == 2
+    assert queue.enqueue(db, "run1", marketplace_id, ["https://a.test/2", "https://a.test/3"]) == 1
+    assert queue.stats(db, "run1")["pending"] == 3
+
+def test_claimed_jobs_are_not_handed_out_twice(db, marketplace_id):
+    """Test that a leased job is invisible to other workers until the lease expires"""
+    queue = ScrapeJobQueue(lease_seconds=60, max_attempts=3)
+    queue.enqueue(db, "run1", marketplace_id, ["https://a.test/1"])
+    now = datetime(2024, 1, 1)
+
+    [job] = queue.claim(db, "worker-a", now=now)
+    assert job.state == "running"
+    assert job.attempts == 1
+    assert queue.claim(db, "worker-b", now=now + timedelta(seconds=30)) == []
+
+    # Renewal keeps the job leased past its original expiry
+    assert queue.renew_lease(db, job.id, "worker-a", now=now + timedelta(seconds=50))
+    assert queue.claim(db, "worker-b", now=now + timedelta(seconds=70)) == []
+
+    # A crashed worker's lease eventually expires and the job is reclaimed
+    [reclaimed] = queue.claim(db, "worker-b", now=now + timedelta(seconds=200))
+    assert reclaimed.id == job.id
+    assert reclaimed.lease_owner == "worker-b"
+    assert reclaimed.attempts == 2
+    assert not queue.renew_lease(db, job.id, "worker-a", now=now + timedelta(seconds=201))
+
+def test_failed_jobs_retry_until_max_attempts(db, marketplace_id):
+    """Test that failures are retried and then marked failed"""
+    queue = ScrapeJobQueue(lease_seconds=60, max_attempts=2)
+    queue.enqueue(db, "run1", marketplace_id, ["https://a.test/1"])
+
+    [job] = queue.claim(db, "worker-a")
+    assert queue.fail(db, job, "worker-a", "timeout")
+    assert job.state == "pending"
+
+    [job] = queue.claim(db, "worker-a")
+    assert queue.fail(db, job, "worker-a", "timeout")
+    assert job.state == "failed"
+    assert queue.claim(db, "worker-a") == []
+
+    # Resuming the run gives failed jobs a fresh set of attempts
+    assert queue.resume(db, "run1") == 1
+    [job] = queue.claim(db, "worker-a")
+    assert queue.complete(db, job, "worker-a")
+    assert queue.stats(db, "run1") == {"pending": 0, "running": 0, "done": 1, "failed": 0}
+
+def test_only_the_lease_holder_can_finish_a_job(db, marketplace_id):
+    """Test that a worker whose lease expired cannot complete, fail or defer a job reclaimed by another"""
+    queue = ScrapeJobQueue(lease_seconds=60, max_attempts=3)
+    queue.enqueue(db, "run1", marketplace_id, ["https://a.test/1"])
+    now = datetime(2024, 1, 1)
+
+    [stale] = queue.claim(db, "worker-a", now=now)
+    assert not queue.complete(db, stale, "worker-a", now=now + timedelta(seconds=61))
+    [job] = queue.claim(db, "worker-b", now=now + timedelta(seconds=70))
+
+    assert not queue.complete(db, job, "worker-a", now=now + timedelta(seconds=80))
+    assert not queue.fail(db, job, "worker-a", "timeout", now=now + timedelta(seconds=80))
+    assert not queue.defer(db, job, "worker-a", now + timedelta(hours=1), now=now + timedelta(seconds=80))
+    assert (job.state, job.lease_owner, job.attempts) == ("running", "worker-b", 2)
+
+    assert queue.defer(db, job, "worker-b", now + timedelta(hours=1), now=now + timedelta(seconds=80))
+    assert (job.state, job.lease_owner, job.attempts) == ("pending", None, 1)
@@ -1,5 +1,7 @@
 import pytest
+import random
 from app.services.mrr_estimator import MrrEstimator
+from app.services.mrr_simulation import MonteCarloMrrModel
 from app.schemas.product import MarketplaceListing, PricePlan
 
 def test_mrr_estimator_initialization():
@@ -141,4 +143,78 @@ def test_mrr_estimate_with_multiple_price_plans():
     assert estimate.mrr_low >= 0
     assert estimate.mrr_likely >= 0
     assert estimate.mrr_high >= 0
-    assert estimate.mrr_low <= estimate.mrr_likely <= estimate.mrr_high
\ No newline at end of file
+    assert estimate.mrr_low <= estimate.mrr_likely <= estimate.mrr_high
+
+def test_mrr_estimate_batch_matches_single():
+    """Test that the vectorized batch matches estimate_mrr exactly, including tier edges and rounding ties"""
+    estimator = MrrEstimator()
+    rng = random.Random(7)
+    prices = [0.0, 9.0, 29.99, 0.125, 0.005, 12.345, 99.5, 0.015, 1e6 / 3] + \
+        [round(rng.uniform(0, 500), rng.choice([0, 2, 3])) for _ in range(2000)]
+    visits = [0, 1, 999, 1000, 1001, 10000, 10001, 100000, 100001] + \
+        [rng.randint(0, 5000000) for _ in range(2000)]
+
+    batch = estimator.estimate_mrr_batch(prices, visits)
+
+    for i, (price, visits_month) in enumerate(zip(prices, visits)):
+        listing = MarketplaceListing(
+            name="Test Marketplace",
+            listing_url="https://test.com/listing",
+            price_plans=[PricePlan(name="Plan", price=price, currency="USD", period="monthly", features=[])]
+        )
+        single = estimator.estimate_mrr({}, [listing], {"visits_month": visits_month})
+        assert single.mrr_low == batch["mrr_low"][i]
+        assert single.mrr_likely == batch["mrr_likely"][i]
+        assert single.mrr_high == batch["mrr_high"][i]
+        assert single.confidence == batch["confidence"][i]
+        assert single.assumptions == estimator.build_assumptions(
+            batch["conversion_rate"][i], visits_month, int(batch["estimated_customers"][i]), price
+        )
+
+def test_monte_carlo_bands_are_deterministic_and_batch_independent():
+    """Test that Monte Carlo bands depend only on the inputs and the seed"""
+    estimator = MrrEstimator(mode="monte_carlo", simulation=MonteCarloMrrModel(samples=5000, seed=7))
+    plans = [[0, 19, 49, 99], [29], [], [9, 19]]
+    popular = [[False, False, True, False], [False], [], [True, False]]
+    visits = [250000, 5000, 80000, 900]
+
+    batch = estimator.estimate_mrr_monte_carlo_batch(plans, visits, popular)
+    again = MrrEstimator(mode="monte_carlo", simulation=MonteCarloMrrModel(samples=5000, seed=7))
+    single = again.estimate_mrr_monte_carlo_batch(plans[3:], visits[3:], popular[3:])
+
+    assert batch["mrr_likely"][3] == single["mrr_likely"][0]
+    assert batch["mrr_high"][3] == single["mrr_high"][0]
+    assert all(batch["mrr_low"] <= batch["mrr_likely"]) and all(batch["mrr_likely"] <= batch["mrr_high"])
+    # No paid plans means no revenue
+    assert batch["mrr_high"][2] == 0
+    assert all((0 <= batch["confidence"]) & (batch["confidence"] <= 1))
+
+def test_monte_carlo_draws_are_shared_across_batches():
+    """Test that one set of draws serves every batch, so per-product work is a few matrix products"""
+    simulation = MonteCarloMrrModel(samples=10000)
+    estimator = MrrEstimator(mode="monte_carlo", simulation=simulation)
+    plans = [[0, 19, 49, 99]] * 500
+    visits = list(range(1000, 501000, 1000))
+
+    batch = estimator.estimate_mrr_monte_carlo_batch(plans, visits)
+    noise, plan_mix = simulation._draws
+    assert noise.shape == (10000,) and plan_mix.shape == (10000, simulation.max_plans)
+    assert len(batch["mrr_likely"]) == 500
+
+    estimator.estimate_mrr_monte_carlo_batch(plans[:1], visits[:1])
+    assert simulation._draws[0] is noise
+
+    listing = MarketplaceListing(
+        name="Test Marketplace",
+        listing_url="https://test.com/listing",
+        price_plans=[PricePlan(name="Pro", price=49.0, currency="USD", period="monthly", features=[])]
+    )
+    estimate = estimator.estimate_mrr({}, [listing], {"visits_month": 20000})
+    assert estimate.mrr_low <= estimate.mrr_likely <= estimate.mrr_high
+    assert "Monte Carlo" in estimate.methodology
+
+def test_unknown_mode_and_distribution_are_rejected():
+    with pytest.raises(ValueError):
+        MrrEstimator(mode="guess")
+    with pytest.raises(ValueError):
+        MonteCarloMrrModel(conversion_distribution="cauchy")
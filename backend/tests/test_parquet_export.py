@@ -0,0 +1,118 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.estimate import MrrEstimate
+from app.models.traffic import TrafficData
+
+pq = pytest.importorskip("pyarrow.parquet")
+from app.services.parquet_export import export_catalog, load_manifest
+from app.services.entity_resolution import merge_products
+
+T0 = datetime(2026, 10, 1, 12, 0)
+
+def seed_catalog(db):
+    hunt = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    alpha = Product(name="Alpha", canonical_url="https://alpha.example.com", tags=["ai"], created_at=T0, updated_at=T0)
+    beta = Product(name="Beta", canonical_url="https://beta.example.com", created_at=T0, updated_at=T0)
+    db.add_all([hunt, alpha, beta])
+    db.flush()
+    db.add_all([
+        ProductMarketplace(product_id=alpha.id, marketplace_id=hunt.id, listing_url="https://ph/alpha",
+                           price_plans=[{"name": "Pro", "price": 10}], created_at=T0, updated_at=T0),
+        MrrEstimate(product_id=alpha.id, mrr_likely=100, assumptions=["old"], created_at=T0, updated_at=T0),
+        MrrEstimate(product_id=alpha.id, mrr_likely=200, assumptions=["new"], created_at=T0, updated_at=T0),
+        MrrEstimate(product_id=beta.id, mrr_likely=50, created_at=T0, updated_at=T0),
+        TrafficData(product_id=beta.id, visits_month=1000, created_at=T0, updated_at=T0),
+    ])
+    db.commit()
+    return alpha, beta
+
+def read(export_dir, path):
+    return pq.read_table(os.path.join(export_dir, path)).to_pylist()
+
+def test_full_then_incremental_export(db, tmp_path):
+    alpha, beta = seed_catalog(db)
+    export_dir = str(tmp_path)
+
+    first = export_catalog(db, export_dir, now=T0 + timedelta(hours=1))
+    assert first.mode == "full"
+    assert first.rows == {"products": 2, "listings": 1, "estimates": 2, "traffic": 1}
+    products_file = next(path for path in first.files if path.startswith("products"))
+    assert "snapshot_date=2026-10-01" in products_file
+    assert {row["name"]: row["tags"] for row in read(export_dir, products_file)} == {"Alpha": ["ai"], "Beta": []}
+    estimates = read(export_dir, next(path for path in first.files if path.startswith("estimates")))
+    assert sorted(row["mrr_likely"] for row in estimates) == [50, 200]  # Latest per product only
+
+    unchanged = export_catalog(db, export_dir, now=T0 + timedelta(days=1))
+    assert unchanged.mode == "incremental"
+    assert sum(unchanged.rows.values()) == 0 and unchanged.files == []
+
+    # A later update, and a new product tying the watermark's timestamp
+    alpha.name = "Alpha 2"
+    alpha.updated_at = T0 + timedelta(days=1)
+    db.add(Product(name="Gamma", canonical_url="https://gamma.example.com", created_at=T0, updated_at=T0))
+    db.add(MrrEstimate(product_id=beta.id, mrr_likely=75, created_at=T0 + timedelta(days=1)))
+    db.commit()
+
+    second = export_catalog(db, export_dir, now=T0 + timedelta(days=2))
+    assert second.rows == {"products": 2, "listings": 0, "estimates": 1, "traffic": 0, "deletions": 0}
+    products_file = next(path for path in second.files if path.startswith("products"))
+    assert "snapshot_date=2026-10-03" in products_file
+    assert sorted(row["name"] for row in read(export_dir, products_file)) == ["Alpha 2", "Gamma"]
+
+    manifest = load_manifest(export_dir)
+    assert manifest["last_mode"] == "incremental"
+    assert manifest["tables"]["products"]["watermark"] == (T0 + timedelta(days=1)).isoformat()
+    assert [entry["rows"] for entry in manifest["tables"]["products"]["files"]] == [2, 2]
+    assert manifest["tables"]["estimates"]["key"] == "product_id"
+
+    rerun = export_catalog(db, export_dir, full=True, now=T0 + timedelta(days=3))
+    assert rerun.mode == "full" and rerun.rows["products"] == 3
+    assert len(load_manifest(export_dir)["tables"]["products"]["files"]) == 1
+
+def test_incremental_export_writes_tombstones_for_merged_products(db, tmp_path):
+    """Test that products and listings deleted by a merge are tombstoned once"""
+    alpha, beta = seed_catalog(db)
+    export_dir = str(tmp_path)
+    export_catalog(db, export_dir, now=T0 + timedelta(hours=1))
+    beta_id = beta.id
+
+    merge_products(db, alpha, [beta])
+    db.commit()
+
+    stats = export_catalog(db, export_dir, now=T0 + timedelta(days=1))
+    assert stats.rows["deletions"] == 3
+    deletions_file = next(path for path in stats.files if path.startswith("deletions"))
+    assert "snapshot_date=2026-10-02" in deletions_file
+    tombstones = sorted((row["table"], row["key"]) for row in read(export_dir, deletions_file))
+    # Beta's estimate and traffic now belong to alpha, so its key is gone from both
+    assert tombstones == [("estimates", beta_id), ("products", beta_id), ("traffic", beta_id)]
+    assert load_manifest(export_dir)["deletions"]["files"][0]["rows"] == 3
+
+    # Already tombstoned keys aren't written again
+    assert export_catalog(db, export_dir, now=T0 + timedelta(days=2)).rows["deletions"] == 0
+
+
+def test_incremental_export_picks_up_late_commits(db, tmp_path):
+    """Test that rows committed late with a timestamp inside the lag window are still exported"""
+    alpha, beta = seed_catalog(db)
+    export_dir = str(tmp_path)
+    export_catalog(db, export_dir, now=T0 + timedelta(hours=1))
+
+    # Stamped before the watermark by a transaction that started earlier but committed after the export
+    db.add(Product(name="Late", canonical_url="https://late.example.com",
+                   created_at=T0 - timedelta(minutes=1), updated_at=T0 - timedelta(minutes=1)))
+    db.add(Product(name="Stale", canonical_url="https://stale.example.com",
+                   created_at=T0 - timedelta(days=1), updated_at=T0 - timedelta(days=1)))
+    db.commit()
+
+    stats = export_catalog(db, export_dir, now=T0 + timedelta(hours=2))
+    products_file = next(path for path in stats.files if path.startswith("products"))
+    assert [row["name"] for row in read(export_dir, products_file)] == ["Late"]
+    assert load_manifest(export_dir)["tables"]["products"]["watermark"] == T0.isoformat()
+
+    # Rows inside the lag window are only exported once
+    assert sum(export_catalog(db, export_dir, now=T0 + timedelta(hours=3)).rows.values()) == 0
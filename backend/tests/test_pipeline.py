@@ -0,0 +1,95 @@
+import pytest
+import threading
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.services.ingestion import build_scrape_pipeline
+from app.services.pipeline import FAILED, Checkpoint, Pipeline, Stage
+
+def test_items_flow_through_all_stages():
+    """Test that every item is transformed by each stage and batched at the end"""
+    written = []
+    pipeline = Pipeline([
+        Stage("double", lambda x: x * 2, workers=3, queue_size=2),
+        Stage("drop_odd_source", lambda x: x if x % 4 == 0 else None),
+        Stage("write", lambda batch: written.extend(batch) or batch, batch_size=5),
+    ])
+
+    stats = pipeline.run(range(20))
+
+    assert sorted(written) == [x * 2 for x in range(20) if x % 2 == 0]
+    assert stats["double"].processed == 20
+    assert stats["drop_odd_source"].dropped == 10
+    assert stats["write"].processed == 10
+
+def test_bounded_queue_applies_backpressure():
+    """Test that the source can't run ahead of a blocked stage by more than the queue size"""
+    release = threading.Event()
+    produced = []
+
+    def source():
+        for i in range(50):
+            produced.append(i)
+            yield i
+
+    pipeline = Pipeline([Stage("slow", lambda x: release.wait() and x, queue_size=3)])
+    runner = threading.Thread(target=pipeline.run, args=(source(),))
+    runner.start()
+    runner.join(timeout=0.3)
+
+    # One item in the worker, three queued, one blocked in put()
+    assert len(produced) <= 5
+    release.set()
+    runner.join()
+    assert len(produced) == 50
+
+def test_failed_items_do_not_stall_the_run():
+    """Test that a failing item is counted and skipped"""
+    def flaky(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    pipeline = Pipeline([Stage("flaky", flaky)])
+    stats = pipeline.run(range(6))
+
+    assert stats["flaky"].processed == 5
+    assert stats["flaky"].failed == 1
+    assert pipeline.checkpoint.next_index == 6
+
+def test_batch_stage_reports_failed_items():
+    """Test that items a batch stage marks FAILED are counted as failed, not written or dropped"""
+    pipeline = Pipeline([
+        Stage("write", lambda batch: [FAILED if x % 3 == 0 else (x if x % 3 == 1 else None) for x in batch], batch_size=4),
+    ])
+    stats = pipeline.run(range(9))
+
+    assert (stats["write"].processed, stats["write"].dropped, stats["write"].failed) == (3, 3, 3)
+    assert pipeline.checkpoint.next_index == 9
+
+def test_scrape_pipeline_counts_rows_that_failed_to_save(db):
+    """Test that the write stage only reports the products save_products_to_db actually saved"""
+    scraper = type("Scraper", (), {"marketplace_name": "Product Hunt"})()
+    saved = []
+    pipeline = build_scrape_pipeline(scraper, db, batch_size=10, on_saved=saved.extend)
+    products = [
+        {"name": "Alpha", "description": "A", "url": "https://alpha.example.com"},
+        {"name": "Broken", "url": "https://broken.example.com"},  # No description: the row fails
+    ]
+    stats = pipeline.run(products)
+
+    assert (stats["write"].processed, stats["write"].failed) == (1, 1)
+    assert [product_data["name"] for product_data in saved] == ["Alpha"]
+
+def test_checkpoint_resumes_after_crash(tmp_path):
+    """Test that a new run skips items finished before the checkpoint was saved"""
+    path = str(tmp_path / "checkpoint.json")
+
+    first = Checkpoint(path, flush_every=1)
+    for index in (0, 1, 2, 4):
+        first.finish(index)
+    assert first.next_index == 3
+
+    seen = []
+    pipeline = Pipeline([Stage("write", lambda x: seen.append(x) or x)], checkpoint=Checkpoint(path))
+    pipeline.run(range(6))
+
+    assert seen == [3, 4, 5]
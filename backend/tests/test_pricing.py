@@ -0,0 +1,64 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models import product, marketplace, estimate, traffic, scrape_log, fx_rate
+from app.models.product import Product
+from app.models.marketplace import ListingPricePlan
+from app.core.database import get_read_db
+from app.api.v1.endpoints import products
+from app.services.ingestion import save_products_to_db
+from app.services.pricing import DEFAULT_FX_RATES, backfill_price_plans, max_usd_monthly_prices, usd_monthly_price
+
+def plan(name, price, currency="USD", period="monthly"):
+    return {"name": name, "price": price, "currency": currency, "period": period, "features": []}
+
+def scraped(name, plans):
+    return {"name": name, "url": f"https://www.producthunt.com/posts/{name.lower()}", "description": "",
+            "tags": [], "categories": [], "upvotes": 1, "price_plans": plans}
+
+def test_usd_monthly_price_normalization():
+    """Test that periods and currencies are normalized to USD per month"""
+    assert usd_monthly_price(120, "USD", "annually", DEFAULT_FX_RATES) == 10
+    assert usd_monthly_price(10, "eur", "monthly", DEFAULT_FX_RATES) == 10.8
+    assert usd_monthly_price(360, "USD", "lifetime", DEFAULT_FX_RATES) == 10
+    assert usd_monthly_price(10, "USD", None, DEFAULT_FX_RATES) == 10
+    assert usd_monthly_price(10, "XYZ", "monthly", DEFAULT_FX_RATES) is None
+
+def test_ingestion_keeps_plan_rows_in_sync(db):
+    """Test that saving a listing replaces its normalized plan rows"""
+    save_products_to_db([scraped("Alpha", [plan("Free", 0), plan("Pro", 240, period="yearly")])], db, with_estimates=False)
+    rows = db.query(ListingPricePlan).order_by(ListingPricePlan.price).all()
+    assert [(row.name, row.is_free, row.usd_monthly_price) for row in rows] == [("Free", True, 0), ("Pro", False, 20)]
+
+    save_products_to_db([scraped("Alpha", [plan("Pro", 30)])], db, with_estimates=False)
+    rows = db.query(ListingPricePlan).all()
+    assert [(row.name, row.usd_monthly_price) for row in rows] == [("Pro", 30)]
+    assert max_usd_monthly_prices(db, [rows[0].product_id]) == {rows[0].product_id: 30}
+
+def test_backfill_rebuilds_from_scraped_plans(db):
+    save_products_to_db([scraped("Alpha", [plan("Pro", 10, currency="GBP")])], db, with_estimates=False)
+    db.query(ListingPricePlan).delete()
+    db.commit()
+    assert backfill_price_plans(db) == 1
+    assert db.query(ListingPricePlan.usd_monthly_price).scalar() == 12.7
+
+def test_price_filters(db):
+    """Test the min_price, max_price and has_free_plan list filters"""
+    save_products_to_db([
+        scraped("Alpha", [plan("Free", 0), plan("Pro", 20)]),
+        scraped("Beta", [plan("Team", 600, period="annually")]),
+        scraped("Gamma", [plan("Biz", 99)]),
+    ], db, with_estimates=False)
+
+    app = FastAPI()
+    app.include_router(products.router, prefix="/api/v1/products")
+    app.dependency_overrides[get_read_db] = lambda: db
+    client = TestClient(app)
+
+    def names(**params):
+        return sorted(item["name"] for item in client.get("/api/v1/products/", params=params).json()["products"])
+
+    assert names(min_price=10, max_price=60) == ["Alpha", "Beta"]
+    assert names(min_price=50) == ["Beta", "Gamma"]
+    assert names(has_free_plan=True) == ["Alpha"]
+    assert names(has_free_plan=False, max_price=60) == ["Beta"]
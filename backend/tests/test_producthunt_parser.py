@@ -0,0 +1,40 @@
+import pytest
+from app.scrapers.producthunt import ProductHuntScraper
+from app.scrapers.parsers import available_backends, resolve_backend
+
+PAGE = """<!DOCTYPE html><html><head>
+<title>Fixture Product</title>
+<meta name="description" content="A test product">
+<script>var state = {"upvotes": 999};</script>
+</head><body>
+<nav><a href="/topics/should-not-be-first">Nav topic</a></nav>
+<h1> Fixture Product </h1>
+<button>Follow</button>
+<button>150 upvotes</button>
+<div><a href="/topics/productivity">Productivity</a><a href="/topics/ai">AI</a></div>
+<a href="/posts/other">Other post</a>
+</body></html>"""
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_partial_parse_matches_full_parse(backend):
+    """Test that partial parsing extracts the same data as a full parse"""
+    full = ProductHuntScraper(parser_backend=backend, partial_parse=False)
+    partial = ProductHuntScraper(parser_backend=backend, partial_parse=True)
+
+    url = "https://www.producthunt.com/posts/fixture"
+    assert partial.parse_product_page(PAGE, url) == full.parse_product_page(PAGE, url)
+
+def test_parse_product_page_extracts_fields():
+    """Test extraction of name, description, upvotes and tags"""
+    scraper = ProductHuntScraper()
+    data = scraper.parse_product_page(PAGE, "https://www.producthunt.com/posts/fixture")
+
+    assert data["name"] == "Fixture Product"
+    assert data["description"] == "A test product"
+    assert data["upvotes"] == 150
+    assert "Productivity" in data["tags"]
+
+def test_unknown_backend_is_rejected():
+    """Test that an unknown parser backend name raises"""
+    with pytest.raises(ValueError):
+        resolve_backend("not-a-parser")
@@ -0,0 +1,103 @@
+import time
+import pytest
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core import database
+from app.core.config import settings
+from app.core.database import (
+    CONSISTENT_READ_HEADER, LAST_WRITE_COOKIE, ReadRouter, get_db, get_read_db, mark_last_write
+)
+
+@pytest.fixture
+def instances(tmp_path):
+    """Two SQLite files standing in for a primary and a replica, each naming itself"""
+    engines = []
+    for name in ("primary", "replica"):
+        instance = create_engine(f"sqlite:///{tmp_path / name}.db")
+        with instance.begin() as connection:
+            connection.execute(text("CREATE TABLE instance (name TEXT)"))
+            connection.execute(text("INSERT INTO instance VALUES (:name)"), {"name": name})
+        engines.append(instance)
+    yield engines
+    for instance in engines:
+        instance.dispose()
+
+def served_by(db: Session) -> str:
+    try:
+        return db.execute(text("SELECT name FROM instance")).scalar()
+    finally:
+        db.close()
+
+def test_round_robin_and_failover(instances):
+    """Test reads rotate over replicas and skip a failed one until retry_after passes"""
+    primary, replica = instances
+    down = create_engine("sqlite:////nonexistent/dir/replica.db")
+    now = [0.0]
+    router = ReadRouter(primary, [replica, down], retry_after=30, clock=lambda: now[0])
+
+    assert router.candidates() == [replica, down, primary]
+
+    # Starts at the unreachable replica, fails over to the next candidate
+    assert served_by(router.session()) == "replica"
+    assert router.candidates() == [replica, primary]
+
+    now[0] = 31
+    assert down in router.candidates()
+
+def test_falls_back_to_primary(instances):
+    primary, _ = instances
+    router = ReadRouter(primary, [create_engine("sqlite:////nonexistent/dir/replica.db")], retry_after=30)
+    assert served_by(router.session()) == "primary"
+    assert served_by(router.session(primary_only=True)) == "primary"
+
+def test_read_your_writes(instances, monkeypatch):
+    """Test the consistency header and a recent write cookie pin reads to the primary"""
+    primary, replica = instances
+    monkeypatch.setattr(database, "read_router", ReadRouter(primary, [replica]))
+    app = FastAPI()
+
+    @app.get("/instance")
+    def instance(db: Session = Depends(get_read_db)):
+        return {"name": db.execute(text("SELECT name FROM instance")).scalar()}
+
+    client = TestClient(app)
+    assert client.get("/instance").json()["name"] == "replica"
+    assert client.get("/instance", headers={CONSISTENT_READ_HEADER: "true"}).json()["name"] == "primary"
+
+    client.cookies.set(LAST_WRITE_COOKIE, str(time.time()))
+    assert client.get("/instance").json()["name"] == "replica"  # Stickiness is off by default
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 5.0)
+    assert client.get("/instance").json()["name"] == "primary"
+
+    client.cookies.set(LAST_WRITE_COOKIE, str(time.time() - 10))
+    assert client.get("/instance").json()["name"] == "replica"
+
+def test_write_cookie_only_after_a_commit(instances, monkeypatch):
+    """Test that only requests committing through get_db pin the client's reads, whatever their method"""
+    primary, replica = instances
+    monkeypatch.setattr(database, "read_router", ReadRouter(primary, [replica]))
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=primary))
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 5.0)
+    app = FastAPI()
+    app.middleware("http")(mark_last_write)
+
+    @app.post("/evaluate")
+    def evaluate(db: Session = Depends(get_read_db)):
+        return {"name": db.execute(text("SELECT name FROM instance")).scalar()}
+
+    @app.get("/health")
+    def health(db: Session = Depends(get_db)):
+        return {"name": db.execute(text("SELECT name FROM instance")).scalar()}
+
+    @app.post("/instances")
+    def add_instance(db: Session = Depends(get_db)):
+        db.execute(text("INSERT INTO instance VALUES ('new')"))
+        db.commit()
+        return {}
+
+    client = TestClient(app)
+    assert LAST_WRITE_COOKIE not in client.post("/evaluate").cookies
+    assert LAST_WRITE_COOKIE not in client.get("/health").cookies
+    assert LAST_WRITE_COOKIE in client.post("/instances").cookies
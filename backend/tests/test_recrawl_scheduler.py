@@ -0,0 +1,115 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.marketplace import ProductMarketplace
+from app.services.recrawl_scheduler import RecrawlScheduler
+
+PRODUCT_DATA = {
+    "name": "Test Product",
+    "description": "A test product",
+    "upvotes": 100,
+    "tags": ["saas"],
+    "price_plans": []
+}
+
+def test_unchanged_listings_back_off_exponentially():
+    """Test that each unchanged scrape doubles the interval up to the cap"""
+    scheduler = RecrawlScheduler(min_interval_hours=6, max_interval_hours=48, backoff=2)
+    listing = ProductMarketplace(unchanged_count=0)
+    now = datetime(2024, 1, 1)
+
+    assert scheduler.record_scrape(listing, PRODUCT_DATA, now=now) is True
+    assert listing.next_scrape_at == now + timedelta(hours=6)
+
+    scheduler.record_scrape(listing, PRODUCT_DATA, now=now)
+    assert listing.next_scrape_at == now + timedelta(hours=12)
+
+    # A 304 counts as unchanged too
+    scheduler.record_scrape(listing, None, now=now)
+    assert listing.next_scrape_at == now + timedelta(hours=24)
+
+    for _ in range(5):
+        scheduler.record_scrape(listing, None, now=now)
+    assert listing.next_scrape_at == now + timedelta(hours=48)
+
+def test_explicit_zero_interval_is_kept():
+    """Test that a zero minimum interval isn't replaced by the configured default"""
+    scheduler = RecrawlScheduler(min_interval_hours=0, max_interval_hours=48, backoff=2)
+    listing = ProductMarketplace(unchanged_count=0)
+    now = datetime(2024, 1, 1)
+
+    scheduler.record_scrape(listing, PRODUCT_DATA, now=now)
+    assert scheduler.min_interval == timedelta(0)
+    assert listing.next_scrape_at == now
+
+def test_change_resets_interval():
+    """Test that an upvote change resets the listing to the minimum interval"""
+    scheduler = RecrawlScheduler(min_interval_hours=6, max_interval_hours=48, backoff=2)
+    listing = ProductMarketplace(unchanged_count=0)
+    now = datetime(2024, 1, 1)
+
+    scheduler.record_scrape(listing, PRODUCT_DATA, now=now)
+    scheduler.record_scrape(listing, PRODUCT_DATA, now=now)
+    changed = scheduler.record_scrape(listing, {**PRODUCT_DATA, "upvotes": 150}, now=now)
+
+    assert changed is True
+    assert listing.unchanged_count == 0
+    assert listing.last_changed_at == now
+    assert listing.next_scrape_at == now + timedelta(hours=6)
+
+def test_due_listings_respects_budget_and_priority(db):
+    """Test that never-scraped and fast-changing listings are picked first"""
+    scheduler = RecrawlScheduler(min_interval_hours=6, max_interval_hours=336, backoff=2)
+    now = datetime(2024, 1, 10)
+
+    db.add_all([
+        ProductMarketplace(listing_url="https://a.test/new"),
+        # Overdue by 6h on a 6h interval -> priority 1.0
+        ProductMarketplace(listing_url="https://a.test/fast", unchanged_count=0,
+                           next_scrape_at=now - timedelta(hours=6)),
+        # Overdue by 6h on a 96h interval -> priority 0.0625
+        ProductMarketplace(listing_url="https://a.test/slow", unchanged_count=4,
+                           next_scrape_at=now - timedelta(hours=6)),
+        ProductMarketplace(listing_url="https://a.test/not-due", unchanged_count=0,
+                           next_scrape_at=now + timedelta(hours=1)),
+        ProductMarketplace(listing_url="https://a.test/blocked", is_blocked=True),
+    ])
+    db.commit()
+
+    due = scheduler.due_listings(db, now=now, budget=2)
+    assert [listing.listing_url for listing in due] == ["https://a.test/new", "https://a.test/fast"]
+
+    due = scheduler.due_listings(db, now=now, budget=10)
+    assert [listing.listing_url for listing in due] == [
+        "https://a.test/new", "https://a.test/fast", "https://a.test/slow"
+    ]
+
+def test_due_listings_with_zero_interval(db):
+    """Test that a zero minimum interval ranks scraped listings by how overdue they are"""
+    scheduler = RecrawlScheduler(min_interval_hours=0, max_interval_hours=48, backoff=2)
+    now = datetime(2024, 1, 10)
+    db.add_all([
+        ProductMarketplace(listing_url="https://a.test/recent", unchanged_count=0, next_scrape_at=now - timedelta(minutes=5)),
+        ProductMarketplace(listing_url="https://a.test/older", unchanged_count=0, next_scrape_at=now - timedelta(hours=2)),
+    ])
+    db.commit()
+
+    due = scheduler.due_listings(db, now=now, budget=10)
+    assert [listing.listing_url for listing in due] == ["https://a.test/older", "https://a.test/recent"]
+
+def test_blocked_listing_returns_after_penalty(db):
+    """Test that a blocked listing is retried once its penalty has passed instead of never again"""
+    scheduler = RecrawlScheduler(min_interval_hours=6, max_interval_hours=48, backoff=2)
+    now = datetime(2024, 1, 10)
+    listing = ProductMarketplace(listing_url="https://a.test/blocked", is_blocked=True,
+                                 next_scrape_at=now - timedelta(hours=1))
+    db.add(listing)
+    db.commit()
+
+    scheduler.record_failure(listing, now=now)
+    db.commit()
+    assert listing.next_scrape_at == now + scheduler.blocked_penalty
+    assert scheduler.due_listings(db, now=now, budget=10) == []
+    later = now + scheduler.blocked_penalty
+    assert [due.listing_url for due in scheduler.due_listings(db, now=later, budget=10)] == ["https://a.test/blocked"]
+
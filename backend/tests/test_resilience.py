@@ -0,0 +1,175 @@
+import pytest
+import random
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.product import Product
+from app.scrapers import base
+from app.scrapers.http_cache import HttpValidatorCache
+from app.scrapers.producthunt import ProductHuntScraper
+from app.scrapers.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after
+from tests.conftest import TestingSessionLocal
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_parse_retry_after():
+    """Test Retry-After in both delta-seconds and HTTP-date form"""
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=40.0) == 60.0
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after(None) is None
+
+def test_backoff_is_jittered_and_capped():
+    """Test that backoff stays under the exponential ceiling and Retry-After wins"""
+    policy = RetryPolicy(max_retries=5, base_delay=1.0, max_delay=10.0, rng=random.Random(42))
+
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= min(10.0, 2 ** attempt)
+    assert policy.delay(0, retry_after=7.0) == 7.0
+    assert policy.delay(0, retry_after=600.0) == 10.0
+
+def test_circuit_breaker_opens_and_recovers():
+    """Test closed -> open -> half-open -> closed transitions"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("Test", window=10, min_requests=4, error_rate=0.5, cooldown=60, clock=clock)
+
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    # After the cooldown only a single trial request gets through
+    clock.now += 61
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+def test_failed_trial_reopens_with_retry_after():
+    """Test that a failing half-open trial reopens for at least Retry-After"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("Test", window=10, min_requests=1, error_rate=0.5, cooldown=60, clock=clock)
+
+    breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow_request()
+    breaker.record_failure(retry_after=300)
+    assert breaker.state == "open"
+    assert breaker.open_until == clock.now + 300
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Returns 503 twice, then the page; /throttled always returns 429"""
+    hits = 0
+
+    def do_GET(self):
+        FlakyHandler.hits += 1
+        if self.path == "/throttled":
+            self.send_response(429)
+            self.send_header("Retry-After", "2")
+            self.end_headers()
+            return
+        if FlakyHandler.hits <= 2:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = b"<html><body><h1>Recovered Product</h1></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    """Scraper with a private breaker, recorded sleeps and captured side effects"""
+    scraper = ProductHuntScraper()
+    scraper.delay = 0
+    scraper.http_cache = HttpValidatorCache(str(tmp_path / "http_cache"))
+    scraper.retry_policy = RetryPolicy(max_retries=3, base_delay=1.0, max_delay=30.0)
+    scraper.circuit_breaker = CircuitBreaker("Product Hunt", window=10, min_requests=3,
+                                             error_rate=0.9, cooldown=60)
+    scraper.sleeps = []
+    scraper.logged = []
+    scraper.health = []
+    scraper.paused = []
+    monkeypatch.setattr(scraper, "_sleep", scraper.sleeps.append)
+    monkeypatch.setattr(scraper, "_log_scrape_attempt", lambda **kwargs: scraper.logged.append(kwargs))
+    monkeypatch.setattr(scraper, "_update_listing_health",
+                        lambda url, blocked, unstable: scraper.health.append((blocked, unstable)))
+    monkeypatch.setattr(scraper, "_pause_marketplace_listings", scraper.paused.append)
+    monkeypatch.setattr(scraper, "_save_snapshot", lambda content, filename: str(tmp_path / filename))
+    FlakyHandler.hits = 0
+    return scraper
+
+def test_transient_errors_are_retried(scraper, http_server):
+    """Test that 503s are retried and the listing is flagged unstable"""
+    base_url = http_server(FlakyHandler)
+
+    product = scraper.scrape_product(f"{base_url}/flaky")
+
+    assert product["name"] == "Recovered Product"
+    assert FlakyHandler.hits == 3
+    assert len(scraper.sleeps) == 2
+    assert scraper.health[-1] == (False, True)
+
+def test_persistent_throttling_blocks_listing(scraper, http_server):
+    """Test that 429s honor Retry-After, then log blocked and open the breaker"""
+    base_url = http_server(FlakyHandler)
+
+    with pytest.raises(Exception):
+        scraper.scrape_product(f"{base_url}/throttled")
+
+    assert scraper.sleeps == [2.0, 2.0, 2.0]
+    assert scraper.logged[-1]["status"] == "blocked"
+    assert scraper.logged[-1]["status_code"] == 429
+    assert scraper.health[-1] == (True, True)
+    assert scraper.circuit_breaker.state == "open"
+    assert scraper.paused == [datetime.utcfromtimestamp(scraper.circuit_breaker.open_until)]
+
+    # While the breaker is open no request is sent and nothing is logged
+    hits = FlakyHandler.hits
+    logged = len(scraper.logged)
+    with pytest.raises(CircuitOpenError):
+        scraper.scrape_product(f"{base_url}/flaky")
+    assert FlakyHandler.hits == hits
+    assert len(scraper.logged) == logged
+
+def test_open_breaker_pauses_marketplace_listings(db, monkeypatch):
+    """Test that listings on a paused marketplace are flagged unstable and held back until it reopens"""
+    monkeypatch.setattr(base, "SessionLocal", TestingSessionLocal)
+    ph = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    g2 = Marketplace(name="G2", base_url="https://www.g2.com")
+    item = Product(name="TaskFlow Pro")
+    db.add_all([ph, g2, item])
+    db.flush()
+    until = datetime(2024, 1, 1, 12)
+    db.add_all([
+        ProductMarketplace(product_id=item.id, marketplace_id=ph.id, listing_url="https://ph.test/due"),
+        ProductMarketplace(product_id=item.id, marketplace_id=ph.id, listing_url="https://ph.test/later",
+                           next_scrape_at=until + timedelta(days=1)),
+        ProductMarketplace(product_id=item.id, marketplace_id=g2.id, listing_url="https://g2.test/due")
+    ])
+    db.commit()
+
+    ProductHuntScraper()._pause_marketplace_listings(until)
+
+    db.expire_all()
+    listings = {listing.listing_url: listing for listing in db.query(ProductMarketplace)}
+    assert listings["https://ph.test/due"].is_unstable
+    assert listings["https://ph.test/due"].next_scrape_at == until
+    assert listings["https://ph.test/later"].is_unstable
+    assert listings["https://ph.test/later"].next_scrape_at == until + timedelta(days=1)
+    assert not listings["https://g2.test/due"].is_unstable
+    assert listings["https://g2.test/due"].next_scrape_at is None
@@ -0,0 +1,88 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.product import Product
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.traffic import TrafficData
+from app.core.database import get_read_db
+from app.api.v1.endpoints import scenarios
+from app.services.catalog_snapshot import build_catalog_snapshot, invalidate_catalog_snapshot
+
+PLANS = [
+    {"name": "Free", "price": 0, "currency": "USD", "period": "monthly", "features": []},
+    {"name": "Pro", "price": 20, "currency": "USD", "period": "monthly", "features": []},
+    {"name": "Team", "price": 60, "currency": "USD", "period": "monthly", "features": []},
+]
+
+def seed_catalog(db):
+    marketplace = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    db.add(marketplace)
+    db.flush()
+    rows = [("A", ["AI"], 200000), ("B", ["AI", "Dev"], 20000), ("C", ["Dev"], 500), ("D", None, 0)]
+    for name, categories, visits in rows:
+        product = Product(name=name, canonical_url=f"https://www.producthunt.com/posts/{name}", categories=categories)
+        db.add(product)
+        db.flush()
+        db.add(ProductMarketplace(product_id=product.id, marketplace_id=marketplace.id,
+                                  listing_url=product.canonical_url, price_plans=PLANS))
+        if visits:
+            db.add(TrafficData(product_id=product.id, visits_month=visits))
+    db.commit()
+
+@pytest.fixture
+def client(db):
+    invalidate_catalog_snapshot()
+    app = FastAPI()
+    app.include_router(scenarios.router, prefix="/api/v1/scenarios")
+    app.dependency_overrides[get_read_db] = lambda: db
+    yield TestClient(app)
+    invalidate_catalog_snapshot()
+
+def test_snapshot_columns(db):
+    """Test that the snapshot holds price bases, latest traffic and category membership"""
+    seed_catalog(db)
+    snapshot = build_catalog_snapshot(db)
+    assert len(snapshot) == 4
+    assert list(snapshot.max_price) == [60, 60, 60, 60]
+    assert list(snapshot.min_paid_price) == [20, 20, 20, 20]
+    assert list(snapshot.mean_paid_price) == [40, 40, 40, 40]
+    assert list(snapshot.visits_month) == [200000, 20000, 500, 0]
+    categories = snapshot.groupings["category"]
+    assert categories.labels == ["AI", "Dev"]
+    assert list(categories.counts()) == [2, 2]
+
+def test_default_scenario_matches_baseline(client, db):
+    """Test that an empty scenario reproduces the stored estimator's totals"""
+    seed_catalog(db)
+    response = client.post("/api/v1/scenarios/evaluate", json={})
+    assert response.status_code == 200
+    body = response.json()
+    # 200000 * 0.5% + 20000 * 1% + 500 * 3% + 1 minimum customer, at $60
+    assert body["baseline"]["mrr_likely"] == 60 * (1000 + 200 + 15 + 1)
+    assert body["scenario"] == body["baseline"]
+    assert body["mrr_likely_change_pct"] == 0
+
+def test_lower_conversion_by_category(client, db):
+    """Test conversion multiplier, price basis and per-category aggregation"""
+    seed_catalog(db)
+    body = client.post("/api/v1/scenarios/evaluate", json={
+        "conversion_multiplier": 0.5, "price_basis": "lowest_paid", "group_by": "category"
+    }).json()
+    assert body["scenario"]["products"] == 4
+    groups = {group["group"]: group for group in body["groups"]}
+    assert groups["AI"]["baseline"]["mrr_likely"] == 60 * (1000 + 200)
+    assert groups["AI"]["scenario"]["mrr_likely"] == 20 * (500 + 100)
+    assert groups["Dev"]["scenario"]["mrr_likely"] == 20 * (100 + 7)
+
+    filtered = client.post("/api/v1/scenarios/evaluate", json={
+        "category": "Dev", "conversion_tiers": [{"min_visits": 0, "rate": 0.1}], "high_factor": 3
+    }).json()
+    assert filtered["scenario"]["products"] == 2
+    assert filtered["scenario"]["mrr_likely"] == 60 * (2000 + 50)
+    assert filtered["scenario"]["mrr_high"] == 60 * (2000 + 50) * 3
+
+def test_invalid_parameters_rejected(client, db):
+    seed_catalog(db)
+    response = client.post("/api/v1/scenarios/evaluate", json={"price_basis": "median"})
+    assert response.status_code == 422
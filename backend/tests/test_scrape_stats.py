@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.marketplace import Marketplace
+from app.models.scrape_log import ScrapeLog
+from app.core.database import get_read_db
+from app.api.v1.endpoints import scrapes
+from app.services.scrape_stats import compute_scrape_stats, parse_window, stats_cache
+
+NOW = datetime(2026, 10, 19, 12, 30)
+
+def seed_logs(db, now=NOW):
+    hunt = Marketplace(name="Product Hunt", base_url="https://www.producthunt.com")
+    g2 = Marketplace(name="G2", base_url="https://www.g2.com")
+    db.add_all([hunt, g2])
+    db.flush()
+    logs = [
+        (hunt.id, "success", 100, now - timedelta(minutes=5)),
+        (hunt.id, "success", 200, now - timedelta(minutes=65)),
+        (hunt.id, "blocked", 900, now - timedelta(minutes=70)),
+        (hunt.id, "timeout", 30000, now - timedelta(hours=3)),
+        (hunt.id, "success", 100, now - timedelta(days=2)),  # Outside a 24h window
+        (g2.id, "error", 50, now - timedelta(minutes=1)),
+    ]
+    db.add_all([
+        ScrapeLog(marketplace_id=marketplace_id, url="https://example.com", status=status, duration=duration, timestamp=timestamp)
+        for marketplace_id, status, duration, timestamp in logs
+    ])
+    db.commit()
+    return hunt
+
+def test_stats_for_one_marketplace(db):
+    """Test rates, percentiles and hourly buckets over a window"""
+    hunt = seed_logs(db)
+    stats = compute_scrape_stats(db, hunt.id, "24h", now=NOW)
+    assert stats.requests == 4
+    assert stats.bucket == "1h"
+    assert stats.rates == {"success": 0.5, "not_modified": 0.0, "blocked": 0.25, "timeout": 0.25, "error": 0.0}
+    assert stats.duration_percentiles == {"p50": 550, "p90": 21270, "p99": 29127}
+
+    assert len(stats.throughput) == 25
+    latest, previous = stats.throughput[-1], stats.throughput[-2]
+    assert latest.start == datetime(2026, 10, 19, 12, 0) and latest.statuses == {"success": 1}
+    assert previous.statuses == {"success": 1, "blocked": 1}
+    assert sum(bucket.requests for bucket in stats.throughput) == 4
+
+def test_stats_endpoint(db):
+    seed_logs(db, now=datetime.utcnow())
+    stats_cache.clear()
+    app = FastAPI()
+    app.include_router(scrapes.router, prefix="/api/v1/scrapes")
+    app.dependency_overrides[get_read_db] = lambda: db
+    client = TestClient(app)
+
+    body = client.get("/api/v1/scrapes/stats", params={"marketplace": "G2", "window": "7d"}).json()
+    assert body["marketplace"] == "G2"
+    assert body["bucket"] == "1d"
+    assert body["rates"]["error"] == 1.0
+
+    assert client.get("/api/v1/scrapes/stats", params={"marketplace": "Nope"}).status_code == 404
+    assert client.get("/api/v1/scrapes/stats", params={"window": "soon"}).status_code == 400
+    assert client.get("/api/v1/scrapes/stats", params={"window": "30d", "bucket": "1m"}).status_code == 400
+    stats_cache.clear()
+
+def test_parse_window():
+    assert parse_window("15m") == timedelta(minutes=15)
+    assert parse_window("7D") == timedelta(days=7)
+    with pytest.raises(ValueError):
+        parse_window("0h")
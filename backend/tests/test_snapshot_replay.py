@@ -0,0 +1,84 @@
+from app.services import snapshot_replay
+from app.services.snapshot_replay import parse_snapshot, replay_snapshots
+
+URL = "https://www.producthunt.com/posts/fixture"
+
+PAGE = """<!DOCTYPE html><html><head>
+<title>Fixture Product</title>
+<link rel="canonical" href="https://www.producthunt.com/posts/fixture">
+<meta name="description" content="A test product">
+</head><body>
+<h1>Fixture Product</h1>
+<button>150 upvotes</button>
+<div><a href="/topics/productivity">Productivity</a></div>
+</body></html>"""
+
+def write_snapshots(tmp_path):
+    (tmp_path / "producthunt_20261001_000000_aaa.html").write_text(PAGE, encoding="utf-8")
+    (tmp_path / "producthunt_20261002_000000_bbb.html").write_text(PAGE.replace("150", "175"), encoding="utf-8")
+    # No canonical link and no recorded URL: the source can't be known
+    (tmp_path / "producthunt_20261003_000000_ccc.html").write_text("<html><h1>Orphan</h1></html>", encoding="utf-8")
+    (tmp_path / "other_20261001_000000_ddd.html").write_text(PAGE, encoding="utf-8")
+
+def test_parse_snapshot_uses_recorded_or_canonical_url(tmp_path):
+    """Test that a snapshot is re-parsed with its recorded URL, falling back to the page's canonical link"""
+    write_snapshots(tmp_path)
+    path = str(tmp_path / "producthunt_20261001_000000_aaa.html")
+
+    _, data, error = parse_snapshot((path, None, "producthunt"))
+    assert error is None
+    assert (data["name"], data["upvotes"], data["url"]) == ("Fixture Product", 150, URL)
+
+    _, data, _ = parse_snapshot((path, "https://www.producthunt.com/posts/recorded", "producthunt"))
+    assert data["url"] == "https://www.producthunt.com/posts/recorded"
+
+    orphan = str(tmp_path / "producthunt_20261003_000000_ccc.html")
+    assert parse_snapshot((orphan, None, "producthunt")) == (orphan, None, "source URL unknown")
+    assert parse_snapshot((str(tmp_path / "missing.html"), URL, "producthunt"))[2]
+
+def test_replay_saves_batches_in_snapshot_order(tmp_path):
+    """Test that parsed snapshots reach save_batch oldest first and failures are counted"""
+    write_snapshots(tmp_path)
+    batches = []
+
+    def save_batch(batch):
+        batches.append(list(batch))
+        return len(batch)
+
+    stats = replay_snapshots(str(tmp_path), {}, save_batch=save_batch, workers=1, batch_size=1, progress_every=0)
+
+    assert (stats.parsed, stats.failed, stats.saved) == (2, 1, 2)
+    assert [batch[0]["upvotes"] for batch in batches] == [150, 175]
+
+def test_dry_run_only_counts(tmp_path):
+    """Test that without save_batch snapshots are parsed and counted but nothing is kept"""
+    write_snapshots(tmp_path)
+
+    stats = replay_snapshots(str(tmp_path), {}, workers=1, limit=2, progress_every=0)
+
+    assert (stats.parsed, stats.failed, stats.saved) == (2, 0, 0)
+
+def test_replay_reads_snapshots_lazily(tmp_path, monkeypatch):
+    """Test that only a few chunks of snapshots are queued ahead of the results being saved"""
+    for i in range(1000):
+        (tmp_path / f"producthunt_{i:06d}.html").write_text(PAGE, encoding="utf-8")
+    listed = []
+    iter_snapshots = snapshot_replay.iter_snapshots
+
+    def counting_iter(snapshot_dir, prefix):
+        for path in iter_snapshots(snapshot_dir, prefix):
+            listed.append(path)
+            yield path
+
+    monkeypatch.setattr(snapshot_replay, "iter_snapshots", counting_iter)
+    listed_at_first_save = []
+
+    def save_batch(batch):
+        listed_at_first_save.append(len(listed))
+        return len(batch)
+
+    stats = replay_snapshots(str(tmp_path), {}, save_batch=save_batch, workers=1, batch_size=1, progress_every=0)
+
+    assert stats.saved == 1000
+    assert listed_at_first_save[0] <= 64 * 3
+
@@ -1,5 +1,12 @@
+import json
 import pytest
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+from app.scrapers.resilience import RetryPolicy
 from app.services.traffic_estimator import TrafficEstimator
+from app.services.traffic_providers import (
+    HttpTrafficProvider, RateLimiter, StubTrafficProvider, TrafficCache
+)
 
 def test_traffic_estimator_initialization():
     """Test that traffic estimator can be initialized"""
@@ -32,4 +39,99 @@ def test_multiple_traffic_estimations():
     assert traffic1.visits_month >= 0
     assert traffic2.visits_month >= 0
     assert traffic1.bounce_rate >= 0
-    assert traffic2.bounce_rate >= 0
\ No newline at end of file
+    assert traffic2.bounce_rate >= 0
+
+def test_stub_traffic_is_deterministic_per_domain():
+    """Test that the stub returns the same figures for the same domain, even without a cache"""
+    first = TrafficEstimator(cache=TrafficCache(path=""))
+    second = TrafficEstimator(cache=TrafficCache(path=""))
+
+    assert first.estimate_traffic("https://app.example.com/pricing") == \
+        second.estimate_traffic("http://www.example.com/?utm_source=x")
+    # Marketplace listings don't share their marketplace's traffic
+    assert first.estimate_traffic("https://www.producthunt.com/posts/a") != \
+        first.estimate_traffic("https://www.producthunt.com/posts/b")
+
+class CountingProvider(StubTrafficProvider):
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, keys):
+        self.calls.append(list(keys))
+        return super().fetch(keys)
+
+def test_traffic_cache_ttl_and_persistence(tmp_path):
+    """Test that cached domains skip the provider until the TTL expires, across instances"""
+    now = [1000.0]
+    path = str(tmp_path / "traffic.sqlite")
+    provider = CountingProvider()
+    estimator = TrafficEstimator(provider=provider, cache=TrafficCache(ttl_seconds=60, path=path, clock=lambda: now[0]))
+
+    estimator.estimate_traffic_batch(["https://a.com", "https://b.com/x", "https://www.b.com"])
+    assert provider.calls == [["a.com", "b.com"]]
+
+    restarted = TrafficEstimator(provider=provider, cache=TrafficCache(ttl_seconds=60, path=path, clock=lambda: now[0]))
+    restarted.estimate_traffic_batch(["https://a.com", "https://c.com"])
+    assert provider.calls[-1] == ["c.com"]
+
+    now[0] += 61
+    restarted.estimate_traffic("https://a.com")
+    assert provider.calls[-1] == ["a.com"]
+
+class StandInProviderHandler(BaseHTTPRequestHandler):
+    requests = []
+    throttle_next = False
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        domains = query["domains"][0].split(",")
+        StandInProviderHandler.requests.append((domains, self.headers.get("X-API-Key")))
+        if StandInProviderHandler.throttle_next:
+            StandInProviderHandler.throttle_next = False
+            self.send_response(429)
+            self.send_header("Retry-After", "3")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({
+            domain: {"visits_month": len(domain) * 1000, "visits_growth": 1.5}
+            for domain in domains if domain != "unknown.com"
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_http_provider_batches_rate_limits_and_retries(http_server):
+    """Test batch lookups against a local stand-in provider"""
+    base_url = http_server(StandInProviderHandler)
+    StandInProviderHandler.requests = []
+    StandInProviderHandler.throttle_next = True
+    sleeps = []
+    provider = HttpTrafficProvider(base_url=base_url, api_key="secret", batch_size=2,
+                                   requests_per_second=1000, sleep=sleeps.append,
+                                   retry_policy=RetryPolicy(max_retries=2))
+    estimator = TrafficEstimator(provider=provider, cache=TrafficCache(path=""))
+
+    urls = [f"https://{name}.com" for name in ("alpha", "beta", "gamma", "delta", "unknown")]
+    results = estimator.estimate_traffic_batch(urls)
+
+    assert results["https://alpha.com"].visits_month == len("alpha.com") * 1000
+    assert results["https://unknown.com"].visits_month == 0
+    # One throttled request retried after Retry-After, then 3 batches of up to 2 domains
+    assert 3.0 in sleeps
+    assert len(StandInProviderHandler.requests) == 4
+    assert all(len(domains) <= 2 for domains, _ in StandInProviderHandler.requests)
+    assert {key for _, key in StandInProviderHandler.requests} == {"secret"}
+
+def test_rate_limiter_spaces_calls():
+    now = [0.0]
+    sleeps = []
+    limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleeps.append)
+    for _ in range(3):
+        limiter.wait()
+    assert sleeps == [0.25, 0.5]
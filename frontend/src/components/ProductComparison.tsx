@@ -8,15 +8,19 @@ interface PricePlan {
   price: number;
   currency: string;
   period: string;
+  usd_monthly_price: number | null;
 }
 
-interface MarketplaceListing {
-  name: string;
+interface MarketplaceCell {
   listing_url: string;
   upvotes: number;
   reviews_count: number;
   rating: number;
-  price_plans: PricePlan[];
+}
+
+interface MarketplaceRow {
+  marketplace: string;
+  cells: (MarketplaceCell | null)[];
 }
 
 interface TrafficInfo {
@@ -37,16 +41,17 @@ interface Product {
   description: string;
   categories: string[];
   tags: string[];
-  marketplaces: MarketplaceListing[];
-  estimates: MrrEstimate;
-  traffic: TrafficInfo;
+  estimates: MrrEstimate | null;
+  traffic: TrafficInfo | null;
+  highest_plan: PricePlan | null;
 }
 
 const ProductComparison: React.FC = () => {
   const navigate = useNavigate();
   const [products, setProducts] = useState<Product[]>([]);
+  const [marketplaceRows, setMarketplaceRows] = useState<MarketplaceRow[]>([]);
   const [selectedProductIds, setSelectedProductIds] = useState<number[]>([]);
-  const [allProducts, setAllProducts] = useState<Product[]>([]);
+  const [allProducts, setAllProducts] = useState<{ id: number; name: string; description: string }[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -66,12 +71,11 @@ const ProductComparison: React.FC = () => {
 
   const fetchSelectedProducts = async (ids: number[]) => {
     try {
-      const productPromises = ids.map(id => 
-        axios.get(`http://localhost:8000/api/v1/products/${id}`)
-      );
-      const responses = await Promise.all(productPromises);
-      const productsData = responses.map(res => res.data.product);
-      setProducts(productsData);
+      const response = await axios.get('http://localhost:8000/api/v1/products/compare', {
+        params: { ids: ids.join(',') }
+      });
+      setProducts(response.data.products);
+      setMarketplaceRows(response.data.marketplaces);
     } catch (error) {
       console.error('Error fetching selected products:', error);
     }
@@ -85,6 +89,7 @@ const ProductComparison: React.FC = () => {
         fetchSelectedProducts(newIds);
       } else {
         setProducts([]);
+        setMarketplaceRows([]);
       }
     } else if (selectedProductIds.length < 3) {
       const newIds = [...selectedProductIds, productId];
@@ -276,8 +281,7 @@ const ProductComparison: React.FC = () => {
                       Highest Price Plan
                     </td>
                     {products.map(product => {
-                      const highestPricePlan = product.marketplaces?.[0]?.price_plans
-                        ?.reduce((prev, current) => (prev.price > current.price) ? prev : current, { price: 0, name: 'N/A', period: 'N/A' });
+                      const highestPricePlan = product.highest_plan;
                       
                       return (
                         <td key={product.id} className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
@@ -291,16 +295,18 @@ const ProductComparison: React.FC = () => {
                       );
                     })}
                   </tr>
-                  <tr className="bg-gray-50">
-                    <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
-                      Upvotes
-                    </td>
-                    {products.map(product => (
-                      <td key={product.id} className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                        {product.marketplaces?.[0]?.upvotes?.toLocaleString() || 'N/A'}
+                  {marketplaceRows.map(row => (
+                    <tr key={row.marketplace} className="bg-gray-50">
+                      <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
+                        Upvotes ({row.marketplace})
                       </td>
-                    ))}
-                  </tr>
+                      {row.cells.map((cell, index) => (
+                        <td key={products[index]?.id ?? index} className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+                          {cell?.upvotes?.toLocaleString() || 'N/A'}
+                        </td>
+                      ))}
+                    </tr>
+                  ))}
                 </tbody>
               </table>
             </div>
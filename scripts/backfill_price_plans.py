@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Rebuild the normalized listing_price_plans rows from each listing's scraped price plans.
+Run once after upgrading, and again after changing rows in fx_rates.
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.database import SessionLocal, engine, Base
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job, fx_rate
+from app.services.pricing import backfill_price_plans
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill normalized USD-monthly price plans")
+    parser.add_argument("--batch-size", type=int, default=500, help="Listings per transaction")
+
+    args = parser.parse_args()
+
+    # Creates listing_price_plans and fx_rates on databases that predate them
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        processed = backfill_price_plans(db, batch_size=args.batch_size)
+        print(f"Rebuilt price plans for {processed} listings in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
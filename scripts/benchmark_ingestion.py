@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scrape -> estimate -> save path end to end against a local
+mock marketplace serving synthetic Product Hunt-style pages
+"""
+
+import argparse
+import cProfile
+import html
+import os
+import pstats
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = [
+    "task", "flow", "data", "cloud", "sync", "team", "insight", "pilot", "stack", "forge",
+    "metric", "vault", "pulse", "craft", "signal", "relay", "ledger", "orbit", "canvas", "beacon"
+]
+TOPICS = ["productivity", "analytics", "ai", "developer-tools", "marketing", "design", "saas", "fintech"]
+# Row counts reported as DB rows written
+COUNTED_TABLES = ["products", "product_marketplaces", "listing_price_plans", "traffic_data",
+                  "mrr_estimates", "scrape_logs"]
+
+def synthetic_page(slug, filler_kb):
+    """A deterministic product page with the nodes the scraper extracts plus filler markup"""
+    rng = random.Random(zlib.crc32(slug.encode('utf-8')))
+    name = " ".join(word.capitalize() for word in rng.sample(WORDS, 2)) + f" {rng.randint(1, 999)}"
+    description = f"{name} helps teams {' '.join(rng.sample(WORDS, 6))}."
+    topics = "".join(
+        f'<a href="/topics/{topic}">{topic.replace("-", " ").title()}</a>'
+        for topic in rng.sample(TOPICS, rng.randint(2, 5))
+    )
+    filler_item = '<div class="card"><span>{}</span><p>{}</p></div>'
+    filler = []
+    while sum(len(item) for item in filler) < filler_kb * 1024:
+        filler.append(filler_item.format(rng.choice(WORDS), " ".join(rng.choices(WORDS, k=30))))
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{html.escape(name)} - Product Hunt</title>"
+        f'<meta name="description" content="{html.escape(description)}">'
+        "<script>window.__APOLLO_STATE__ = {};</script><style>.card { margin: 4px; }</style>"
+        "</head><body>"
+        f"<header><h1>{html.escape(name)}</h1><button>{rng.randint(0, 5000)} upvotes</button></header>"
+        f"<nav>{topics}</nav><main>{''.join(filler)}</main>"
+        "</body></html>"
+    )
+
+def start_mock_server(latency_ms, filler_kb):
+    """Serve /posts/<slug> pages from a background thread; returns (server, base_url)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            body = synthetic_page(self.path.rsplit('/', 1)[-1], filler_kb).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def count_rows(db):
+    from sqlalchemy import text
+    return sum(db.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() for table in COUNTED_TABLES)
+
+def profile_stages(pipeline, profilers):
+    """Wrap every stage so each worker thread records into its own cProfile profiler"""
+    local = threading.local()
+    lock = threading.Lock()
+
+    def wrap(func):
+        def profiled(item):
+            if not hasattr(local, "profiler"):
+                local.profiler = cProfile.Profile()
+                with lock:
+                    profilers.append(local.profiler)
+            return local.profiler.runcall(func, item)
+        return profiled
+
+    for stage in pipeline.stages:
+        stage.func = wrap(stage.func)
+
+def run_level(base_url, run_id, products, fetch_workers, args, profilers=None):
+    """Ingest `products` fresh pages with `fetch_workers` fetchers; returns (wall seconds, rows, stage stats)"""
+    from app.core.database import SessionLocal
+    from app.scrapers.producthunt import ProductHuntScraper
+    from app.services.ingestion import build_scrape_pipeline
+
+    scraper = ProductHuntScraper()
+    # Measure the scrape path itself, not politeness delays or conditional GETs
+    scraper.delay = 0
+    scraper.http_cache = None
+    scraper.browser_fallback = False
+
+    urls = [f"{base_url}/posts/{run_id}-{fetch_workers}-{i}" for i in range(products)]
+    db = SessionLocal()
+    try:
+        rows_before = count_rows(db)
+        pipeline = build_scrape_pipeline(
+            scraper, db, fetch_urls=True, fetch_workers=fetch_workers,
+            estimate_workers=args.estimate_workers, batch_size=args.batch_size
+        )
+        pipeline.progress_every = 0
+        if profilers is not None:
+            profile_stages(pipeline, profilers)
+        start = time.perf_counter()
+        stats = pipeline.run(urls)
+        elapsed = time.perf_counter() - start
+        rows = count_rows(db) - rows_before
+    finally:
+        db.close()
+    return elapsed, rows, stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion against a local mock marketplace")
+    parser.add_argument("--products", type=int, default=200, help="Pages ingested per concurrency level (default: 200)")
+    parser.add_argument("--concurrency", default="1,4,8",
+                        help="Comma-separated fetch worker counts to compare (default: 1,4,8)")
+    parser.add_argument("--estimate-workers", type=int, default=2, help="Concurrent estimators (default: 2)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Products per DB write (default: 50)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock server response delay (default: 20)")
+    parser.add_argument("--page-kb", type=int, default=40, help="Filler markup per page in KB (default: 40)")
+    parser.add_argument("--database-url", default=None,
+                        help="Database to write to (default: a throwaway SQLite file); rows are added, never removed")
+    parser.add_argument("--profile", default=None,
+                        help="Write a cProfile dump of all pipeline threads here (e.g. ingest.prof)")
+
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    profile_path = os.path.abspath(args.profile) if args.profile else None
+
+    # Snapshots, caches and the default database go to a scratch directory
+    workdir = tempfile.mkdtemp(prefix="ingest_benchmark_")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.chdir(workdir)
+
+    # Add backend to path so we can import app modules (after DATABASE_URL is set)
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+    from app.core.database import Base, engine
+    from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job, fx_rate, history_rollup
+    Base.metadata.create_all(bind=engine)
+
+    server, base_url = start_mock_server(args.latency_ms, args.page_kb)
+    run_id = int(time.time())
+    print(f"Mock marketplace at {base_url} ({args.latency_ms:g} ms latency, ~{args.page_kb} KB pages)")
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}\n")
+
+    profilers = [] if profile_path else None
+    try:
+        print(f"{'fetchers':>8}{'pages':>8}{'seconds':>10}{'pages/sec':>11}{'rows/sec':>10}  busy seconds per stage")
+        for fetch_workers in levels:
+            elapsed, rows, stats = run_level(base_url, run_id, args.products, fetch_workers, args, profilers)
+            pages = stats['fetch'].processed
+            breakdown = "  ".join(f"{name} {stage.busy_seconds:.2f}" for name, stage in stats.items())
+            print(f"{fetch_workers:>8}{pages:>8}{elapsed:>10.2f}{pages / elapsed:>11.1f}{rows / elapsed:>10.1f}  {breakdown}")
+            failed = sum(stage.failed for stage in stats.values())
+            if failed:
+                print(f"{'':>8}{failed} items failed")
+    finally:
+        server.shutdown()
+        server.server_close()
+        engine.dispose()
+        if not args.database_url:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if profilers:
+        profile = pstats.Stats(*profilers)
+        profile.dump_stats(profile_path)
+        print(f"\nProfile of {len(profilers)} pipeline threads written to {profile_path}; top functions:")
+        profile.sort_stats('cumulative').print_stats(15)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark Monte Carlo MRR estimation against its latency budget (5 ms per
+product in a batch by default). Exits non-zero when the budget is exceeded.
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.config import settings
+from app.services.mrr_estimator import MrrEstimator
+from app.services.mrr_simulation import MonteCarloMrrModel
+
+def benchmark(estimator, plans, visits, repeat):
+    """Best of `repeat` batch runs, in seconds per product"""
+    # Warm up: the shared random draws are generated on first use
+    estimator.estimate_mrr_monte_carlo_batch(plans[:1], visits[:1])
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        estimator.estimate_mrr_monte_carlo_batch(plans, visits)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(plans)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Monte Carlo MRR estimation")
+    parser.add_argument("--products", type=int, default=500, help="Products per batch (default: 500)")
+    parser.add_argument("--samples", type=int, default=settings.MRR_MC_SAMPLES,
+                        help=f"Samples per product (default: {settings.MRR_MC_SAMPLES})")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs, best one reported (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="Allowed milliseconds per product (default: 5)")
+
+    args = parser.parse_args()
+
+    estimator = MrrEstimator(mode="monte_carlo", simulation=MonteCarloMrrModel(samples=args.samples))
+    plans = [[0, 19, 49, 99]] * args.products
+    visits = [1000 * (i + 1) for i in range(args.products)]
+
+    per_product_ms = benchmark(estimator, plans, visits, args.repeat) * 1000
+    print(f"{args.products} products x {args.samples} samples: {per_product_ms:.3f} ms/product "
+          f"(budget {args.budget_ms:g} ms)")
+    if per_product_ms > args.budget_ms:
+        print("Over budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML parser backends by replaying saved page snapshots
+"""
+
+import argparse
+import glob
+import sys
+import os
+import time
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.scrapers.producthunt import ProductHuntScraper
+from app.scrapers.parsers import PARSER_BACKENDS, is_backend_available
+
+def load_snapshots(snapshot_dir, pattern, max_pages):
+    """Read saved snapshots into memory so disk I/O is not measured"""
+    paths = sorted(glob.glob(os.path.join(snapshot_dir, pattern)))
+    if max_pages:
+        paths = paths[:max_pages]
+    
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((path, f.read()))
+    return pages
+
+def benchmark(pages, backend, partial, repeat):
+    """Parse every page `repeat` times and return pages per second"""
+    scraper = ProductHuntScraper(parser_backend=backend, partial_parse=partial)
+    
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path, html in pages:
+            scraper.parse_product_page(html, path)
+    elapsed = time.perf_counter() - start
+    
+    return (len(pages) * repeat) / elapsed if elapsed > 0 else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved snapshots")
+    parser.add_argument("--snapshot-dir", default="data/raw", help="Snapshot directory (default: data/raw)")
+    parser.add_argument("--pattern", default="producthunt_*.html", help="Snapshot filename glob (default: producthunt_*.html)")
+    parser.add_argument("--max-pages", type=int, default=0, help="Only replay the first N snapshots (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the snapshot set (default: 3)")
+    
+    args = parser.parse_args()
+    
+    pages = load_snapshots(args.snapshot_dir, args.pattern, args.max_pages)
+    if not pages:
+        print(f"No snapshots matching {args.pattern} found in {args.snapshot_dir}")
+        sys.exit(1)
+    
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    print(f"Replaying {len(pages)} snapshots ({total_kb:.0f} KB) x {args.repeat} passes\n")
+    print(f"{'backend':<14}{'mode':<10}{'pages/sec':>12}")
+    
+    for backend in PARSER_BACKENDS:
+        if not is_backend_available(backend):
+            print(f"{backend:<14}{'-':<10}{'not installed':>12}")
+            continue
+        for partial in (False, True):
+            rate = benchmark(pages, backend, partial, args.repeat)
+            mode = "partial" if partial else "full"
+            print(f"{backend:<14}{mode:<10}{rate:>12.1f}")
+
+if __name__ == "__main__":
+    main()
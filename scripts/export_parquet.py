@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Export the catalog (products, listings, latest estimates and traffic) to Parquet
+files partitioned by snapshot date, for offline analysis with pandas or DuckDB.
+The first run writes everything, later runs only what changed; meant to run
+on a schedule (e.g. nightly from cron).
+
+Reading the current catalog back, e.g. with DuckDB:
+    SELECT * FROM read_parquet('data/exports/catalog/products/*/*.parquet', hive_partitioning = true)
+    WHERE id NOT IN (SELECT key FROM read_parquet('data/exports/catalog/deletions/*/*.parquet')
+                     WHERE "table" = 'products')
+    QUALIFY row_number() OVER (PARTITION BY id ORDER BY updated_at DESC) = 1
+(estimates and traffic are keyed by product_id and ordered by created_at.)
+Keys deleted since they were exported, e.g. duplicates folded away by entity
+resolution, are listed in deletions/ by incremental runs.
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job
+from app.services.parquet_export import export_catalog
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the catalog to partitioned Parquet files")
+    parser.add_argument("--export-dir", default=settings.PARQUET_EXPORT_DIR,
+                        help=f"Export directory (default: {settings.PARQUET_EXPORT_DIR})")
+    parser.add_argument("--full", action="store_true",
+                        help="Export every row and restart the manifest instead of exporting changes")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per read and row group (default: 10000)")
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        stats = export_catalog(db, args.export_dir, full=args.full, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"{stats.mode.capitalize()} export for {stats.snapshot_date} in {time.perf_counter() - started:.1f}s")
+    for table_name, rows in stats.rows.items():
+        print(f"  {table_name:<10} {rows} rows")
+    for path in stats.files:
+        print(f"  wrote {os.path.join(args.export_dir, path)}")
+
+if __name__ == "__main__":
+    main()
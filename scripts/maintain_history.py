@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Keep scrape_logs, traffic_data and mrr_estimates bounded: create upcoming monthly
+partitions, roll raw rows past their retention into daily/weekly rollups, and
+drop expired partitions and rollups. Meant to run daily (e.g. from cron).
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.database import SessionLocal, engine, Base
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job, history_rollup
+from app.services.history_retention import HISTORY_TABLES, is_postgres, maintain_history, partition_table
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition, compact and expire history tables")
+    parser.add_argument("--partition", action="store_true",
+                        help="First convert unpartitioned history tables to monthly range partitions (PostgreSQL only)")
+
+    args = parser.parse_args()
+
+    # Creates the rollup tables on databases that predate them
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if args.partition:
+            if not is_postgres(db):
+                print("Native partitioning needs PostgreSQL; compacting without it")
+            for table in HISTORY_TABLES:
+                if partition_table(db, table):
+                    print(f"Partitioned {table.table_name} by month on {table.time_column}")
+
+        started = time.perf_counter()
+        stats = maintain_history(db)
+        for table_name, rolled_up in stats.rolled_up.items():
+            print(f"{table_name}: rolled up {rolled_up} raw rows")
+        if stats.partitions_dropped:
+            print(f"Dropped partitions: {', '.join(stats.partitions_dropped)}")
+        print(f"Deleted {stats.rollups_deleted} expired rollups in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -11,10 +11,12 @@ import random
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job, fx_rate
 from app.models.product import Product
 from app.models.marketplace import Marketplace, ProductMarketplace
 from app.models.estimate import MrrEstimate
 from app.models.traffic import TrafficData
+from app.services.pricing import max_usd_monthly_prices, sync_price_plans
 
 def create_sample_data(db):
     """Create sample data for development/testing"""
@@ -120,6 +122,7 @@ def create_sample_data(db):
                     price_plans=price_plans
                 )
                 db.add(listing)
+                sync_price_plans(db, listing)
     
     # Create traffic data for products
     for product in created_products:
@@ -138,20 +141,15 @@ def create_sample_data(db):
             db.add(traffic_data)
     
     # Create MRR estimates for products
+    db.flush()
+    highest_prices = max_usd_monthly_prices(db, [product.id for product in created_products])
     for product in created_products:
         # Check if estimate already exists
         existing_estimate = db.query(MrrEstimate).filter(MrrEstimate.product_id == product.id).first()
         
         if not existing_estimate:
             # Get the highest price plan
-            listings = db.query(ProductMarketplace).filter(ProductMarketplace.product_id == product.id).all()
-            highest_price = 0.0
-            
-            for listing in listings:
-                if listing.price_plans:
-                    for plan in listing.price_plans:
-                        if plan["price"] > highest_price:
-                            highest_price = plan["price"]
+            highest_price = highest_prices.get(product.id) or 0.0
             
             # Get traffic data
             traffic = db.query(TrafficData).filter(TrafficData.product_id == product.id).first()
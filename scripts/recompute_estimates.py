@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Recompute MRR estimates for the catalog, writing rows only for products whose inputs changed
+"""
+
+import argparse
+import json
+import sys
+import os
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job
+from app.services.mrr_estimator import MrrEstimator
+from app.services.estimate_recompute import EstimateRecomputer, has_stale_estimates
+
+def load_checkpoint(path):
+    """Product id the last interrupted run had fully written"""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("last_product_id", 0)
+
+def save_checkpoint(path, last_product_id):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"last_product_id": last_product_id}, f)
+    os.replace(tmp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute MRR estimates for changed products")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Estimator processes (default: CPU count)")
+    parser.add_argument("--chunk-size", "--batch-size", dest="chunk_size", type=int, default=None,
+                        help="Products per chunk (default: ESTIMATE_RECOMPUTE_BATCH_SIZE)")
+    parser.add_argument("--category", help="Only recompute products in this category")
+    parser.add_argument("--pause", type=float, default=None,
+                        help="Seconds to pause between chunks (default: ESTIMATE_RECOMPUTE_PAUSE_SECONDS)")
+    parser.add_argument("--checkpoint", default="data/recompute_estimates.checkpoint.json",
+                        help="File recording progress so an interrupted run can resume")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the beginning")
+    parser.add_argument("--if-version-changed", action="store_true",
+                        help=f"Only run if some estimates predate estimator version {MrrEstimator.VERSION}")
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    read_db = SessionLocal()
+    try:
+        if args.if_version_changed and not has_stale_estimates(db):
+            print(f"All estimates are at version {MrrEstimator.VERSION}, nothing to do")
+            return
+
+        if os.path.dirname(args.checkpoint):
+            os.makedirs(os.path.dirname(args.checkpoint), exist_ok=True)
+        start_after = 0 if args.restart else load_checkpoint(args.checkpoint)
+        if start_after:
+            print(f"Resuming after product {start_after}")
+
+        recomputer = EstimateRecomputer(batch_size=args.chunk_size, pause=args.pause, workers=args.workers)
+
+        def report(stats):
+            # Stop advancing at the first failed chunk so a resume retries it
+            if not stats.failed:
+                save_checkpoint(args.checkpoint, stats.last_product_id)
+            print(f"{stats.scanned} products scanned, {stats.written} estimates written, "
+                  f"{stats.skipped} unchanged ({stats.products_per_second:.0f} products/sec)")
+
+        stats = recomputer.run(db, start_after=start_after, category=args.category,
+                               read_db=read_db, on_batch=report)
+        print(f"Done: {stats.written} estimates written, {stats.skipped} unchanged, "
+              f"{stats.failed} failed in {stats.elapsed:.1f}s ({stats.products_per_second:.0f} products/sec)")
+        if not stats.failed and os.path.exists(args.checkpoint):
+            os.remove(args.checkpoint)
+    finally:
+        read_db.close()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Re-scrape the Product Hunt listings that are due according to their change history
+"""
+
+import argparse
+import sys
+import os
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.scrapers.producthunt import ProductHuntScraper
+from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.models.marketplace import Marketplace
+from app.services.recrawl_scheduler import RecrawlScheduler
+from app.services.pricing import sync_price_plans
+from app.services.change_events import publish_changes
+
+def due_listings(db, scraper, scheduler, budget):
+    """The scraper's marketplace listings that are due, in priority order"""
+    marketplace = db.query(Marketplace).filter(Marketplace.name == scraper.marketplace_name).first()
+    if not marketplace:
+        print(f"Marketplace {scraper.marketplace_name} not found, nothing to re-crawl")
+        return []
+    return scheduler.due_listings(db, budget=budget, marketplace_id=marketplace.id)
+
+def recrawl_due_listings(db, scraper, scheduler, budget):
+    """Scrape due listings in priority order and reschedule each one"""
+    listings = due_listings(db, scraper, scheduler, budget)
+    print(f"{len(listings)} listings due (budget: {budget})")
+    
+    changed_count = 0
+    for listing in listings:
+        try:
+            product_data = scraper.scrape_product(listing.listing_url)
+        except Exception as e:
+            print(f"Error re-scraping {listing.listing_url}: {e}")
+            # Pick up the health flags the scraper just wrote, then retry later rather than right away
+            db.refresh(listing)
+            scheduler.record_failure(listing)
+            db.commit()
+            continue
+        
+        if scheduler.record_scrape(listing, product_data):
+            listing.upvotes = product_data.get('upvotes', listing.upvotes)
+            listing.price_plans = product_data.get('price_plans', listing.price_plans)
+            sync_price_plans(db, listing)
+            publish_changes(db, "product", [listing.product_id])
+            changed_count += 1
+        db.commit()
+    
+    return len(listings), changed_count
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scrape due Product Hunt listings")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="Maximum listings to scrape (default: RECRAWL_WINDOW_HOURS / REQUEST_DELAY)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the due listings")
+    
+    args = parser.parse_args()
+    
+    scheduler = RecrawlScheduler()
+    budget = args.budget if args.budget is not None else scheduler.crawl_budget()
+    scraper = ProductHuntScraper()
+    
+    db = SessionLocal()
+    try:
+        if args.dry_run:
+            for listing in due_listings(db, scraper, scheduler, budget):
+                print(f"{listing.next_scrape_at or 'never scraped'}  {listing.listing_url}")
+            return
+        
+        scraped, changed = recrawl_due_listings(db, scraper, scheduler, budget)
+        print(f"Re-scraped {scraped} listings, {changed} changed")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Rebuild the catalog offline by re-parsing saved page snapshots (no network needed)
+"""
+
+import argparse
+import sys
+import os
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log
+from app.services.ingestion import save_products_to_db
+from app.services.snapshot_replay import SNAPSHOT_SCRAPERS, load_snapshot_urls, replay_snapshots
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse saved snapshots into the database")
+    parser.add_argument("--snapshot-dir", default="data/raw", help="Snapshot directory (default: data/raw)")
+    parser.add_argument("--marketplace", default="producthunt", choices=sorted(SNAPSHOT_SCRAPERS),
+                        help="Snapshot filename prefix (default: producthunt)")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Products per DB write (default: 500)")
+    parser.add_argument("--limit", type=int, default=None, help="Only replay the first N snapshots")
+    parser.add_argument("--skip-estimates", action="store_true", help="Don't recompute traffic and MRR estimates")
+    parser.add_argument("--dry-run", action="store_true", help="Parse only, don't write to the database")
+    
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        snapshot_urls = load_snapshot_urls(db)
+        print(f"Loaded source URLs for {len(snapshot_urls)} snapshots")
+        
+        def save_batch(batch):
+            # Replayed pages are old captures: don't touch the re-crawl schedule
+            return save_products_to_db(batch, db, with_estimates=not args.skip_estimates,
+                                       record_history=False)
+        
+        stats = replay_snapshots(
+            args.snapshot_dir,
+            snapshot_urls,
+            save_batch=None if args.dry_run else save_batch,
+            prefix=args.marketplace,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            limit=args.limit
+        )
+    finally:
+        db.close()
+    
+    print(f"Replayed {stats.parsed + stats.failed} snapshots in {stats.elapsed:.1f}s "
+          f"({stats.pages_per_second:.0f} pages/sec)")
+    print(f"Parsed: {stats.parsed}, failed: {stats.failed}, saved: {stats.saved}")
+
+if __name__ == "__main__":
+    main()
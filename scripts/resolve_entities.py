@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Find products listed on several marketplaces and merge them into one canonical product
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job
+from app.models.product import Product
+from app.models.marketplace import Marketplace
+from app.services.entity_resolution import EntityResolver, registrable_domain, resolve_entities
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate products across marketplaces")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Name similarity needed to merge (default: ENTITY_NAME_THRESHOLD)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the clusters that would be merged")
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        marketplace_domains = {
+            registrable_domain(base_url)
+            for (base_url,) in db.query(Marketplace.base_url) if base_url
+        }
+        resolver = EntityResolver(name_threshold=args.threshold, ignored_domains=marketplace_domains)
+
+        started = time.perf_counter()
+        clusters = resolve_entities(db, resolver=resolver, dry_run=args.dry_run)
+        elapsed = time.perf_counter() - started
+
+        if args.dry_run:
+            names = {}
+            for cluster in clusters:
+                for product_id, name in db.query(Product.id, Product.name).filter(Product.id.in_(cluster)):
+                    names[product_id] = name
+                print(" = ".join(f"{names.get(product_id)} (#{product_id})" for product_id in cluster))
+
+        merged = sum(len(cluster) - 1 for cluster in clusters)
+        action = "Would merge" if args.dry_run else "Merged"
+        print(f"{action} {merged} duplicate products into {len(clusters)} canonical products in {elapsed:.1f}s")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Manage scrape runs in the scrape_jobs queue: enqueue URLs, inspect progress, resume runs
+"""
+
+import argparse
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job
+from app.models.marketplace import Marketplace, ProductMarketplace
+from app.models.scrape_job import ScrapeJob
+from app.services.job_queue import ScrapeJobQueue
+
+def read_urls(urls_file):
+    """Read one URL per line, ignoring blanks and comments"""
+    with open(urls_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+def cmd_enqueue(args, db, queue):
+    marketplace = db.query(Marketplace).filter(Marketplace.name == args.marketplace).first()
+    if not marketplace:
+        print(f"Marketplace not found: {args.marketplace}")
+        sys.exit(1)
+    
+    if args.from_listings:
+        urls = (url for (url,) in db.query(ProductMarketplace.listing_url).filter(
+            ProductMarketplace.marketplace_id == marketplace.id,
+            ProductMarketplace.is_blocked.isnot(True)
+        ))
+    elif args.urls_file:
+        urls = read_urls(args.urls_file)
+    else:
+        urls = iter(args.urls)
+    
+    run_id = args.run_id or datetime.utcnow().strftime("run_%Y%m%d_%H%M%S")
+    added = queue.enqueue(db, run_id, marketplace.id, urls)
+    print(f"Enqueued {added} jobs in run {run_id}")
+
+def cmd_status(args, db, queue):
+    counts = queue.stats(db, run_id=args.run_id)
+    total = sum(counts.values())
+    label = args.run_id or "all runs"
+    print(f"Jobs for {label}: {total}")
+    for state, count in counts.items():
+        print(f"  {state:<8} {count}")
+    
+    if args.errors:
+        failed = db.query(ScrapeJob).filter(ScrapeJob.state == "failed")
+        if args.run_id:
+            failed = failed.filter(ScrapeJob.run_id == args.run_id)
+        for job in failed.order_by(ScrapeJob.id).limit(args.errors):
+            print(f"  [{job.id}] {job.url}: {job.last_error}")
+
+def cmd_resume(args, db, queue):
+    requeued = queue.resume(db, args.run_id, retry_failed=not args.keep_failed)
+    print(f"Requeued {requeued} jobs in run {args.run_id}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage scrape job runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    enqueue = subparsers.add_parser("enqueue", help="Add URLs to a run")
+    enqueue.add_argument("urls", nargs="*", help="URLs to scrape")
+    enqueue.add_argument("--run-id", default=None, help="Run to add to (default: new timestamped run)")
+    enqueue.add_argument("--marketplace", default="Product Hunt", help="Marketplace name (default: Product Hunt)")
+    enqueue.add_argument("--urls-file", default=None, help="File with one URL per line")
+    enqueue.add_argument("--from-listings", action="store_true", help="Enqueue every known listing of the marketplace")
+    
+    status = subparsers.add_parser("status", help="Show job counts per state")
+    status.add_argument("--run-id", default=None, help="Only count jobs of this run")
+    status.add_argument("--errors", type=int, default=0, help="Also show the last error of N failed jobs")
+    
+    resume = subparsers.add_parser("resume", help="Requeue stuck and failed jobs of a run")
+    resume.add_argument("run_id", help="Run to resume")
+    resume.add_argument("--keep-failed", action="store_true", help="Only requeue jobs with an expired lease")
+    
+    args = parser.parse_args()
+    commands = {"enqueue": cmd_enqueue, "status": cmd_status, "resume": cmd_resume}
+    
+    db = SessionLocal()
+    try:
+        commands[args.command](args, db, ScrapeJobQueue())
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
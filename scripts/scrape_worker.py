@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Scrape worker: claims jobs from the scrape_jobs queue, scrapes them and saves the results.
+Run as many workers as needed, on one host (--processes) or several.
+"""
+
+import argparse
+import multiprocessing
+import socket
+import sys
+import os
+import threading
+import time
+from datetime import datetime
+
+# Add backend to path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import product, marketplace, estimate, traffic, scrape_log, scrape_job
+from app.models.marketplace import Marketplace
+from app.scrapers.registry import get_scraper
+from app.scrapers.resilience import CircuitOpenError
+from app.services.ingestion import save_products_to_db
+from app.services.job_queue import ScrapeJobQueue
+
+class LeaseKeeper:
+    """Renews the leases of every job in a claimed batch in the background until each is released"""
+    
+    def __init__(self, queue, job_ids, worker_id):
+        self.queue = queue
+        self.job_ids = set(job_ids)
+        self.worker_id = worker_id
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+    
+    def release(self, job_id):
+        """Stop renewing a job once it has been completed, failed or deferred"""
+        with self.lock:
+            self.job_ids.discard(job_id)
+    
+    def _run(self):
+        interval = self.queue.lease.total_seconds() / 3
+        while not self.stopped.wait(interval):
+            with self.lock:
+                job_ids = sorted(self.job_ids)
+            db = SessionLocal()
+            try:
+                for job_id in job_ids:
+                    if not self.queue.renew_lease(db, job_id, self.worker_id):
+                        print(f"[{self.worker_id}] Lost lease on job {job_id}")
+                        self.release(job_id)
+            except Exception as e:
+                print(f"[{self.worker_id}] Error renewing leases: {e}")
+            finally:
+                db.close()
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+def process_job(job, queue, worker_id, scrapers, marketplace_names, db):
+    """Scrape one claimed job and save its result"""
+    marketplace_name = marketplace_names.get(job.marketplace_id)
+    if marketplace_name is None:
+        marketplace = db.query(Marketplace).filter(Marketplace.id == job.marketplace_id).first()
+        marketplace_name = marketplace.name if marketplace else None
+        marketplace_names[job.marketplace_id] = marketplace_name
+    
+    job_id, attempts = job.id, job.attempts
+    try:
+        if marketplace_name not in scrapers:
+            scrapers[marketplace_name] = get_scraper(marketplace_name)
+        scraper = scrapers[marketplace_name]
+        
+        product_data = scraper.scrape_product(job.url)
+        # None means the page was not modified since the last scrape
+        if product_data is not None:
+            outcomes = []
+            # save_products_to_db reports a bad row instead of raising; retry the job like any other failure
+            if not save_products_to_db([product_data], db, outcomes=outcomes):
+                error = outcomes[0][1] if outcomes else "unknown error"
+                raise RuntimeError(f"Product from {job.url} was not saved: {error}")
+        
+        held = queue.complete(db, job, worker_id)
+        result = True
+    except CircuitOpenError as e:
+        # Marketplace is paused: hand the job back and keep serving other marketplaces
+        db.rollback()
+        held = queue.defer(db, job, worker_id, datetime.utcfromtimestamp(e.retry_at))
+        result = False
+    except Exception as e:
+        db.rollback()
+        held = queue.fail(db, job, worker_id, str(e))
+        print(f"[{worker_id}] Job {job_id} failed (attempt {attempts}): {e}")
+        result = False
+    
+    if not held:
+        # The lease expired and another worker may have the job now; leave it to them
+        print(f"[{worker_id}] Lost lease on job {job_id}, result not recorded")
+    return result
+
+def run_worker(worker_id, run_id=None, batch_size=1, exit_when_empty=False):
+    """Claim and process jobs until stopped (or until the queue is empty)"""
+    queue = ScrapeJobQueue()
+    scrapers = {}
+    marketplace_names = {}
+    processed = 0
+    
+    print(f"[{worker_id}] Worker started")
+    db = SessionLocal()
+    try:
+        while True:
+            jobs = queue.claim(db, worker_id, limit=batch_size, run_id=run_id)
+            if not jobs:
+                if exit_when_empty:
+                    break
+                time.sleep(settings.JOB_POLL_INTERVAL)
+                continue
+            
+            # Jobs later in the batch wait their turn, so keep all of their leases alive
+            with LeaseKeeper(queue, [job.id for job in jobs], worker_id) as keeper:
+                for job in jobs:
+                    process_job(job, queue, worker_id, scrapers, marketplace_names, db)
+                    keeper.release(job.id)
+                    processed += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    
+    print(f"[{worker_id}] Worker stopped after {processed} jobs")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scrape queue workers")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes on this host (default: 1)")
+    parser.add_argument("--run-id", default=None, help="Only process jobs from this run")
+    parser.add_argument("--batch-size", type=int, default=1, help="Jobs claimed per poll (default: 1)")
+    parser.add_argument("--exit-when-empty", action="store_true", help="Stop once no jobs are left")
+    
+    args = parser.parse_args()
+    
+    base_id = f"{socket.gethostname()}-{os.getpid()}"
+    worker_args = dict(run_id=args.run_id, batch_size=args.batch_size, exit_when_empty=args.exit_when_empty)
+    
+    if args.processes <= 1:
+        run_worker(base_id, **worker_args)
+        return
+    
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"{base_id}-{i}",), kwargs=worker_args)
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+if __name__ == "__main__":
+    main()